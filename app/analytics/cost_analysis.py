@@ -1,21 +1,53 @@
+"""
+Route cost analytics. Orders are costed in SQL from their stage facts, with the
+distance and driver-time rates of each vehicle's transport type (transport_tariffs)
+and settings.cost_per_km / driver_cost_per_min for types without a tariff. In-memory
+stage costing (scenarios) looks the same tariffs up from the reference data cache.
+"""
 import logging
 from dataclasses import dataclass
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
+import numpy as np
 from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
 
 from app.config import settings
-from app.database.models import TransportStageFact
+from app.database.models import TransportStageFact, TransportTariff, TransportType, Vehicle
+from app.database.reference_data import reference_data
 
 logger = logging.getLogger(__name__)
 
 
-def compute_stage_cost(distance_km: float, duration_min: float) -> float:
-    return (
-        distance_km * settings.cost_per_km
-        + duration_min * settings.driver_cost_per_min
+def compute_stage_cost(distance_km, duration_min, cost_per_km=None, driver_cost_per_min=None):
+    """
+    Stage cost from scalars or aligned arrays. Rates default to the settings; NaN rates
+    (types without a tariff, see stage_tariffs) fall back to them as well.
+    """
+    per_km = settings.cost_per_km if cost_per_km is None else np.nan_to_num(cost_per_km, nan=settings.cost_per_km)
+    per_min = (
+        settings.driver_cost_per_min
+        if driver_cost_per_min is None
+        else np.nan_to_num(driver_cost_per_min, nan=settings.driver_cost_per_min)
     )
+    return distance_km * per_km + duration_min * per_min
+
+
+def stage_tariffs(
+    cost_per_km: np.ndarray, driver_cost_per_min: np.ndarray, type_pos: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-stage (cost_per_km, driver_cost_per_min) from the per-type tariff arrays of
+    ReferenceData and each stage's type position (ReferenceData.type_positions);
+    NaN where the position is -1 or the type has no tariff.
+    """
+    type_pos = np.asarray(type_pos, dtype=np.int64)
+    known = type_pos >= 0
+    per_km = np.full(len(type_pos), np.nan)
+    per_min = np.full(len(type_pos), np.nan)
+    per_km[known] = cost_per_km[type_pos[known]]
+    per_min[known] = driver_cost_per_min[type_pos[known]]
+    return per_km, per_min
 
 
 @dataclass
@@ -27,33 +59,87 @@ class RouteCost:
     total_cost: float
 
 
-def compute_route_costs(session: Session) -> List[RouteCost]:
-    rows = (
+def _route_cost_query(session: Session) -> Query:
+    """One row per order, ordered by order_id: id, distance, duration, CO2, cost."""
+    distance = func.coalesce(TransportStageFact.distance_km, 0.0)
+    duration = func.coalesce(TransportStageFact.duration_min, 0.0)
+    per_km = func.coalesce(TransportTariff.cost_per_km, settings.cost_per_km)
+    per_min = func.coalesce(TransportTariff.driver_cost_per_min, settings.driver_cost_per_min)
+    return (
         session.query(
             TransportStageFact.order_id,
-            func.sum(TransportStageFact.distance_km),
-            func.sum(TransportStageFact.duration_min),
-            func.sum(TransportStageFact.co2_kg),
+            func.sum(distance),
+            func.sum(duration),
+            func.sum(func.coalesce(TransportStageFact.co2_kg, 0.0)),
+            func.sum(distance * per_km + duration * per_min),
         )
+        .outerjoin(Vehicle, Vehicle.vehicle_id == TransportStageFact.vehicle_id)
+        .outerjoin(TransportTariff, TransportTariff.transport_type_id == Vehicle.transport_type_id)
+        .filter(TransportStageFact.order_id.isnot(None))
         .group_by(TransportStageFact.order_id)
-        .all()
+        .order_by(TransportStageFact.order_id)
     )
-    result: List[RouteCost] = []
-    for oid, dist, dur, co2 in rows:
-        if oid is None:
-            continue
-        distance_km = float(dist or 0.0)
-        duration_min = float(dur or 0.0)
-        total_cost = compute_stage_cost(distance_km, duration_min)
-        result.append(
-            RouteCost(
-                order_id=int(oid),
-                total_distance_km=distance_km,
-                total_duration_min=duration_min,
-                total_co2_kg=float(co2 or 0.0),
-                total_cost=total_cost,
-            )
-        )
+
+
+def _route_cost(row) -> RouteCost:
+    oid, dist, dur, co2, cost = row
+    return RouteCost(
+        order_id=int(oid),
+        total_distance_km=float(dist or 0.0),
+        total_duration_min=float(dur or 0.0),
+        total_co2_kg=float(co2 or 0.0),
+        total_cost=float(cost or 0.0),
+    )
+
+
+def iter_route_costs(session: Session, batch_size: int = 10_000) -> Iterator[RouteCost]:
+    """
+    Route costs of all orders by ascending order_id, streamed from a server-side
+    cursor in batches of batch_size rows instead of materializing the full result.
+    """
+    count = 0
+    for row in _route_cost_query(session).yield_per(batch_size):
+        count += 1
+        yield _route_cost(row)
+    logger.info("Streamed costs for %d routes", count)
+
+
+def route_costs_page(
+    session: Session, after_order_id: Optional[int] = None, limit: int = 1000
+) -> List[RouteCost]:
+    """Up to `limit` route costs with order_id > after_order_id (keyset pagination)."""
+    query = _route_cost_query(session)
+    if after_order_id is not None:
+        query = query.filter(TransportStageFact.order_id > after_order_id)
+    return [_route_cost(row) for row in query.limit(limit)]
+
+
+def compute_route_costs(session: Session) -> List[RouteCost]:
+    result = list(iter_route_costs(session))
     logger.info("Computed costs for %d routes", len(result))
     return result
 
+
+def set_tariff(
+    session: Session, transport_type: str, cost_per_km: float, driver_cost_per_min: float
+) -> TransportTariff:
+    """Create or update the tariff of a transport type (by TransportType.name)."""
+    type_id = (
+        session.query(TransportType.transport_type_id)
+        .filter(TransportType.name == transport_type)
+        .scalar()
+    )
+    if type_id is None:
+        raise ValueError(f"Unknown transport type: {transport_type}")
+    tariff = session.get(TransportTariff, type_id)
+    if tariff is None:
+        tariff = TransportTariff(transport_type_id=type_id)
+        session.add(tariff)
+    tariff.cost_per_km = cost_per_km
+    tariff.driver_cost_per_min = driver_cost_per_min
+    reference_data.invalidate()
+    logger.info(
+        "Tariff for %s: %.4f per km, %.4f per driver minute",
+        transport_type, cost_per_km, driver_cost_per_min,
+    )
+    return tariff
@@ -0,0 +1,212 @@
+"""
+Columnar exports for BI tools: stage facts and per-order summaries as an Arrow IPC
+stream or a Parquet file. Rows come from a server-side cursor and are encoded one
+record batch at a time, so an export never holds its full result in memory.
+pyarrow is optional; without it export_stream raises ExportUnavailable.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, String, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.database.models import FreightOrder, TransportStageFact, Vehicle
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only the export endpoints need it
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+DEFAULT_BATCH_SIZE = 65_536
+
+
+class ExportUnavailable(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    columns: Dict[str, Tuple[Any, str]]  # name -> (SQL expression, Arrow type name)
+    select_from: Callable[[Any], Any]    # adds FROM / JOINs to a select of the columns
+    order_by: Sequence[Any] = ()
+
+
+def _float(column):
+    # Numeric columns would arrive as Decimal; let the database convert them.
+    return cast(column, Float)
+
+
+def _facts() -> ExportDataset:
+    f = TransportStageFact
+    return ExportDataset(
+        columns={
+            "id": (cast(f.id, String), "string"),
+            "order_id": (f.order_id, "int64"),
+            "planned_date": (FreightOrder.planned_date, "date32"),
+            "vehicle_id": (f.vehicle_id, "int64"),
+            "transport_type": (f.transport_type, "string"),
+            "powertrain": (f.powertrain, "string"),
+            "from_stop_id": (f.from_stop_id, "int64"),
+            "to_stop_id": (f.to_stop_id, "int64"),
+            "distance_km": (_float(f.distance_km), "float64"),
+            "duration_min": (_float(f.duration_min), "float64"),
+            "total_weight_kg": (_float(f.total_weight_kg), "float64"),
+            "vehicle_capacity_kg": (_float(f.vehicle_capacity_kg), "float64"),
+            "load_ratio": (_float(f.load_ratio), "float64"),
+            "co2_kg": (_float(f.co2_kg), "float64"),
+            "created_at": (f.created_at, "timestamp"),
+        },
+        select_from=lambda stmt: stmt.select_from(f).outerjoin(
+            FreightOrder, FreightOrder.order_id == f.order_id
+        ),
+    )
+
+
+def _orders() -> ExportDataset:
+    f = TransportStageFact
+    stages = (
+        select(
+            f.order_id.label("order_id"),
+            func.count().label("n_stages"),
+            func.sum(_float(f.distance_km)).label("distance_km"),
+            func.sum(_float(f.co2_kg)).label("co2_kg"),
+            func.avg(_float(f.load_ratio)).label("load_ratio"),
+        )
+        .group_by(f.order_id)
+        .subquery()
+    )
+    return ExportDataset(
+        columns={
+            "order_id": (FreightOrder.order_id, "int64"),
+            "planned_date": (FreightOrder.planned_date, "date32"),
+            "vehicle_id": (FreightOrder.vehicle_id, "int64"),
+            "license_plate": (Vehicle.license_plate, "string"),
+            "total_weight": (FreightOrder.total_weight, "float64"),
+            "total_volume": (FreightOrder.total_volume, "float64"),
+            "total_distance": (FreightOrder.total_distance, "float64"),
+            "total_duration": (FreightOrder.total_duration, "float64"),
+            "n_stages": (func.coalesce(stages.c.n_stages, 0), "int64"),
+            "distance_km": (stages.c.distance_km, "float64"),
+            "total_co2_kg": (stages.c.co2_kg, "float64"),
+            "avg_load_ratio": (stages.c.load_ratio, "float64"),
+        },
+        select_from=lambda stmt: (
+            stmt.select_from(FreightOrder)
+            .outerjoin(Vehicle, Vehicle.vehicle_id == FreightOrder.vehicle_id)
+            .outerjoin(stages, stages.c.order_id == FreightOrder.order_id)
+        ),
+        order_by=(FreightOrder.order_id,),
+    )
+
+
+DATASETS: Dict[str, Callable[[], ExportDataset]] = {"facts": _facts, "orders": _orders}
+
+
+def export_columns(dataset: str) -> List[str]:
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown export dataset {dataset!r}; expected one of {list(DATASETS)}")
+    return list(DATASETS[dataset]().columns)
+
+
+def _arrow_type(name: str):
+    return pa.timestamp("us") if name == "timestamp" else getattr(pa, name)()
+
+
+class _ChunkSink:
+    """Write-only file object handing out what was written since the last take()."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets in its footer, so this never resets.
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_stream(
+    session: Session,
+    dataset: str,
+    fmt: str = "arrow",
+    columns: Optional[Sequence[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """
+    Encoded chunks of `dataset` ("facts" or "orders") in `fmt`, restricted to
+    `columns` (all by default) and to orders planned between start_date and end_date
+    (inclusive). Arguments are checked immediately; the query runs as the iterator
+    is consumed, one record batch per batch_size rows.
+    """
+    if pa is None:
+        raise ExportUnavailable("pyarrow is required for Arrow/Parquet exports; install it to enable them")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+    names = list(columns or export_columns(dataset))
+    spec = DATASETS[dataset]()
+    unknown = [c for c in names if c not in spec.columns]
+    if unknown:
+        raise ValueError(f"Unknown {dataset} columns: {', '.join(unknown)}")
+
+    stmt = spec.select_from(select(*(spec.columns[c][0].label(c) for c in names)))
+    if start_date is not None:
+        stmt = stmt.where(FreightOrder.planned_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(FreightOrder.planned_date <= end_date)
+    stmt = stmt.order_by(*spec.order_by)
+    schema = pa.schema([(c, _arrow_type(spec.columns[c][1])) for c in names])
+    return _encode(session, stmt, schema, dataset, fmt, batch_size)
+
+
+def _encode(session: Session, stmt, schema, dataset: str, fmt: str, batch_size: int) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pq.ParquetWriter(sink, schema)
+    result = session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    n_rows = 0
+    try:
+        for rows in result.partitions():
+            writer.write_batch(pa.record_batch(
+                [pa.array([row[i] for row in rows], type=field.type) for i, field in enumerate(schema)],
+                schema=schema,
+            ))
+            n_rows += len(rows)
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+        writer.close()
+        yield sink.take()
+    finally:
+        result.close()
+    logger.info("Exported %d %s rows as %s", n_rows, dataset, fmt)
@@ -10,13 +10,24 @@ from app.database.models import (
     FreightOrderStage,
     TransportStageFact,
     Vehicle,
-    VehicleAttributes,
     TransportType,
 )
+from app.database.reference_data import get_reference_data
 
 logger = logging.getLogger(__name__)
 
 
+def compute_stage_co2(distance_km, load_ratio, co2_empty_kg_km, co2_loaded_kg_km):
+    """
+    Emission model of the fact table: per-km CO2 interpolated linearly between the
+    empty and fully loaded rates by load ratio, times distance. Accepts scalars or
+    NumPy arrays / pandas Series (broadcast elementwise).
+    """
+    return distance_km * (
+        co2_empty_kg_km + load_ratio * (co2_loaded_kg_km - co2_empty_kg_km)
+    )
+
+
 def _truncate_fact_table(session: Session) -> None:
     session.execute(text("TRUNCATE transport_stage_fact"))
     logger.info("Truncated transport_stage_fact")
@@ -43,13 +54,11 @@ def build_transport_stage_fact(session: Session) -> int:
         .all()
     }
 
-    capacities: Dict[int, float] = {}
-    for vt_id, cap in (
-        session.query(
-            VehicleAttributes.transport_type_id, VehicleAttributes.capacity_kg
-        ).all()
-    ):
-        capacities[int(vt_id)] = float(cap or 0.0)
+    # Master data may just have been re-ingested: force a fingerprint check.
+    attributes = get_reference_data(session, refresh=True).attributes_by_type_id
+    capacities: Dict[int, float] = {
+        tt_id: va.capacity_kg or 0.0 for tt_id, va in attributes.items()
+    }
 
     stage_query = (
         session.query(
@@ -62,6 +71,7 @@ def build_transport_stage_fact(session: Session) -> int:
             FreightOrder.vehicle_id,
             Vehicle.transport_type_id,
             TransportType.name,
+            TransportType.powertrain,
             FreightOrder.total_weight,
         )
         .join(FreightOrder, FreightOrderStage.order_id == FreightOrder.order_id)
@@ -83,6 +93,7 @@ def build_transport_stage_fact(session: Session) -> int:
         vehicle_id,
         transport_type_id,
         transport_type_name,
+        powertrain,
         order_total_weight,
     ) in stage_query:
         if distance is None:
@@ -102,11 +113,7 @@ def build_transport_stage_fact(session: Session) -> int:
         else:
             load_ratio = float(total_weight) / capacity
 
-        va = (
-            session.query(VehicleAttributes)
-            .filter(VehicleAttributes.transport_type_id == tt_id)
-            .first()
-        )
+        va = attributes.get(tt_id) if tt_id is not None else None
         if not va:
             continue
         co2_empty = float(va.co2_empty_kg_km or 0.0)
@@ -114,15 +121,14 @@ def build_transport_stage_fact(session: Session) -> int:
         distance_km = float(distance or 0.0)
         duration_min = float(duration or 0.0)
 
-        co2_kg = distance_km * (
-            co2_empty + load_ratio * (co2_loaded - co2_empty)
-        )
+        co2_kg = compute_stage_co2(distance_km, load_ratio, co2_empty, co2_loaded)
 
         facts.append(
             TransportStageFact(
                 order_id=order_id_int,
                 vehicle_id=vehicle_id_int,
                 transport_type=transport_type_name,
+                powertrain=powertrain,
                 from_stop_id=int(from_stop_id) if from_stop_id is not None else None,
                 to_stop_id=int(to_stop_id) if to_stop_id is not None else None,
                 distance_km=distance_km,
@@ -143,6 +149,17 @@ def build_transport_stage_fact(session: Session) -> int:
     return len(facts)
 
 
+def fact_version(session: Session) -> str:
+    """
+    Identifies the current fact build: row count plus newest created_at. Changes on
+    every rebuild, so derived tables can record which facts they were computed from.
+    """
+    count, latest = session.query(
+        func.count(TransportStageFact.id), func.max(TransportStageFact.created_at)
+    ).one()
+    return f"{int(count or 0)}@{latest.isoformat() if latest else 'empty'}"
+
+
 MATERIALIZED_VIEWS_SQL = """
 CREATE MATERIALIZED VIEW IF NOT EXISTS emissions_per_vehicle AS
 SELECT
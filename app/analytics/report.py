@@ -0,0 +1,198 @@
+"""
+Analytics report: fleet totals, per-vehicle stats, highest-emission routes,
+underutilized vehicles and electric-vehicle utilization from a single scan of
+transport_stage_fact. On PostgreSQL the per-vehicle, per-order and overall totals
+come from one GROUPING SETS query; other dialects group by (vehicle, order) once and
+roll the partial sums up in pandas.
+"""
+import csv
+import io
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from app.analytics.utilization import (
+    HighEmissionRoute,
+    UnderutilizedVehicle,
+    UnusedElectricCapacity,
+)
+from app.database.models import TransportStageFact, TransportType, Vehicle
+from app.database.powertrain import ELECTRIC
+
+logger = logging.getLogger(__name__)
+
+_SUMS = ["n_stages", "distance_km", "co2_kg", "load_sum", "load_count"]
+
+
+@dataclass
+class VehicleStats:
+    vehicle_id: int
+    n_stages: int
+    total_distance_km: float
+    total_co2_kg: float
+    avg_load_ratio: Optional[float]  # None when every load_ratio of the vehicle is NULL
+
+
+@dataclass
+class AnalyticsReport:
+    total_co2_kg: float
+    total_distance_km: float
+    avg_load_ratio: float
+    n_stages: int
+    n_orders: int
+    n_vehicles: int
+    vehicles: List[VehicleStats]
+    high_emission_routes: List[HighEmissionRoute]
+    underutilized_vehicles: List[UnderutilizedVehicle]
+    electric_vehicles: List[UnusedElectricCapacity]
+    underutilized_threshold: float
+    elapsed_s: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_csv(self) -> str:
+        """Long format: section, id, metric, value (one row per reported number)."""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["section", "id", "metric", "value"])
+        for metric in ("total_co2_kg", "total_distance_km", "avg_load_ratio", "n_stages", "n_orders", "n_vehicles"):
+            writer.writerow(["totals", "", metric, getattr(self, metric)])
+        sections = [
+            ("vehicle", "vehicle_id", self.vehicles),
+            ("high_emission_route", "order_id", self.high_emission_routes),
+            ("underutilized_vehicle", "vehicle_id", self.underutilized_vehicles),
+            ("electric_vehicle", "vehicle_id", self.electric_vehicles),
+        ]
+        for section, key, items in sections:
+            for item in items:
+                row = asdict(item)
+                ident = row.pop(key)
+                for metric, value in row.items():
+                    writer.writerow([section, ident, metric, value])
+        writer.writerow(["timing", "", "elapsed_s", round(self.elapsed_s, 4)])
+        return buf.getvalue()
+
+
+def _measures():
+    return (
+        func.count(),
+        func.sum(func.coalesce(TransportStageFact.distance_km, 0.0)),
+        func.sum(func.coalesce(TransportStageFact.co2_kg, 0.0)),
+        func.sum(TransportStageFact.load_ratio),
+        func.count(TransportStageFact.load_ratio),  # AVG ignores NULL loads; so do we
+    )
+
+
+def _grouped_frames(session: Session):
+    """(per-vehicle, per-order, totals) partial sums from one pass over the fact table."""
+    vehicle, order = TransportStageFact.vehicle_id, TransportStageFact.order_id
+    if session.get_bind().dialect.name == "postgresql":
+        rows = (
+            session.query(func.grouping(vehicle, order), vehicle, order, *_measures())
+            .group_by(func.grouping_sets(tuple_(vehicle), tuple_(order), tuple_()))
+            .all()
+        )
+        df = pd.DataFrame(rows, columns=["grouping", "vehicle_id", "order_id", *_SUMS])
+        df[_SUMS] = df[_SUMS].astype(np.float64)
+        # grouping() sets bit 1 when vehicle_id is rolled up and bit 0 for order_id.
+        by_vehicle = df[df["grouping"] == 1].drop(columns=["grouping", "order_id"])
+        by_order = df[df["grouping"] == 2].drop(columns=["grouping", "vehicle_id"])
+        totals = df.loc[df["grouping"] == 3, _SUMS].sum()
+    else:
+        rows = session.query(vehicle, order, *_measures()).group_by(vehicle, order).all()
+        df = pd.DataFrame(rows, columns=["vehicle_id", "order_id", *_SUMS])
+        df[_SUMS] = df[_SUMS].astype(np.float64)
+        by_vehicle = df.groupby("vehicle_id", dropna=False, as_index=False)[_SUMS].sum()
+        by_order = df.groupby("order_id", dropna=False, as_index=False)[_SUMS].sum()
+        totals = df[_SUMS].sum()
+    return by_vehicle, by_order, totals
+
+
+def _avg_load(frame: pd.DataFrame) -> np.ndarray:
+    """AVG(load_ratio) per row, NaN where no load was recorded."""
+    count = frame["load_count"].to_numpy()
+    return np.divide(frame["load_sum"].to_numpy(), count, out=np.full(len(frame), np.nan), where=count > 0)
+
+
+def build_analytics_report(
+    session: Session, top_n: int = 5, underutilized_threshold: float = 0.5
+) -> AnalyticsReport:
+    start = time.perf_counter()
+    by_vehicle, by_order, totals = _grouped_frames(session)
+
+    by_vehicle = by_vehicle[by_vehicle["vehicle_id"].notna()].sort_values("vehicle_id")
+    by_vehicle = by_vehicle.assign(avg_load=_avg_load(by_vehicle))
+    by_order = by_order[by_order["order_id"].notna()]
+
+    vehicles = [
+        VehicleStats(
+            vehicle_id=int(r.vehicle_id),
+            n_stages=int(r.n_stages),
+            total_distance_km=float(r.distance_km),
+            total_co2_kg=float(r.co2_kg),
+            avg_load_ratio=None if np.isnan(r.avg_load) else float(r.avg_load),
+        )
+        for r in by_vehicle.itertuples(index=False)
+    ]
+    worst = by_order.nlargest(top_n, "co2_kg")
+    routes = [
+        HighEmissionRoute(
+            order_id=int(r.order_id), total_co2=float(r.co2_kg), total_distance_km=float(r.distance_km)
+        )
+        for r in worst.itertuples(index=False)
+    ]
+    underutilized = [
+        UnderutilizedVehicle(
+            vehicle_id=v.vehicle_id, avg_load_ratio=v.avg_load_ratio, total_distance_km=v.total_distance_km
+        )
+        for v in vehicles
+        if v.avg_load_ratio is not None and v.avg_load_ratio < underutilized_threshold
+    ]
+
+    electric_types = dict(
+        session.query(Vehicle.vehicle_id, TransportType.name)
+        .join(TransportType, Vehicle.transport_type_id == TransportType.transport_type_id)
+        .filter(TransportType.powertrain == ELECTRIC)
+        .all()
+    )
+    electric = [
+        UnusedElectricCapacity(
+            vehicle_id=v.vehicle_id,
+            transport_type=electric_types[v.vehicle_id],
+            avg_load_ratio=v.avg_load_ratio,
+            total_distance_km=v.total_distance_km,
+        )
+        for v in vehicles
+        if v.vehicle_id in electric_types
+    ]
+
+    load_count = float(totals["load_count"])
+    report = AnalyticsReport(
+        total_co2_kg=float(totals["co2_kg"]),
+        total_distance_km=float(totals["distance_km"]),
+        avg_load_ratio=float(totals["load_sum"]) / load_count if load_count else 0.0,
+        n_stages=int(totals["n_stages"]),
+        n_orders=len(by_order),
+        n_vehicles=len(vehicles),
+        vehicles=vehicles,
+        high_emission_routes=routes,
+        underutilized_vehicles=underutilized,
+        electric_vehicles=electric,
+        underutilized_threshold=underutilized_threshold,
+        elapsed_s=time.perf_counter() - start,
+    )
+    logger.info(
+        "Analytics report over %d stages in %.3f s", report.n_stages, report.elapsed_s
+    )
+    return report
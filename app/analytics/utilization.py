@@ -1,11 +1,12 @@
 import logging
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database.models import TransportStageFact, Vehicle, TransportType
+from app.database.models import TransportStageFact
+from app.database.powertrain import ELECTRIC
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +29,7 @@ class HighEmissionRoute:
 class UnusedElectricCapacity:
     vehicle_id: int
     transport_type: str
-    avg_load_ratio: float
+    avg_load_ratio: Optional[float]
     total_distance_km: float
 
 
@@ -86,29 +87,20 @@ def high_emission_routes(session: Session, top_n: int = 5) -> List[HighEmissionR
 
 def unused_electric_capacity(session: Session) -> List[UnusedElectricCapacity]:
     """
-    Find electric vehicles whose average load ratio is low.
-    Electric detection is heuristic: transport type name ILIKE '%elektro%' or '%electric%'.
+    Electric vehicles with their average load ratio and distance. Uses the
+    powertrain denormalized into transport_stage_fact (an indexed equality filter).
     """
-    q = (
+    rows = (
         session.query(
             TransportStageFact.vehicle_id,
             func.avg(TransportStageFact.load_ratio),
             func.sum(TransportStageFact.distance_km),
-            TransportType.name,
-        )
-        .join(Vehicle, TransportStageFact.vehicle_id == Vehicle.vehicle_id)
-        .join(
-            TransportType,
-            Vehicle.transport_type_id == TransportType.transport_type_id,
-        )
-        .filter(
-            func.lower(TransportType.name).like("%elektro%")
-            | func.lower(TransportType.name).like("%electric%")
+            TransportStageFact.transport_type,
         )
-        .group_by(TransportStageFact.vehicle_id, TransportType.name)
+        .filter(TransportStageFact.powertrain == ELECTRIC)
+        .group_by(TransportStageFact.vehicle_id, TransportStageFact.transport_type)
+        .all()
     )
-
-    rows = q.all()
     result = [
         UnusedElectricCapacity(
             vehicle_id=int(vid),
@@ -121,4 +113,3 @@ def unused_electric_capacity(session: Session) -> List[UnusedElectricCapacity]:
     ]
     logger.info("Found %d electric vehicles with tracked utilization", len(result))
     return result
-
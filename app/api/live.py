@@ -0,0 +1,268 @@
+"""
+Live dashboard updates for Server-Sent Events clients. While at least one client is
+connected, one background thread waits for data changes (LISTEN on PostgreSQL, version
+polling on other databases), computes the dashboard summary and top alerts once per
+change, and fans the encoded event out to every connected client's queue, instead of
+each client polling the database. The thread starts with the first client and exits
+after the last one leaves.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.analytics.fact_builder import fact_version
+from app.api.routes.alerts import get_alert_recommendations
+from app.api.routes.dashboard import get_dashboard_summary
+from app.config import settings
+from app.database.connection import SessionLocal, engine as default_engine
+from app.database.notify import UPDATES_CHANNEL
+from app.recommendation.store import stored_versions
+
+logger = logging.getLogger(__name__)
+
+# Events a client may fall behind by before its backlog is replaced with a snapshot.
+QUEUE_SIZE = 16
+
+
+@dataclass(frozen=True)
+class LiveSnapshot:
+    version: Tuple[str, Optional[Tuple[str, str]]]  # (fact_version, stored recommendation versions)
+    summary: Dict[str, Any]
+    alerts: List[Dict[str, Any]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": self.version[0], "summary": self.summary, "alerts": self.alerts}
+
+
+def data_version(session: Session) -> Tuple[str, Optional[Tuple[str, str]]]:
+    return fact_version(session), stored_versions(session)
+
+
+def compute_snapshot(session: Session, alerts_limit: int = 50) -> LiveSnapshot:
+    version = data_version(session)
+    return LiveSnapshot(
+        version=version,
+        summary=get_dashboard_summary(session).model_dump(),
+        alerts=[
+            a.model_dump()
+            for a in get_alert_recommendations(session, alert_type=None, min_priority=None, limit=alerts_limit)
+        ],
+    )
+
+
+def _alert_key(alert: Dict[str, Any]) -> Tuple[int, str]:
+    return alert["order_id"], alert["alert_type"]
+
+
+def snapshot_delta(old: LiveSnapshot, new: LiveSnapshot, source: str) -> Dict[str, Any]:
+    """
+    Update event payload: the new summary, the change of every KPI that moved, alerts
+    that are new or changed, and (order_id, alert_type) of alerts that dropped out.
+    """
+    previous = {_alert_key(a): a for a in old.alerts}
+    current = {_alert_key(a) for a in new.alerts}
+    return {
+        "version": new.version[0],
+        "source": source,
+        "summary": new.summary,
+        "kpi_deltas": {
+            name: value - old.summary.get(name, 0)
+            for name, value in new.summary.items()
+            if value != old.summary.get(name)
+        },
+        "new_alerts": [a for a in new.alerts if previous.get(_alert_key(a)) != a],
+        "removed_alerts": [
+            {"order_id": order_id, "alert_type": alert_type}
+            for order_id, alert_type in previous
+            if (order_id, alert_type) not in current
+        ],
+    }
+
+
+def encode_event(event: str, payload: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class LiveBroadcaster:
+    """
+    Owns the change-listener thread and the subscriber queues. subscribe/unsubscribe
+    run on the event loop; the thread hands events to the loop with call_soon_threadsafe.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        engine=None,
+        poll_s: float = 5.0,
+        alerts_limit: int = 50,
+    ) -> None:
+        self._session_factory = session_factory
+        self._engine = engine or default_engine
+        self._poll_s = poll_s
+        self._alerts_limit = alerts_limit
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._lock = threading.Lock()
+        self._snapshot: Optional[LiveSnapshot] = None
+        self._snapshot_event: Optional[bytes] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self._poll_s + 1.0)
+
+    def subscribe(self) -> asyncio.Queue:
+        """New client queue (call on the event loop); starts the listener thread if idle."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(queue)
+            if self._snapshot_event is not None:
+                queue.put_nowait(self._snapshot_event)
+            if self._thread is None and not self._stop.is_set():
+                self._loop = asyncio.get_running_loop()
+                self._thread = threading.Thread(target=self._run, name="live-updates", daemon=True)
+                self._thread.start()
+        logger.info("Live client connected (%d total)", len(self._subscribers))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        # The thread notices an empty subscriber set after its current wait.
+        with self._lock:
+            self._subscribers.discard(queue)
+        logger.info("Live client disconnected (%d total)", len(self._subscribers))
+
+    def _idle(self) -> bool:
+        """True (and the thread is released) once no client is left; decided under the lock."""
+        with self._lock:
+            if self._subscribers and not self._stop.is_set():
+                return False
+            self._thread = None
+            return True
+
+    def _offer(self, queue: asyncio.Queue, data: bytes) -> None:
+        if queue.full():
+            # A client this far behind gets the current state instead of the backlog.
+            while not queue.empty():
+                queue.get_nowait()
+            data = self._snapshot_event or data
+        queue.put_nowait(data)
+
+    def _publish(self, data: bytes) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue in subscribers:
+            self._loop.call_soon_threadsafe(self._offer, queue, data)
+
+    def refresh(self, source: str) -> bool:
+        """Recompute and publish if the facts or recommendations changed; True if published."""
+        with self._session_factory() as session:
+            if self._snapshot is not None and data_version(session) == self._snapshot.version:
+                return False
+            new = compute_snapshot(session, self._alerts_limit)
+        old = self._snapshot
+        with self._lock:
+            self._snapshot = new
+            self._snapshot_event = encode_event("snapshot", new.to_dict())
+        if old is None:
+            self._publish(self._snapshot_event)
+        else:
+            self._publish(encode_event("update", snapshot_delta(old, new, source)))
+        logger.info("Published %s update to %d live clients", source, len(self._subscribers))
+        return True
+
+    def _listen(self):
+        """Driver connection LISTENing on UPDATES_CHANNEL, or None without PostgreSQL."""
+        if self._engine.dialect.name != "postgresql":
+            return None
+        try:
+            raw = self._engine.raw_connection()
+            raw.detach()  # closed by us, never returned to the pool in autocommit mode
+            conn = raw.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {UPDATES_CHANNEL}")
+            logger.info("Listening for data changes on %s", UPDATES_CHANNEL)
+            return conn
+        except Exception:
+            logger.exception("LISTEN %s failed; polling for changes instead", UPDATES_CHANNEL)
+            return None
+
+    def _wait_for_notifications(self, conn) -> Set[str]:
+        if not select.select([conn], [], [], self._poll_s)[0]:
+            return set()
+        conn.poll()
+        sources = set()
+        while conn.notifies:
+            sources.add(conn.notifies.pop(0).payload)
+        return sources
+
+    def _run(self) -> None:
+        conn = None
+        try:
+            while not self._idle():
+                try:
+                    if conn is None:
+                        conn = self._listen()
+                        # Nothing was notified while not listening: catch up first.
+                        if self._snapshot is None:
+                            self.refresh("startup")
+                        else:
+                            self.refresh("resume" if conn is not None else "poll")
+                    if conn is not None:
+                        sources = self._wait_for_notifications(conn)
+                        if sources:
+                            self.refresh(",".join(sorted(sources)))
+                    else:
+                        # No NOTIFY: one version check per interval, shared by all clients.
+                        self._stop.wait(self._poll_s)
+                except Exception:
+                    logger.exception("Live update failed")
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                    self._stop.wait(self._poll_s)
+        finally:
+            if conn is not None:
+                conn.close()
+        logger.info("Live update listener stopped")
+
+
+_broadcaster: Optional[LiveBroadcaster] = None
+
+
+def get_broadcaster() -> Optional[LiveBroadcaster]:
+    return _broadcaster
+
+
+def live_updates_enabled() -> bool:
+    """settings.live_updates, by default on only with PostgreSQL (which can NOTIFY)."""
+    if settings.live_updates is not None:
+        return settings.live_updates
+    return default_engine.dialect.name == "postgresql"
+
+
+def start_live_updates() -> None:
+    """Create the shared broadcaster (API lifespan); it listens once a client subscribes."""
+    global _broadcaster
+    _broadcaster = LiveBroadcaster(poll_s=settings.live_poll_s, alerts_limit=settings.live_alerts_limit)
+
+
+def stop_live_updates() -> None:
+    global _broadcaster
+    if _broadcaster is not None:
+        _broadcaster.stop()
+        _broadcaster = None
@@ -1,9 +1,15 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from app.api.routes import alerts, dashboard, fleet, orders, routes, simulation
+from app.api.live import live_updates_enabled, start_live_updates, stop_live_updates
+from app.api.metrics import MetricsMiddleware, metrics
+from app.api.routes import alerts, costs, dashboard, export, fleet, live, orders, routes, simulation
+from app.config import settings
+from app.ml.inference import warm_up_models
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,7 +17,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="GreenTrack Control Tower API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Preload ML models before the worker starts accepting traffic.
+    if settings.model_warm_up:
+        warm_up_models()
+    if live_updates_enabled():
+        start_live_updates()
+    yield
+    stop_live_updates()
+
+
+app = FastAPI(title="GreenTrack Control Tower API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +38,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 app.include_router(fleet.router, prefix="/api/fleet", tags=["fleet"])
@@ -27,9 +47,17 @@ app.include_router(orders.router, prefix="/api/orders", tags=["orders"])
 app.include_router(routes.router, prefix="/api/routes", tags=["routes"])
 app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"])
 app.include_router(simulation.router, prefix="/api/simulate", tags=["simulation"])
+app.include_router(costs.router, prefix="/api/costs", tags=["costs"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(live.router, prefix="/api/live", tags=["live"])
 
 @app.get("/api/health")
 async def health() -> dict:
-    logger.info("Health check")
+    logger.debug("Health check")  # probed every few seconds; request metrics count it
     return {"status": "ok"}
 
+
+@app.get("/api/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
@@ -0,0 +1,202 @@
+"""
+Request instrumentation: per-route latency, database statements and response size
+histograms, rendered in the Prometheus text format for /api/metrics, plus a warning
+for requests slower than settings.slow_request_ms. The middleware is plain ASGI, so
+streamed responses are measured until their last chunk is sent. Server-Sent Events
+streams stay open for minutes, so their duration goes to a histogram of its own
+instead of skewing request latency and response size.
+"""
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from app.config import settings
+from app.database.connection import QueryStats, query_stats
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+STREAM_DURATION_BUCKETS = (1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0)
+
+# Not recorded: scrapes of the metrics themselves.
+EXCLUDED_PATHS = {"/api/metrics"}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List[float]] = {}  # per-bucket counts, then sum, then count
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        bucket = bisect.bisect_left(self.buckets, value)
+        if bucket < len(self.buckets):  # larger values only count towards +Inf
+            series[bucket] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', '+Inf')])} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(series[-1])}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, value: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in sorted(self._values.items())]
+        return lines
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = Counter("http_requests_total", "Requests by route and status code.")
+        self.latency = Histogram("http_request_duration_seconds", "Request latency until the last byte.", LATENCY_BUCKETS)
+        self.db_queries = Histogram("http_request_db_queries", "Database statements per request.", QUERY_COUNT_BUCKETS)
+        self.db_seconds = Counter("http_request_db_seconds_total", "Time spent executing database statements.")
+        self.response_size = Histogram("http_response_size_bytes", "Response body size.", SIZE_BUCKETS)
+        self.stream_duration = Histogram(
+            "http_event_stream_duration_seconds", "How long Server-Sent Events streams stayed open.",
+            STREAM_DURATION_BUCKETS,
+        )
+
+    def record(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        stats: QueryStats,
+        size: int,
+        streaming: bool = False,
+    ) -> None:
+        """streaming: a text/event-stream response, timed in stream_duration only."""
+        labels = (("method", method), ("route", route))
+        with self._lock:
+            self.requests.inc((*labels, ("status", str(status))))
+            self.db_queries.observe(labels, stats.count)
+            self.db_seconds.inc(labels, stats.seconds)
+            if streaming:
+                self.stream_duration.observe(labels, seconds)
+                return
+            self.latency.observe(labels, seconds)
+            self.response_size.observe(labels, size)
+
+    def render(self) -> str:
+        with self._lock:
+            parts = [
+                self.requests, self.latency, self.db_queries, self.db_seconds, self.response_size,
+                self.stream_duration,
+            ]
+            return "\n".join(line for metric in parts for line in metric.render()) + "\n"
+
+
+metrics = RequestMetrics()
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the matched route, e.g. /api/orders/{order_id}. Routes of
+    included routers may be stored relative to their prefix, so the prefix is taken
+    from the request path; unmatched requests share one label so probes of random
+    URLs cannot blow up the number of series.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    convertors = getattr(route, "param_convertors", {})
+    params = {
+        name: convertors[name].to_string(value) if name in convertors else str(value)
+        for name, value in scope.get("path_params", {}).items()
+    }
+    try:
+        rendered = path_format.format(**params)
+    except (KeyError, IndexError):
+        return path_format
+    path = scope["path"]
+    if not path.endswith(rendered):
+        return path_format
+    return path[: len(path) - len(rendered)] + path_format
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and attributes DB statements (see query_stats) to its route."""
+
+    def __init__(self, app, registry: RequestMetrics = metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        response = {"status": 500, "size": 0, "streaming": False}
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["streaming"] = any(
+                    k == b"content-type" and v.startswith(b"text/event-stream") for k, v in message.get("headers", ())
+                )
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            self.registry.record(
+                scope["method"], route_template(scope), response["status"], elapsed, stats, response["size"],
+                streaming=response["streaming"],
+            )
+            if elapsed * 1000.0 >= settings.slow_request_ms and not response["streaming"]:
+                logger.warning(
+                    "Slow request %s %s: %.0f ms, %d queries (%.0f ms), %d bytes, status %d",
+                    scope["method"], scope["path"], elapsed * 1000.0, stats.count,
+                    stats.seconds * 1000.0, response["size"], response["status"],
+                )
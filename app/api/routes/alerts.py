@@ -1,33 +1,69 @@
 import logging
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
 from app.api.deps import DbSession
 from app.api.schemas import AlertRecommendation
 from app.recommendation.engine import generate_recommendations
+from app.recommendation.store import (
+    alert_type_for,
+    read_recommendations,
+    recommendations_stale,
+    stored_versions,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("/recommendations", response_model=List[AlertRecommendation])
-def get_alert_recommendations(db: DbSession) -> List[AlertRecommendation]:
+def get_alert_recommendations(
+    db: DbSession,
+    alert_type: Optional[str] = None,
+    min_priority: Optional[float] = None,
+    limit: int = Query(50, ge=1, le=1000),
+) -> List[AlertRecommendation]:
     logger.info("GET /alerts/recommendations")
 
-    recs = generate_recommendations(db)
+    versions = stored_versions(db)
+    if versions is not None:
+        # Stale rows are still served, flagged, rather than recomputed per request.
+        stale = recommendations_stale(db, versions)
+        if stale:
+            logger.warning("Stored recommendations are out of date (model %s, facts %s)", *versions)
+        return [
+            AlertRecommendation(
+                order_id=r.order_id,
+                alert_type=r.alert_type,
+                explanation=r.recommendation,
+                estimated_co2_reduction=r.estimated_co2_reduction,
+                priority_score=r.priority_score,
+                stale=stale,
+            )
+            for r in read_recommendations(db, alert_type, min_priority, limit)
+        ]
+
+    # Nothing materialized yet (build-recommendations never ran): compute live.
+    logger.warning("recommendations table is empty; computing recommendations live")
     out: list[AlertRecommendation] = []
-    for r in recs:
+    for r in generate_recommendations(db, top_n=None):
         recommendation_text = r.get("recommendation", "")
-        alert_type = recommendation_text.split(";")[0].strip() if recommendation_text else "optimization"
+        rec_type = alert_type_for(recommendation_text)
+        priority = float(r.get("priority_score", 0.0))
+        if alert_type is not None and rec_type != alert_type:
+            continue
+        if min_priority is not None and priority < min_priority:
+            continue
         out.append(
             AlertRecommendation(
                 order_id=int(r["order_id"]),
-                alert_type=alert_type,
+                alert_type=rec_type,
                 explanation=recommendation_text,
                 estimated_co2_reduction=float(r.get("estimated_co2_reduction", 0.0)),
-                priority_score=float(r.get("priority_score", 0.0)),
+                priority_score=priority,
             )
         )
+        if len(out) >= limit:
+            break
     return out
-
@@ -0,0 +1,27 @@
+import logging
+from dataclasses import asdict
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from app.analytics.cost_analysis import route_costs_page
+from app.api.deps import DbSession
+from app.api.schemas import RouteCostItem, RouteCostPage
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("", response_model=RouteCostPage)
+def list_route_costs(
+    db: DbSession,
+    after: Optional[int] = Query(None, description="Return orders with order_id > after"),
+    limit: int = Query(1000, ge=1, le=10000),
+) -> RouteCostPage:
+    logger.info("GET /costs after=%s limit=%d", after, limit)
+
+    page = route_costs_page(db, after_order_id=after, limit=limit)
+    return RouteCostPage(
+        items=[RouteCostItem(**asdict(c)) for c in page],
+        next_after=page[-1].order_id if len(page) == limit else None,
+    )
@@ -0,0 +1,71 @@
+import logging
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.analytics.export import DEFAULT_BATCH_SIZE, EXPORT_FORMATS, ExportUnavailable, export_stream
+from app.api.deps import DbSession
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_FORMAT = Query("arrow", pattern="^(arrow|parquet)$", description="arrow: Arrow IPC stream; parquet: Parquet file")
+_COLUMNS = Query(None, description="Comma-separated column names (default: all)")
+_START = Query(None, description="Only orders planned on or after this date")
+_END = Query(None, description="Only orders planned on or before this date")
+_BATCH = Query(DEFAULT_BATCH_SIZE, ge=1_000, le=1_000_000, description="Rows per record batch")
+
+
+def _export(
+    db: DbSession,
+    dataset: str,
+    format: str,
+    columns: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    batch_size: int,
+) -> StreamingResponse:
+    logger.info(
+        "GET /export/%s format=%s columns=%s dates=%s..%s", dataset, format, columns, start_date, end_date
+    )
+    names = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        chunks = export_stream(
+            db, dataset, format, columns=names, start_date=start_date, end_date=end_date, batch_size=batch_size
+        )
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'},
+    )
+
+
+@router.get("/facts", response_class=StreamingResponse)
+def export_facts(
+    db: DbSession,
+    format: str = _FORMAT,
+    columns: Optional[str] = _COLUMNS,
+    start_date: Optional[date] = _START,
+    end_date: Optional[date] = _END,
+    batch_size: int = _BATCH,
+) -> StreamingResponse:
+    return _export(db, "facts", format, columns, start_date, end_date, batch_size)
+
+
+@router.get("/orders", response_class=StreamingResponse)
+def export_orders(
+    db: DbSession,
+    format: str = _FORMAT,
+    columns: Optional[str] = _COLUMNS,
+    start_date: Optional[date] = _START,
+    end_date: Optional[date] = _END,
+    batch_size: int = _BATCH,
+) -> StreamingResponse:
+    return _export(db, "orders", format, columns, start_date, end_date, batch_size)
@@ -1,11 +1,12 @@
 import logging
 
 from fastapi import APIRouter
-from sqlalchemy import distinct, func
+from sqlalchemy import func
 
 from app.api.deps import DbSession
 from app.api.schemas import FleetOverview, FleetTypeStats
 from app.database.models import TransportStageFact, TransportType, Vehicle
+from app.database.powertrain import ELECTRIC
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -15,71 +16,71 @@ logger = logging.getLogger(__name__)
 def get_fleet_overview(db: DbSession) -> FleetOverview:
     logger.info("GET /fleet/overview")
 
-    # Per‑type stats: all heavy work in SQL.
-    rows = (
+    # Facts are aggregated per vehicle first, so the join to vehicles and types
+    # combines one row per vehicle rather than one per stage. The full outer join
+    # keeps facts of unknown vehicles (type NULL): they only count towards the
+    # overall utilization, as in AVG over the whole fact table.
+    per_vehicle = (
+        db.query(
+            TransportStageFact.vehicle_id.label("vehicle_id"),
+            func.sum(TransportStageFact.load_ratio).label("load_sum"),
+            func.count(TransportStageFact.load_ratio).label("load_count"),
+            func.sum(TransportStageFact.co2_kg).label("co2"),
+            func.sum(TransportStageFact.distance_km).label("distance"),
+        )
+        .group_by(TransportStageFact.vehicle_id)
+        .subquery()
+    )
+    fleet = (
         db.query(
+            Vehicle.vehicle_id.label("vehicle_id"),
             TransportType.name.label("transport_type"),
-            func.count(distinct(Vehicle.vehicle_id)).label("vehicle_count"),
-            func.coalesce(func.avg(TransportStageFact.load_ratio), 0.0).label(
-                "avg_load"
-            ),
-            func.coalesce(func.sum(TransportStageFact.co2_kg), 0.0).label(
-                "total_co2"
-            ),
-            func.coalesce(func.sum(TransportStageFact.distance_km), 0.0).label(
-                "total_distance"
-            ),
+            TransportType.powertrain.label("powertrain"),
         )
-        .select_from(Vehicle)
         .join(TransportType, Vehicle.transport_type_id == TransportType.transport_type_id)
-        .outerjoin(TransportStageFact, TransportStageFact.vehicle_id == Vehicle.vehicle_id)
-        .group_by(TransportType.name)
+        .subquery()
+    )
+    rows = (
+        db.query(
+            fleet.c.transport_type,
+            fleet.c.powertrain,
+            func.count(fleet.c.vehicle_id),
+            func.coalesce(func.sum(per_vehicle.c.load_sum), 0.0),
+            func.coalesce(func.sum(per_vehicle.c.load_count), 0),
+            func.coalesce(func.sum(per_vehicle.c.co2), 0.0),
+            func.coalesce(func.sum(per_vehicle.c.distance), 0.0),
+        )
+        .select_from(fleet)
+        .join(per_vehicle, per_vehicle.c.vehicle_id == fleet.c.vehicle_id, full=True)
+        .group_by(fleet.c.transport_type, fleet.c.powertrain)
         .all()
     )
 
     type_stats: list[FleetTypeStats] = []
-    total_vehicles = 0
-    for name, count, avg_load, total_co2, total_dist in rows:
+    total_vehicles = electric_vehicles = 0
+    fleet_load_sum = fleet_load_count = 0.0
+    for name, powertrain, count, load_sum, load_count, total_co2, total_dist in rows:
+        fleet_load_sum += float(load_sum or 0.0)
+        fleet_load_count += float(load_count or 0)
+        if name is None:
+            continue
         vehicle_count = int(count or 0)
         total_vehicles += vehicle_count
-        if total_dist:
-            intensity = float(total_co2 or 0.0) / float(total_dist)
-        else:
-            intensity = 0.0
+        if powertrain == ELECTRIC:
+            electric_vehicles += vehicle_count
         type_stats.append(
             FleetTypeStats(
                 transport_type=name,
                 vehicle_count=vehicle_count,
-                avg_load_ratio=float(avg_load or 0.0),
-                emission_intensity_kg_per_km=float(intensity),
+                avg_load_ratio=float(load_sum) / float(load_count) if load_count else 0.0,
+                emission_intensity_kg_per_km=float(total_co2) / float(total_dist) if total_dist else 0.0,
             )
         )
 
-    # Electric vs combustion heuristic reused from analytics.
-    electric_vehicles = int(
-        db.query(func.count(distinct(Vehicle.vehicle_id)))
-        .join(TransportType, Vehicle.transport_type_id == TransportType.transport_type_id)
-        .filter(
-            func.lower(TransportType.name).like("%elektro%")
-            | func.lower(TransportType.name).like("%electric%")
-        )
-        .scalar()
-        or 0
-    )
-    combustion_vehicles = max(total_vehicles - electric_vehicles, 0)
-
-    avg_utilization = float(
-        db.query(func.coalesce(func.avg(TransportStageFact.load_ratio), 0.0))
-        .select_from(TransportStageFact)
-        .scalar()
-        or 0.0
-    )
-
     return FleetOverview(
         total_vehicles=total_vehicles,
         vehicle_counts_by_type=type_stats,
         electric_vehicles=electric_vehicles,
-        combustion_vehicles=combustion_vehicles,
-        average_utilization=avg_utilization,
+        combustion_vehicles=max(total_vehicles - electric_vehicles, 0),
+        average_utilization=fleet_load_sum / fleet_load_count if fleet_load_count else 0.0,
     )
-
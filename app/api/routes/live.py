@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.live import get_broadcaster
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Comment line sent when nothing happened, so proxies keep the connection open.
+KEEPALIVE_S = 15.0
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def live_stream(request: Request) -> StreamingResponse:
+    """
+    Server-Sent Events: a `snapshot` event (summary + alerts) on connect, then an
+    `update` event with KPI deltas and new / removed alerts after each data change.
+    """
+    broadcaster = get_broadcaster()
+    if broadcaster is None:
+        raise HTTPException(status_code=503, detail="Live updates are disabled")
+    logger.info("GET /live/stream")
+    queue = broadcaster.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,12 @@
 import logging
-from typing import List
+from typing import Any, Dict, List, Union
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import func
 
 from app.api.deps import DbSession
-from app.api.schemas import OrderDetail, OrderStop, OrderSummary
+from app.api.responses import FastJSONResponse, columns_from_rows
+from app.api.schemas import OrderDetail, OrderStop, OrderSummary, OrderSummaryColumns
 from app.database.models import (
     Address,
     FreightOrder,
@@ -18,48 +19,44 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.get("", response_model=List[OrderSummary])
-def list_orders(db: DbSession) -> List[OrderSummary]:
-    logger.info("GET /orders")
+# Upper bound on ids per batch detail request.
+MAX_DETAIL_IDS = 200
+
+SUMMARY_COLUMNS = ["order_id", "vehicle_id", "license_plate", "distance_km", "total_co2_kg", "avg_load_ratio"]
 
-    rows = (
-        db.query(
-            TransportStageFact.order_id,
-            FreightOrder.vehicle_id,
-            Vehicle.license_plate,
-            func.coalesce(func.sum(TransportStageFact.distance_km), 0.0),
-            func.coalesce(func.sum(TransportStageFact.co2_kg), 0.0),
-            func.coalesce(func.avg(TransportStageFact.load_ratio), 0.0),
-        )
-        .join(FreightOrder, FreightOrder.order_id == TransportStageFact.order_id)
-        .join(Vehicle, Vehicle.vehicle_id == FreightOrder.vehicle_id)
-        .group_by(
-            TransportStageFact.order_id,
-            FreightOrder.vehicle_id,
-            Vehicle.license_plate,
-        )
-        .all()
-    )
 
+def order_summary_payload(rows, columnar: bool = False) -> Any:
+    """
+    OrderSummary-shaped JSON content for (order_id, vehicle_id, license_plate, distance,
+    co2, avg_load) rows: a list of objects, or {column: values} when columnar.
+    """
+    rows = [r for r in rows if r[0] is not None]
+    if columnar:
+        return columns_from_rows(rows, SUMMARY_COLUMNS, numeric=SUMMARY_COLUMNS[3:])
     return [
-        OrderSummary(
-            order_id=int(order_id),
-            vehicle_id=int(vehicle_id) if vehicle_id is not None else None,
-            license_plate=license_plate,
-            distance_km=float(distance_km or 0.0),
-            total_co2_kg=float(total_co2 or 0.0),
-            avg_load_ratio=float(avg_load or 0.0),
-        )
+        {
+            "order_id": int(order_id),
+            "vehicle_id": int(vehicle_id) if vehicle_id is not None else None,
+            "license_plate": license_plate,
+            "distance_km": float(distance_km or 0.0),
+            "total_co2_kg": float(total_co2 or 0.0),
+            "avg_load_ratio": float(avg_load or 0.0),
+        }
         for order_id, vehicle_id, license_plate, distance_km, total_co2, avg_load in rows
-        if order_id is not None
     ]
 
 
-@router.get("/{order_id}", response_model=OrderDetail)
-def get_order(order_id: int, db: DbSession) -> OrderDetail:
-    logger.info("GET /orders/%s", order_id)
+@router.get("", response_model=Union[List[OrderSummary], OrderSummaryColumns])
+def list_orders(
+    db: DbSession,
+    format: str = Query(
+        "rows", pattern="^(rows|columns)$",
+        description="columns: one array per OrderSummary field instead of one object per order",
+    ),
+):
+    logger.info("GET /orders format=%s", format)
 
-    summary_row = (
+    rows = (
         db.query(
             TransportStageFact.order_id,
             FreightOrder.vehicle_id,
@@ -70,60 +67,113 @@ def get_order(order_id: int, db: DbSession) -> OrderDetail:
         )
         .join(FreightOrder, FreightOrder.order_id == TransportStageFact.order_id)
         .join(Vehicle, Vehicle.vehicle_id == FreightOrder.vehicle_id)
-        .filter(TransportStageFact.order_id == order_id)
         .group_by(
             TransportStageFact.order_id,
             FreightOrder.vehicle_id,
             Vehicle.license_plate,
         )
-        .first()
+        .all()
     )
-    if summary_row is None:
-        raise HTTPException(status_code=404, detail="Order not found")
+    # Returned as a response directly: no OrderSummary per row, rendered by orjson.
+    return FastJSONResponse(order_summary_payload(rows, columnar=format == "columns"))
+
+
+@router.get("/details", response_model=List[OrderDetail])
+def get_order_details(
+    db: DbSession,
+    ids: str = Query(..., description=f"Comma-separated order ids (at most {MAX_DETAIL_IDS})"),
+) -> List[OrderDetail]:
+    """Details (with stops) of several orders in one request, in the order requested."""
+    logger.info("GET /orders/details?ids=%s", ids)
+    try:
+        order_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(order_ids) > MAX_DETAIL_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DETAIL_IDS} ids per request")
+    details = _order_details(db, order_ids)
+    return [details[oid] for oid in order_ids if oid in details]
 
-    (
-        _oid,
-        vehicle_id,
-        license_plate,
-        distance_km,
-        total_co2,
-        avg_load,
-    ) = summary_row
 
-    stop_rows = (
+def _order_details(db: DbSession, order_ids: List[int]) -> Dict[int, OrderDetail]:
+    """
+    Summary and stops of the given orders in one round trip: per-order fact
+    aggregates left-joined to their stops, one row per stop (one row with NULL stop
+    columns for an order without stops). Orders without facts are absent.
+    """
+    if not order_ids:
+        return {}
+    summary = (
         db.query(
+            TransportStageFact.order_id.label("order_id"),
+            func.coalesce(func.sum(TransportStageFact.distance_km), 0.0).label("distance_km"),
+            func.coalesce(func.sum(TransportStageFact.co2_kg), 0.0).label("total_co2"),
+            func.coalesce(func.avg(TransportStageFact.load_ratio), 0.0).label("avg_load"),
+        )
+        .filter(TransportStageFact.order_id.in_(order_ids))
+        .group_by(TransportStageFact.order_id)
+        .subquery()
+    )
+    rows = (
+        db.query(
+            summary.c.order_id,
+            FreightOrder.vehicle_id,
+            Vehicle.license_plate,
+            summary.c.distance_km,
+            summary.c.total_co2,
+            summary.c.avg_load,
             FreightOrderStop.sequence_number,
-            FreightOrderStop.address_id,
+            Address.address_id,
             Address.latitude,
             Address.longitude,
             Address.city,
             Address.country,
         )
-        .join(Address, Address.address_id == FreightOrderStop.address_id)
-        .filter(FreightOrderStop.order_id == order_id)
-        .order_by(FreightOrderStop.sequence_number)
+        .select_from(summary)
+        .join(FreightOrder, FreightOrder.order_id == summary.c.order_id)
+        .join(Vehicle, Vehicle.vehicle_id == FreightOrder.vehicle_id)
+        .outerjoin(FreightOrderStop, FreightOrderStop.order_id == summary.c.order_id)
+        .outerjoin(Address, Address.address_id == FreightOrderStop.address_id)
+        .order_by(summary.c.order_id, FreightOrderStop.sequence_number)
         .all()
     )
 
-    stops = [
-        OrderStop(
-            sequence_number=int(seq),
-            address_id=int(address_id),
-            latitude=float(lat) if lat is not None else None,
-            longitude=float(lon) if lon is not None else None,
-            city=city,
-            country=country,
-        )
-        for seq, address_id, lat, lon, city, country in stop_rows
-    ]
+    details: Dict[int, OrderDetail] = {}
+    for (
+        oid, vehicle_id, license_plate, distance_km, total_co2, avg_load,
+        seq, address_id, lat, lon, city, country,
+    ) in rows:
+        detail = details.get(oid)
+        if detail is None:
+            detail = details[oid] = OrderDetail(
+                order_id=int(oid),
+                vehicle_id=int(vehicle_id) if vehicle_id is not None else None,
+                license_plate=license_plate,
+                distance_km=float(distance_km or 0.0),
+                total_co2_kg=float(total_co2 or 0.0),
+                avg_load_ratio=float(avg_load or 0.0),
+                stops=[],
+            )
+        # NULL when the order has no stops, or the stop's address is missing.
+        if address_id is not None:
+            detail.stops.append(
+                OrderStop(
+                    sequence_number=int(seq),
+                    address_id=int(address_id),
+                    latitude=float(lat) if lat is not None else None,
+                    longitude=float(lon) if lon is not None else None,
+                    city=city,
+                    country=country,
+                )
+            )
+    return details
 
-    return OrderDetail(
-        order_id=order_id,
-        vehicle_id=int(vehicle_id) if vehicle_id is not None else None,
-        license_plate=license_plate,
-        distance_km=float(distance_km or 0.0),
-        total_co2_kg=float(total_co2 or 0.0),
-        avg_load_ratio=float(avg_load or 0.0),
-        stops=stops,
-    )
 
+@router.get("/{order_id}", response_model=OrderDetail)
+def get_order(order_id: int, db: DbSession) -> OrderDetail:
+    logger.info("GET /orders/%s", order_id)
+
+    detail = _order_details(db, [order_id]).get(order_id)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return detail
@@ -1,19 +1,65 @@
 import logging
-from typing import List
+from typing import Any, List, Union
 
-from fastapi import APIRouter
+import numpy as np
+from fastapi import APIRouter, Query
 
 from app.api.deps import DbSession
-from app.api.schemas import RouteMapOrder, RouteStop
+from app.api.responses import FastJSONResponse, columns_from_rows
+from app.api.schemas import RouteMapColumns, RouteMapOrder
 from sqlalchemy import func
 from app.database.models import Address, FreightOrderStop, TransportStageFact
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/map", response_model=List[RouteMapOrder])
-def get_route_map(db: DbSession) -> List[RouteMapOrder]:
-    logger.info("GET /routes/map")
+
+def route_map_payload(stop_rows, ratio_rows, columnar: bool = False) -> Any:
+    """
+    RouteMapOrder-shaped JSON content from (order_id, sequence, lat, lon) stop rows
+    sorted by order and sequence, and (order_id, avg_load_ratio) rows. Columnar
+    content has one entry per order (order_id, avg_load_ratio, stop_offsets) and
+    one per stop (sequence, lat, lon); order i's stops are
+    stop_offsets[i]:stop_offsets[i + 1].
+    """
+    load_ratios = {oid: float(ratio or 0.0) for oid, ratio in ratio_rows}
+    stops = [r for r in stop_rows if r[0] is not None and r[2] is not None and r[3] is not None]
+    if columnar:
+        cols = columns_from_rows(stops, ["order_id", "sequence", "lat", "lon"], numeric=("lat", "lon"))
+        order_col = np.asarray(cols["order_id"], dtype=np.int64)
+        starts = np.flatnonzero(np.diff(order_col, prepend=order_col[:1] - 1))
+        order_ids = order_col[starts].tolist()
+        return {
+            "order_id": order_ids,
+            "avg_load_ratio": np.fromiter(
+                (load_ratios.get(o, 0.0) for o in order_ids), dtype=np.float64, count=len(order_ids)
+            ),
+            "stop_offsets": np.r_[starts, len(order_col)].astype(np.int64),
+            "sequence": np.asarray(cols["sequence"], dtype=np.int64),
+            "lat": cols["lat"],
+            "lon": cols["lon"],
+        }
+
+    orders: dict[int, list[dict]] = {}
+    for order_id, seq, lat, lon in stops:
+        orders.setdefault(int(order_id), []).append(
+            {"sequence": int(seq), "lat": float(lat), "lon": float(lon)}
+        )
+    return [
+        {"order_id": oid, "avg_load_ratio": load_ratios.get(oid, 0.0), "stops": order_stops}
+        for oid, order_stops in orders.items()
+    ]
+
+
+@router.get("/map", response_model=Union[List[RouteMapOrder], RouteMapColumns])
+def get_route_map(
+    db: DbSession,
+    format: str = Query(
+        "rows", pattern="^(rows|columns)$",
+        description="columns: parallel per-order and per-stop arrays instead of nested objects",
+    ),
+):
+    logger.info("GET /routes/map format=%s", format)
 
     # Fetch all stops
     stop_rows = (
@@ -37,22 +83,5 @@ def get_route_map(db: DbSession) -> List[RouteMapOrder]:
         .group_by(TransportStageFact.order_id)
         .all()
     )
-    load_ratios = {row.order_id: float(row.avg_ratio or 0.0) for row in ratio_rows}
-
-    orders: dict[int, list[RouteStop]] = {}
-    for order_id, seq, lat, lon in stop_rows:
-        if order_id is None or lat is None or lon is None:
-            continue
-        stops = orders.setdefault(int(order_id), [])
-        stops.append(
-            RouteStop(sequence=int(seq), lat=float(lat), lon=float(lon)),
-        )
-
-    return [
-        RouteMapOrder(
-            order_id=oid, 
-            avg_load_ratio=load_ratios.get(oid, 0.0), 
-            stops=stops
-        ) for oid, stops in orders.items()
-    ]
 
+    return FastJSONResponse(route_map_payload(stop_rows, ratio_rows, columnar=format == "columns"))
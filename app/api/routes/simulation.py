@@ -3,8 +3,19 @@ import logging
 from fastapi import APIRouter, HTTPException
 
 from app.api.deps import DbSession
-from app.api.schemas import SimulationRequest, SimulationResponse
-from app.ml.simulator import simulate_order
+from app.api.schemas import (
+    BatchSimulationRequest,
+    BatchSimulationResponse,
+    BatchSimulationResult,
+    ScenarioPointResult,
+    ScenarioSweepRequest,
+    ScenarioSweepResponse,
+    SimulationRequest,
+    SimulationResponse,
+)
+from app.config import settings
+from app.ml.simulator import simulate_order, simulate_orders
+from app.optimization.scenarios import Substitution, sweep_fleet_scenarios
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -39,3 +50,83 @@ def run_simulation(payload: SimulationRequest, db: DbSession) -> SimulationRespo
         recommendation_text=" ".join(recommendation_parts),
     )
 
+
+@router.post("/batch", response_model=BatchSimulationResponse)
+def run_batch_simulation(
+    payload: BatchSimulationRequest, db: DbSession
+) -> BatchSimulationResponse:
+    logger.info(
+        "POST /simulate/batch for %d orders, %s vehicle types",
+        len(payload.order_ids),
+        len(payload.vehicle_types) if payload.vehicle_types else "all",
+    )
+    if not payload.order_ids:
+        raise HTTPException(status_code=400, detail="order_ids must not be empty")
+    if len(payload.order_ids) > settings.simulation_batch_max_orders:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.simulation_batch_max_orders} order_ids per batch",
+        )
+
+    result = simulate_orders(
+        session=db,
+        order_ids=payload.order_ids,
+        vehicle_types=payload.vehicle_types,
+    )
+    if result.get("error"):
+        raise HTTPException(status_code=400, detail=result["error"])
+
+    return BatchSimulationResponse(
+        results=[
+            BatchSimulationResult(
+                order_id=r["order_id"],
+                best_vehicle_type=r["best_vehicle_type"],
+                current_predicted_co2=r["current_predicted_co2"],
+                predicted_co2=r["alternative_predicted_co2"],
+                savings_percentage=r["co2_savings_percent"],
+                utilization_change=r["utilization_improvement"],
+            )
+            for r in result["results"]
+        ],
+        missing_order_ids=result["missing_order_ids"],
+        unknown_vehicle_types=result["unknown_vehicle_types"],
+    )
+
+
+@router.post("/scenarios", response_model=ScenarioSweepResponse)
+def run_scenario_sweep(payload: ScenarioSweepRequest, db: DbSession) -> ScenarioSweepResponse:
+    logger.info(
+        "POST /simulate/scenarios: %d substitutions, %d scenarios",
+        len(payload.substitutions), payload.n_scenarios,
+    )
+    if not payload.substitutions:
+        raise HTTPException(status_code=400, detail="substitutions must not be empty")
+
+    try:
+        # In-process: the stage pass is a single vectorized scan, no pool per request.
+        sweep = sweep_fleet_scenarios(
+            db,
+            [Substitution(s.source_type, s.target_type, s.max_rate) for s in payload.substitutions],
+            n_scenarios=payload.n_scenarios,
+            seed=payload.seed,
+            max_workers=1,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ScenarioSweepResponse(
+        baseline_co2_kg=sweep.baseline_co2_kg,
+        baseline_cost=sweep.baseline_cost,
+        n_scenarios=sweep.n_scenarios,
+        pareto_front=[
+            ScenarioPointResult(
+                rates=p.rates,
+                vehicles_switched=p.vehicles_switched,
+                co2_kg=p.co2_kg,
+                cost=p.cost,
+                co2_saving_kg=sweep.baseline_co2_kg - p.co2_kg,
+                cost_delta=p.cost - sweep.baseline_cost,
+            )
+            for p in sweep.pareto_front
+        ],
+    )
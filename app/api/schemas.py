@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class DashboardSummary(BaseModel):
@@ -35,6 +35,16 @@ class OrderSummary(BaseModel):
     avg_load_ratio: float
 
 
+class OrderSummaryColumns(BaseModel):
+    """GET /api/orders?format=columns: one array per OrderSummary field, aligned by index."""
+    order_id: List[int]
+    vehicle_id: List[Optional[int]]
+    license_plate: List[Optional[str]]
+    distance_km: List[float]
+    total_co2_kg: List[float]
+    avg_load_ratio: List[float]
+
+
 class OrderStop(BaseModel):
     sequence_number: int
     address_id: int
@@ -60,12 +70,41 @@ class RouteMapOrder(BaseModel):
     stops: List[RouteStop]
 
 
+class RouteMapColumns(BaseModel):
+    """
+    GET /api/routes/map?format=columns: per-order arrays (order_id, avg_load_ratio,
+    stop_offsets) and per-stop arrays (sequence, lat, lon); order i's stops are
+    stop_offsets[i]:stop_offsets[i + 1].
+    """
+    order_id: List[int]
+    avg_load_ratio: List[float]
+    stop_offsets: List[int]
+    sequence: List[int]
+    lat: List[float]
+    lon: List[float]
+
+
 class AlertRecommendation(BaseModel):
     order_id: int
     alert_type: str
     explanation: str
     estimated_co2_reduction: float
     priority_score: float
+    # Stored before the latest fact build / model training; build-recommendations refreshes it.
+    stale: bool = False
+
+
+class RouteCostItem(BaseModel):
+    order_id: int
+    total_distance_km: float
+    total_duration_min: float
+    total_co2_kg: float
+    total_cost: float
+
+
+class RouteCostPage(BaseModel):
+    items: List[RouteCostItem]
+    next_after: Optional[int]  # pass as ?after= for the next page; None on the last page
 
 
 class SimulationRequest(BaseModel):
@@ -81,3 +120,50 @@ class SimulationResponse(BaseModel):
     utilization_change: float
     recommendation_text: str
 
+
+class BatchSimulationRequest(BaseModel):
+    order_ids: List[int]
+    vehicle_types: Optional[List[str]] = None
+
+
+class BatchSimulationResult(BaseModel):
+    order_id: int
+    best_vehicle_type: str
+    current_predicted_co2: float
+    predicted_co2: float
+    savings_percentage: float
+    utilization_change: float
+
+
+class BatchSimulationResponse(BaseModel):
+    results: List[BatchSimulationResult]
+    missing_order_ids: List[int]
+    unknown_vehicle_types: List[str]
+
+
+class ScenarioSubstitution(BaseModel):
+    source_type: str
+    target_type: str
+    max_rate: float = Field(1.0, ge=0.0, le=1.0)
+
+
+class ScenarioSweepRequest(BaseModel):
+    substitutions: List[ScenarioSubstitution]
+    n_scenarios: int = Field(1000, ge=1, le=100000)
+    seed: int = 0
+
+
+class ScenarioPointResult(BaseModel):
+    rates: Dict[str, float]
+    vehicles_switched: int
+    co2_kg: float
+    cost: float
+    co2_saving_kg: float
+    cost_delta: float
+
+
+class ScenarioSweepResponse(BaseModel):
+    baseline_co2_kg: float
+    baseline_cost: float
+    n_scenarios: int
+    pareto_front: List[ScenarioPointResult]
@@ -11,6 +11,24 @@ class Settings(BaseSettings):
     admin_database_url: str | None = None
     cost_per_km: float = 1.5
     driver_cost_per_min: float = 0.5
+    model_compress: int = 3
+    model_mmap: bool = True
+    model_warm_up: bool = True
+    reference_data_check_s: float = 30.0
+    inference_engine: str = "compiled"
+    inference_compiled_max_rows: int = 1024
+    inference_batch_window_ms: float = 2.0
+    inference_batch_max_rows: int = 8192
+    simulation_batch_max_orders: int = 500
+    recommendation_rules_path: str | None = None
+    recommendations_check_s: float = 10.0
+    optimization_score_in_db: bool = False
+    score_inputs_check_s: float = 5.0
+    live_updates: bool | None = None
+    live_poll_s: float = 5.0
+    live_alerts_limit: int = 50
+    metrics_enabled: bool = True
+    slow_request_ms: float = 1000.0
 
     @property
     def database_url(self) -> str:
@@ -1,11 +1,16 @@
 import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from sqlalchemy.exc import ProgrammingError
 
 from app.config import settings
+from app.database.powertrain import classify_powertrain
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +25,43 @@ engine = create_engine(
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Statements executed on behalf of the current API request; set by the metrics
+# middleware and shared with the threadpool a sync route runs in.
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # One statement runs per connection at a time; a failed one is simply overwritten.
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    start = conn.info.pop("query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def instrument_engine(target) -> None:
+    """Count statements and their execution time into query_stats."""
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+instrument_engine(engine)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -42,9 +84,47 @@ def _grant_public_schema_via_admin() -> None:
     logger.info("Granted schema public and database to %s via admin connection", user)
 
 
+# Columns added after tables may already exist; create_all does not alter tables.
+_SCHEMA_MIGRATIONS = [
+    "ALTER TABLE transport_types ADD COLUMN IF NOT EXISTS powertrain VARCHAR(16)",
+    "ALTER TABLE transport_stage_fact ADD COLUMN IF NOT EXISTS powertrain VARCHAR(16)",
+    "CREATE INDEX IF NOT EXISTS ix_transport_types_powertrain ON transport_types (powertrain)",
+    "CREATE INDEX IF NOT EXISTS ix_transport_stage_fact_powertrain ON transport_stage_fact (powertrain)",
+]
+
+
+def _migrate_schema() -> None:
+    """Idempotent ALTERs plus powertrain backfill for databases created before the column."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for statement in _SCHEMA_MIGRATIONS:
+            conn.execute(text(statement))
+        unclassified = conn.execute(
+            text("SELECT transport_type_id, name, description FROM transport_types WHERE powertrain IS NULL")
+        ).all()
+        if unclassified:
+            conn.execute(
+                text("UPDATE transport_types SET powertrain = :powertrain WHERE transport_type_id = :tt_id"),
+                [
+                    {"tt_id": tt_id, "powertrain": classify_powertrain(name, description)}
+                    for tt_id, name, description in unclassified
+                ],
+            )
+            logger.info("Classified powertrain of %d transport types", len(unclassified))
+        result = conn.execute(text(
+            "UPDATE transport_stage_fact f SET powertrain = t.powertrain "
+            "FROM transport_types t WHERE f.powertrain IS NULL AND f.transport_type = t.name "
+            "AND t.powertrain IS NOT NULL"
+        ))
+        if result.rowcount:
+            logger.info("Backfilled powertrain on %d transport_stage_fact rows", result.rowcount)
+
+
 def init_db() -> None:
     try:
         Base.metadata.create_all(bind=engine)
+        _migrate_schema()
         logger.info("Database tables initialized")
     except ProgrammingError as e:
         msg = str(e.orig) if getattr(e, "orig", None) else str(e)
@@ -53,6 +133,7 @@ def init_db() -> None:
         if settings.admin_database_url:
             _grant_public_schema_via_admin()
             Base.metadata.create_all(bind=engine)
+            _migrate_schema()
             logger.info("Database tables initialized after schema grant")
             return
         script = Path(__file__).resolve().parent.parent.parent / "scripts" / "grant_public_schema.sql"
@@ -49,6 +49,8 @@ class TransportType(Base):
     transport_type_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(128), unique=True, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text)
+    # app.database.powertrain: electric / hybrid / combustion, set at ingest.
+    powertrain: Mapped[Optional[str]] = mapped_column(String(16), index=True)
 
     vehicles: Mapped[list["Vehicle"]] = relationship(back_populates="transport_type")
     attributes: Mapped[Optional["VehicleAttributes"]] = relationship(
@@ -89,6 +91,20 @@ class VehicleAttributes(Base):
     transport_type: Mapped["TransportType"] = relationship(back_populates="attributes")
 
 
+class TransportTariff(Base):
+    # Types without a row are costed with settings.cost_per_km / driver_cost_per_min.
+    __tablename__ = "transport_tariffs"
+
+    transport_type_id: Mapped[int] = mapped_column(
+        ForeignKey("transport_types.transport_type_id"), primary_key=True
+    )
+    cost_per_km: Mapped[float] = mapped_column(Double, nullable=False)
+    driver_cost_per_min: Mapped[float] = mapped_column(Double, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+
 # ── Freight Units ────────────────────────────────────────────
 
 
@@ -253,6 +269,7 @@ class TransportStageFact(Base):
     order_id: Mapped[Optional[int]] = mapped_column(Integer, index=True)
     vehicle_id: Mapped[Optional[int]] = mapped_column(Integer, index=True)
     transport_type: Mapped[Optional[str]] = mapped_column(String, index=True)
+    powertrain: Mapped[Optional[str]] = mapped_column(String(16), index=True)
     from_stop_id: Mapped[Optional[int]] = mapped_column(Integer)
     to_stop_id: Mapped[Optional[int]] = mapped_column(Integer)
     distance_km: Mapped[Optional[float]] = mapped_column(Numeric)
@@ -265,3 +282,39 @@ class TransportStageFact(Base):
         DateTime, default=datetime.utcnow, nullable=False
     )
 
+
+# ── Materialized Recommendations ─────────────────────────────
+
+
+class Recommendation(Base):
+    __tablename__ = "recommendations"
+
+    recommendation_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    alert_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    recommendation: Mapped[str] = mapped_column(Text, nullable=False)
+    estimated_co2_reduction: Mapped[float] = mapped_column(Double, nullable=False)
+    priority_score: Mapped[float] = mapped_column(Double, nullable=False)
+    model_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    fact_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+    __table_args__ = (
+        Index("idx_recommendations_priority", "priority_score", "recommendation_id"),
+        Index("idx_recommendations_type_priority", "alert_type", "priority_score"),
+    )
+
+
+class RecommendationBuild(Base):
+    # One row per build-recommendations run, written even when it produced no rows.
+    __tablename__ = "recommendation_builds"
+
+    build_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    model_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    fact_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    built_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
@@ -0,0 +1,22 @@
+"""
+Data-change notifications for live API clients. Writers call notify_data_changed
+inside their transaction; PostgreSQL delivers the NOTIFY on UPDATES_CHANNEL to
+listeners when the transaction commits, and drops it on rollback. Other dialects have
+no NOTIFY, so listeners poll for changes there instead.
+"""
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+UPDATES_CHANNEL = "greentrack_updates"
+
+
+def notify_data_changed(session: Session, source: str) -> None:
+    """Queue a notification that `source` ("facts", "recommendations", "ingest") changed."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    session.execute(select(func.pg_notify(UPDATES_CHANNEL, source)))
+    logger.info("Queued %s change notification on %s", source, UPDATES_CHANNEL)
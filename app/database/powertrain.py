@@ -0,0 +1,29 @@
+"""
+Powertrain classification of transport types, from the means-of-transport code and
+its MTR DESCRIPTION. Stored on transport_types and denormalized into
+transport_stage_fact so EV / combustion splits are equality filters, not LIKE scans.
+"""
+import re
+from typing import Optional
+
+ELECTRIC = "electric"
+HYBRID = "hybrid"
+COMBUSTION = "combustion"
+
+POWERTRAINS = (ELECTRIC, HYBRID, COMBUSTION)
+
+_HYBRID = re.compile(r"hybrid", re.IGNORECASE)
+_ELECTRIC = re.compile(
+    r"elektr|electric|batter|\bbev\b|\be[-\s]?(lkw|truck|van|transporter|sprinter|trailer|actros|canter)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_powertrain(name: Optional[str], description: Optional[str] = None) -> str:
+    """ELECTRIC, HYBRID or COMBUSTION (the default when nothing matches)."""
+    text = f"{name or ''} {description or ''}"
+    if _HYBRID.search(text):
+        return HYBRID
+    if _ELECTRIC.search(text):
+        return ELECTRIC
+    return COMBUSTION
@@ -0,0 +1,229 @@
+"""
+Process-wide cache of master data (transport types, vehicle attributes, tariffs, vehicle -> type)
+shared by feature engineering, simulation and the fact builder. Loaded once and
+reloaded only when a content hash of the master tables changes.
+"""
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.models import TransportTariff, TransportType, Vehicle, VehicleAttributes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TypeAttributes:
+    transport_type_id: int
+    name: str
+    capacity_kg: Optional[float]
+    capacity_volume: Optional[float]
+    co2_empty_kg_km: float
+    co2_loaded_kg_km: float
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """
+    Immutable snapshot of master data. Array attributes are aligned by position:
+    type_ids[i] has capacity_kg[i] etc. (NaN where a type has no attributes or tariff row).
+    """
+    version: Tuple
+    type_names: List[str]               # sorted by name: the stable ML label encoding
+    type_to_code: Dict[str, int]
+    type_name_to_id: Dict[str, int]
+    attributes_by_type_id: Dict[int, TypeAttributes]
+    type_ids: np.ndarray                # int64, sorted
+    capacity_kg: np.ndarray             # float64, aligned with type_ids
+    capacity_volume: np.ndarray
+    co2_empty_kg_km: np.ndarray
+    co2_loaded_kg_km: np.ndarray
+    cost_per_km: np.ndarray             # transport_tariffs
+    driver_cost_per_min: np.ndarray
+    vehicle_ids: np.ndarray             # int64, sorted
+    vehicle_type_ids: np.ndarray        # int64, aligned with vehicle_ids
+
+    @property
+    def capacity_by_type_name(self) -> Dict[str, float]:
+        return {
+            a.name: a.capacity_kg
+            for a in self.attributes_by_type_id.values()
+            if a.name and a.capacity_kg is not None
+        }
+
+    def attributes_for_type_name(self, name: str) -> Optional[TypeAttributes]:
+        tt_id = self.type_name_to_id.get(name.strip())
+        return self.attributes_by_type_id.get(tt_id) if tt_id is not None else None
+
+    def type_positions(self, type_ids: np.ndarray) -> np.ndarray:
+        """Position of each transport_type_id in the attribute arrays, -1 if unknown."""
+        return _positions(self.type_ids, type_ids)
+
+    def vehicle_type_ids_for(self, vehicle_ids: np.ndarray) -> np.ndarray:
+        """transport_type_id for each vehicle_id, -1 if the vehicle is unknown."""
+        pos = _positions(self.vehicle_ids, vehicle_ids)
+        out = np.full(len(pos), -1, dtype=np.int64)
+        found = pos >= 0
+        out[found] = self.vehicle_type_ids[pos[found]]
+        return out
+
+
+def _positions(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    keys = np.asarray(keys, dtype=np.int64)
+    if len(sorted_keys) == 0:
+        return np.full(len(keys), -1, dtype=np.int64)
+    pos = np.searchsorted(sorted_keys, keys).clip(0, len(sorted_keys) - 1)
+    return np.where(sorted_keys[pos] == keys, pos, -1)
+
+
+# Every master-data column the snapshot is built from, in a fixed row order.
+_FINGERPRINT_TABLES = (
+    ("transport_types", "transport_type_id", ("transport_type_id", "name")),
+    (
+        "vehicle_attributes",
+        "attribute_id",
+        (
+            "attribute_id", "transport_type_id", "capacity_kg", "capacity_volume",
+            "co2_empty_kg_km", "co2_loaded_kg_km",
+        ),
+    ),
+    ("vehicles", "vehicle_id", ("vehicle_id", "transport_type_id")),
+    ("transport_tariffs", "transport_type_id", ("transport_type_id", "cost_per_km", "driver_cost_per_min")),
+)
+
+
+def _fingerprint(session: Session) -> Tuple:
+    """
+    Content hash per master table. PostgreSQL hashes in the database (one round trip,
+    a digest per table comes back); other dialects hash the same rows client-side.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        digests = [
+            "(SELECT md5(coalesce(string_agg(concat_ws('|', {cols}), E'\\n' ORDER BY {key}), '')) FROM {table})".format(
+                table=table, key=key, cols=", ".join(f"coalesce({c}::text, '\\N')" for c in columns)
+            )
+            for table, key, columns in _FINGERPRINT_TABLES
+        ]
+        return tuple(session.execute(text("SELECT " + ", ".join(digests))).one())
+
+    out = []
+    for table, key, columns in _FINGERPRINT_TABLES:
+        digest = hashlib.md5()
+        for row in session.execute(text(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {key}")):
+            digest.update("|".join("\\N" if v is None else str(v) for v in row).encode("utf-8"))
+            digest.update(b"\n")
+        out.append(digest.hexdigest())
+    return tuple(out)
+
+
+def _load(session: Session, version: Tuple) -> ReferenceData:
+    types = session.query(TransportType.transport_type_id, TransportType.name).all()
+    names = sorted(name.strip() for _, name in types if name)
+    type_name_to_id = {name.strip(): int(tt_id) for tt_id, name in types if name}
+    id_to_name = {v: k for k, v in type_name_to_id.items()}
+
+    attributes = {
+        int(va.transport_type_id): TypeAttributes(
+            transport_type_id=int(va.transport_type_id),
+            name=id_to_name.get(int(va.transport_type_id), ""),
+            capacity_kg=float(va.capacity_kg) if va.capacity_kg is not None else None,
+            capacity_volume=float(va.capacity_volume) if va.capacity_volume is not None else None,
+            co2_empty_kg_km=float(va.co2_empty_kg_km or 0.0),
+            co2_loaded_kg_km=float(va.co2_loaded_kg_km or 0.0),
+        )
+        for va in session.query(VehicleAttributes).all()
+    }
+
+    type_ids = np.array(sorted(type_name_to_id.values()), dtype=np.int64)
+
+    def column(attr: str) -> np.ndarray:
+        values = [getattr(attributes[t], attr) if t in attributes else None for t in type_ids]
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    tariffs = {
+        int(tt_id): (float(per_km), float(per_min))
+        for tt_id, per_km, per_min in session.query(
+            TransportTariff.transport_type_id, TransportTariff.cost_per_km, TransportTariff.driver_cost_per_min
+        ).all()
+    }
+    no_tariff = (np.nan, np.nan)
+    tariff_rates = np.array([tariffs.get(int(t), no_tariff) for t in type_ids], dtype=np.float64).reshape(-1, 2)
+
+    vehicles = sorted(
+        (int(vid), int(tt_id))
+        for vid, tt_id in session.query(Vehicle.vehicle_id, Vehicle.transport_type_id).all()
+    )
+    return ReferenceData(
+        version=version,
+        type_names=names,
+        type_to_code={name: i for i, name in enumerate(names)},
+        type_name_to_id=type_name_to_id,
+        attributes_by_type_id=attributes,
+        type_ids=type_ids,
+        capacity_kg=column("capacity_kg"),
+        capacity_volume=column("capacity_volume"),
+        co2_empty_kg_km=column("co2_empty_kg_km"),
+        co2_loaded_kg_km=column("co2_loaded_kg_km"),
+        cost_per_km=tariff_rates[:, 0],
+        driver_cost_per_min=tariff_rates[:, 1],
+        vehicle_ids=np.array([v for v, _ in vehicles], dtype=np.int64),
+        vehicle_type_ids=np.array([t for _, t in vehicles], dtype=np.int64),
+    )
+
+
+class ReferenceDataCache:
+    """
+    Holds the current ReferenceData snapshot. The fingerprint is re-checked at most
+    every check_interval_s seconds; a changed fingerprint triggers a reload.
+    """
+
+    def __init__(self, check_interval_s: float = 30.0) -> None:
+        self.check_interval_s = check_interval_s
+        self._data: Optional[ReferenceData] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Force a fingerprint check on next access (call after master data changes)."""
+        with self._lock:
+            self._checked_at = float("-inf")
+
+    def get(self, session: Optional[Session] = None, refresh: bool = False) -> ReferenceData:
+        now = time.monotonic()
+        data = self._data
+        if data is not None and not refresh and now - self._checked_at < self.check_interval_s:
+            return data
+
+        own_session = session is None
+        session = session or SessionLocal()
+        try:
+            with self._lock:
+                version = _fingerprint(session)
+                if self._data is None or self._data.version != version:
+                    self._data = _load(session, version)
+                    logger.info(
+                        "Loaded reference data: %d transport types, %d vehicles",
+                        len(self._data.type_ids), len(self._data.vehicle_ids),
+                    )
+                self._checked_at = now
+                return self._data
+        finally:
+            if own_session:
+                session.close()
+
+
+reference_data = ReferenceDataCache(settings.reference_data_check_s)
+
+
+def get_reference_data(session: Optional[Session] = None, refresh: bool = False) -> ReferenceData:
+    """Current master-data snapshot; pass refresh=True to check the fingerprint now."""
+    return reference_data.get(session, refresh=refresh)
@@ -25,9 +25,12 @@ CREATE INDEX idx_addresses_external_code ON addresses (external_code);
 CREATE TABLE IF NOT EXISTS transport_types (
     transport_type_id  SERIAL PRIMARY KEY,
     name               VARCHAR(128) NOT NULL UNIQUE,
-    description        TEXT
+    description        TEXT,
+    powertrain         VARCHAR(16)   -- electric / hybrid / combustion
 );
 
+CREATE INDEX IF NOT EXISTS ix_transport_types_powertrain ON transport_types (powertrain);
+
 CREATE TABLE IF NOT EXISTS vehicles (
     vehicle_id         SERIAL PRIMARY KEY,
     transport_type_id  INTEGER NOT NULL REFERENCES transport_types (transport_type_id),
@@ -46,6 +49,15 @@ CREATE TABLE IF NOT EXISTS vehicle_attributes (
     co2_loaded_kg_km   DOUBLE PRECISION NOT NULL
 );
 
+-- Cost rates per transport type (python main.py set-tariff); types without a row
+-- fall back to COST_PER_KM / DRIVER_COST_PER_MIN.
+CREATE TABLE IF NOT EXISTS transport_tariffs (
+    transport_type_id    INTEGER PRIMARY KEY REFERENCES transport_types (transport_type_id),
+    cost_per_km          DOUBLE PRECISION NOT NULL,
+    driver_cost_per_min  DOUBLE PRECISION NOT NULL,
+    updated_at           TIMESTAMP DEFAULT NOW()
+);
+
 -- ============================================================
 -- FREIGHT UNITS (customer orders before tour planning)
 -- ============================================================
@@ -143,6 +155,7 @@ CREATE TABLE IF NOT EXISTS transport_stage_fact (
     order_id        INTEGER,
     vehicle_id      INTEGER,
     transport_type  TEXT,
+    powertrain      VARCHAR(16),
     from_stop_id    INTEGER,
     to_stop_id      INTEGER,
     distance_km     NUMERIC,
@@ -157,6 +170,36 @@ CREATE TABLE IF NOT EXISTS transport_stage_fact (
 CREATE INDEX IF NOT EXISTS idx_tsf_order_id ON transport_stage_fact (order_id);
 CREATE INDEX IF NOT EXISTS idx_tsf_vehicle_id ON transport_stage_fact (vehicle_id);
 CREATE INDEX IF NOT EXISTS idx_tsf_transport_type ON transport_stage_fact (transport_type);
+CREATE INDEX IF NOT EXISTS ix_transport_stage_fact_powertrain ON transport_stage_fact (powertrain);
 CREATE INDEX idx_fo_stages_source_key ON freight_order_stages (source_key);
 
+-- ============================================================
+-- MATERIALIZED RECOMMENDATIONS (python main.py build-recommendations)
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS recommendations (
+    recommendation_id       SERIAL PRIMARY KEY,
+    order_id                INTEGER NOT NULL,
+    alert_type              VARCHAR(64) NOT NULL,
+    recommendation          TEXT NOT NULL,
+    estimated_co2_reduction DOUBLE PRECISION NOT NULL,
+    priority_score          DOUBLE PRECISION NOT NULL,
+    model_version           VARCHAR(64) NOT NULL,
+    fact_version            VARCHAR(64) NOT NULL,
+    created_at              TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_recommendations_order_id ON recommendations (order_id);
+CREATE INDEX IF NOT EXISTS idx_recommendations_priority ON recommendations (priority_score, recommendation_id);
+CREATE INDEX IF NOT EXISTS idx_recommendations_type_priority ON recommendations (alert_type, priority_score);
+
+-- One row per build-recommendations run, written even when it produced no rows.
+CREATE TABLE IF NOT EXISTS recommendation_builds (
+    build_id        SERIAL PRIMARY KEY,
+    model_version   VARCHAR(64) NOT NULL,
+    fact_version    VARCHAR(64) NOT NULL,
+    row_count       INTEGER NOT NULL,
+    built_at        TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
 COMMIT;
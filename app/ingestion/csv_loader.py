@@ -7,6 +7,8 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.database.connection import SessionLocal
+from app.database.notify import notify_data_changed
+from app.database.reference_data import reference_data
 from app.database.models import (
     Address,
     TransportType,
@@ -18,6 +20,7 @@ from app.database.models import (
     FreightOrderStop,
     FreightOrderStage,
 )
+from app.database.powertrain import classify_powertrain
 
 logger = logging.getLogger(__name__)
 
@@ -444,6 +447,12 @@ def load_single(
             logger.warning("  Dropped %d rows with unknown transport type code", before - len(df))
         if mapping.model is VehicleAttributes:
             df = df.drop_duplicates(subset=["transport_type_id"], keep="first")
+    if mapping.model is TransportType and "name" in df.columns:
+        descriptions = df["description"] if "description" in df.columns else [None] * len(df)
+        df["powertrain"] = [
+            classify_powertrain(str(n), d if isinstance(d, str) else None)
+            for n, d in zip(df["name"], descriptions)
+        ]
     count = _bulk_insert(session, mapping.model, df)
     logger.info("  Inserted %d rows into %s", count, mapping.model.__tablename__)
     return count
@@ -490,7 +499,9 @@ def load_all(data_dir: str | Path, replace: bool = False) -> dict[str, int]:
         movement_summary = _load_movement(data_dir, session)
         summary.update(movement_summary)
 
+        notify_data_changed(session, "ingest")
         session.commit()
+        reference_data.invalidate()
         logger.info("All CSV files committed successfully")
     except Exception:
         session.rollback()
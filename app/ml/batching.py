@@ -0,0 +1,152 @@
+"""
+Micro-batching predictor: coalesces concurrent prediction requests arriving within a
+short window into one feature matrix per model, runs a single predict per model and
+scatters the results back to the waiting callers.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.ml.inference import feature_columns, feature_matrix, predict_matrices
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingRequest:
+    X_emission: np.ndarray
+    X_load: np.ndarray
+    future: Future = field(default_factory=Future)
+
+
+class BatchPredictor:
+    """
+    Thread-safe front end to inference.predict_matrices. API handlers run in the
+    threadpool, so callers block on a Future while a single worker thread drains
+    the queue, waiting up to window_ms after the first request for more to arrive.
+    """
+
+    def __init__(
+        self,
+        emission_model_path: Optional[Path] = None,
+        load_model_path: Optional[Path] = None,
+        window_ms: float = 2.0,
+        max_batch_rows: int = 8192,
+    ) -> None:
+        self.emission_model_path = emission_model_path
+        self.load_model_path = load_model_path
+        self.window_s = max(window_ms, 0.0) / 1000.0
+        self.max_batch_rows = max_batch_rows
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="batch-predictor", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> List[_PendingRequest]:
+        first = self._queue.get()
+        batch = [first]
+        rows = len(first.X_emission)
+        deadline = time.monotonic() + self.window_s
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item.X_emission)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                co2, load = predict_matrices(
+                    np.vstack([r.X_emission for r in batch]),
+                    np.vstack([r.X_load for r in batch]),
+                    self.emission_model_path,
+                    self.load_model_path,
+                )
+            except Exception as e:  # deliver the failure to every waiting caller
+                logger.exception("Batched prediction failed for %d requests", len(batch))
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            offset = 0
+            for r in batch:
+                n = len(r.X_emission)
+                r.future.set_result((co2[offset:offset + n], load[offset:offset + n]))
+                offset += n
+
+    def predict_arrays(
+        self, X_emission: np.ndarray, X_load: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict (co2, load_ratio) for prepared matrices, sharing a model call with concurrent callers."""
+        if len(X_emission) == 0:
+            return np.empty(0), np.empty(0)
+        if self.window_s <= 0 or len(X_emission) >= self.max_batch_rows:
+            return predict_matrices(
+                X_emission, X_load, self.emission_model_path, self.load_model_path
+            )
+        self._ensure_worker()
+        pending = _PendingRequest(X_emission, X_load)
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Same contract as inference.predict."""
+        cols_emission, cols_load = feature_columns(
+            self.emission_model_path, self.load_model_path
+        )
+        co2, load = self.predict_arrays(
+            feature_matrix(df, cols_emission), feature_matrix(df, cols_load)
+        )
+        return df.assign(predicted_co2=co2, predicted_load_ratio=load)
+
+
+_predictors: Dict[Tuple[Optional[Path], Optional[Path]], BatchPredictor] = {}
+_predictors_lock = threading.Lock()
+
+
+def get_batch_predictor(
+    emission_model_path: Optional[Path] = None,
+    load_model_path: Optional[Path] = None,
+) -> BatchPredictor:
+    """Process-wide predictor per model pair, configured from settings."""
+    key = (emission_model_path, load_model_path)
+    with _predictors_lock:
+        predictor = _predictors.get(key)
+        if predictor is None:
+            predictor = BatchPredictor(
+                emission_model_path,
+                load_model_path,
+                window_ms=settings.inference_batch_window_ms,
+                max_batch_rows=settings.inference_batch_max_rows,
+            )
+            _predictors[key] = predictor
+        return predictor
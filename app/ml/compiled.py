@@ -0,0 +1,134 @@
+"""
+Compiled tree-ensemble inference: flattens a trained StandardScaler + forest pipeline
+into contiguous NumPy arrays and evaluates batches with vectorized traversal, so
+predictions need neither DataFrames nor sklearn's per-call validation and threading.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows evaluated per traversal pass; keeps the (rows x trees) node-index matrix
+# cache-resident, which is faster than one large pass.
+CHUNK_ROWS = 1024
+
+
+@dataclass
+class CompiledForest:
+    """
+    All trees concatenated into one node table. Leaves point to themselves, so every
+    row can be advanced max_depth times without tracking which paths have finished.
+    """
+    feature: np.ndarray    # int32 (n_nodes,)
+    threshold: np.ndarray  # float64 (n_nodes,)
+    left: np.ndarray       # int32 (n_nodes,), absolute node index
+    right: np.ndarray      # int32 (n_nodes,), absolute node index
+    value: np.ndarray      # float64 (n_nodes,)
+    roots: np.ndarray      # int32 (n_trees,)
+    max_depth: int
+    n_features: int
+    scaler_mean: Optional[np.ndarray] = None
+    scaler_scale: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_pipeline(cls, model) -> "CompiledForest":
+        """
+        Build from a fitted Pipeline([StandardScaler, forest]) or a bare forest/tree
+        regressor. Raises TypeError for anything else.
+        """
+        scaler = None
+        estimator = model
+        if hasattr(model, "steps"):
+            if len(model.steps) > 2:
+                raise TypeError("Only [scaler, regressor] pipelines can be compiled")
+            if len(model.steps) == 2:
+                scaler = model.steps[0][1]
+                if not hasattr(scaler, "mean_") or not hasattr(scaler, "scale_"):
+                    raise TypeError(f"Unsupported preprocessing step: {type(scaler).__name__}")
+            estimator = model.steps[-1][1]
+
+        trees = getattr(estimator, "estimators_", None)
+        if trees is None and hasattr(estimator, "tree_"):
+            trees = [estimator]
+        if not trees or not all(hasattr(t, "tree_") for t in trees):
+            raise TypeError(f"Unsupported estimator: {type(estimator).__name__}")
+        if any(t.tree_.n_outputs != 1 for t in trees):
+            raise TypeError("Only single-output regressors can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for t in trees:
+            tree = t.tree_
+            n = tree.node_count
+            nodes = np.arange(n, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features=int(estimator.n_features_in_),
+            scaler_mean=None if scaler is None else np.asarray(scaler.mean_, dtype=np.float64),
+            scaler_scale=None if scaler is None else np.asarray(scaler.scale_, dtype=np.float64),
+        )
+
+    def _prepare(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        if self.scaler_mean is not None:
+            X = (X.astype(np.float64) - self.scaler_mean) / self.scaler_scale
+        # Trees split on float32 inputs, exactly as sklearn's predict does.
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n = X.shape[0]
+        flat = X.ravel()
+        row_base = (np.arange(n, dtype=np.int64) * self.n_features)[:, None]
+        idx = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = flat.take(row_base + self.feature.take(idx)) <= self.threshold.take(idx)
+            idx = np.where(go_left, self.left.take(idx), self.right.take(idx))
+        return self.value.take(idx).mean(axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict for raw (unscaled) feature rows given as a float32/float64 array."""
+        X = self._prepare(X)
+        if X.shape[0] <= CHUNK_ROWS:
+            return self._predict_chunk(X)
+        return np.concatenate([
+            self._predict_chunk(X[i:i + CHUNK_ROWS])
+            for i in range(0, X.shape[0], CHUNK_ROWS)
+        ])
+
+
+def compile_model(model) -> Optional[CompiledForest]:
+    """CompiledForest for a supported model, or None to fall back to sklearn."""
+    try:
+        compiled = CompiledForest.from_pipeline(model)
+    except TypeError as e:
+        logger.warning("Model cannot be compiled, using sklearn predict: %s", e)
+        return None
+    logger.info(
+        "Compiled %d trees (%d nodes, depth %d)",
+        len(compiled.roots), len(compiled.value), compiled.max_depth,
+    )
+    return compiled
@@ -3,7 +3,7 @@ ML feature engineering from transport_stage_fact.
 Reads via SQLAlchemy, returns a pandas DataFrame with NULL-safe features.
 """
 import logging
-from typing import Optional
+from typing import Optional, Sequence
 
 import pandas as pd
 from sqlalchemy.orm import Session
@@ -50,22 +50,28 @@ def _safe_float(x: Optional[float], default: float = 0.0) -> float:
         return default
 
 
-from app.database.models import TransportStageFact, TransportType
+from app.database.reference_data import get_reference_data
 
 
-def build_features_from_session(session: Session, order_id: Optional[int] = None) -> pd.DataFrame:
+def build_features_from_session(
+    session: Session,
+    order_id: Optional[int] = None,
+    order_ids: Optional[Sequence[int]] = None,
+) -> pd.DataFrame:
     """
-    Read transport_stage_fact and build ML-ready features.
+    Read transport_stage_fact and build ML-ready features, optionally restricted to
+    one order_id or a set of order_ids.
     Returns DataFrame with FEATURE_COLS + co2_emission (alias of co2_kg), load_ratio.
     """
-    # Fetch all unique transport types once to ensure STABLE label encoding
+    # Encode against all transport types (cached) to ensure STABLE label encoding
     # otherwise vehicle_type_encoded changes based on dataframe row order/subset
-    all_types = [t.name for t in session.query(TransportType.name).order_by(TransportType.name).all()]
-    types_seen = {name.strip(): i for i, name in enumerate(all_types)}
+    types_seen = get_reference_data(session).type_to_code
 
     query = session.query(TransportStageFact)
     if order_id is not None:
         query = query.filter(TransportStageFact.order_id == order_id)
+    if order_ids is not None:
+        query = query.filter(TransportStageFact.order_id.in_(list(order_ids)))
         
     rows = query.all()
     if not rows:
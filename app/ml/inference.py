@@ -1,12 +1,16 @@
 """
 Load trained models and return predicted_co2 and predicted_load_ratio for given DataFrame rows.
 """
+import hashlib
 import logging
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from app.config import settings
+from app.ml.compiled import CompiledForest, compile_model
 
 logger = logging.getLogger(__name__)
 
@@ -17,45 +21,148 @@ LOAD_MODEL_PATH = _MODELS_DIR / "load_model.joblib"
 
 from functools import lru_cache
 
+
+def compiled_artifact_path(path: Path) -> Path:
+    """Uncompressed CompiledForest saved next to a model artifact, opened memory-mapped."""
+    return path.with_suffix(".compiled.joblib")
+
+
 @lru_cache(maxsize=2)
 def _load_artifact(path: Path) -> Dict[str, Any]:
+    """Load a model artifact once per process."""
     import joblib
     if not path.exists():
         raise FileNotFoundError(f"Model not found: {path}. Run train-models first.")
+    logger.info("Loading model %s", path.name)
     return joblib.load(path)
 
 
-def predict(
-    df: pd.DataFrame,
+def model_version(
     emission_model_path: Optional[Path] = None,
     load_model_path: Optional[Path] = None,
-) -> pd.DataFrame:
+) -> str:
+    """Short fingerprint of the artifact files (name, size, mtime); changes on retrain."""
+    digest = hashlib.sha1()
+    for path in (emission_model_path or EMISSION_MODEL_PATH, load_model_path or LOAD_MODEL_PATH):
+        if not path.exists():
+            raise FileNotFoundError(f"Model not found: {path}. Run train-models first.")
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def warm_up_models(
+    emission_model_path: Optional[Path] = None,
+    load_model_path: Optional[Path] = None,
+) -> bool:
     """
-    Accept dataframe with feature columns (from features.py). Returns copy of df
-    with added columns: predicted_co2, predicted_load_ratio.
+    Load both artifacts and run a one-row prediction so the first API request does not
+    pay for unpickling and estimator initialisation. Returns False if models are missing.
     """
-    emission_model_path = emission_model_path or EMISSION_MODEL_PATH
-    load_model_path = load_model_path or LOAD_MODEL_PATH
+    try:
+        predict(pd.DataFrame([{}]), emission_model_path, load_model_path)
+    except FileNotFoundError as e:
+        logger.warning("Model warm-up skipped: %s", e)
+        return False
+    logger.info("ML models loaded and warmed up")
+    return True
+
+
+def feature_matrix(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Model input matrix in artifact column order; missing columns and NULLs become 0.0."""
+    X = df.reindex(columns=columns, fill_value=0.0).to_numpy(dtype=np.float64)
+    return np.nan_to_num(X, nan=0.0)
 
-    emission_artifact = _load_artifact(emission_model_path)
-    load_artifact = _load_artifact(load_model_path)
 
-    pipe_emission = emission_artifact["model"]
-    pipe_load = load_artifact["model"]
-    cols_emission = emission_artifact["feature_columns"]
-    cols_load = load_artifact["feature_columns"]
+@lru_cache(maxsize=2)
+def _compiled_artifact(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    {"model": CompiledForest, "feature_columns": [...]} saved by training next to a
+    model artifact (compiled_artifact_path), or None without a current one. The node
+    arrays are uncompressed and opened with mmap_mode='r', so they are backed by the
+    page cache and every API worker shares one copy.
+    """
+    import joblib
+    compiled_path = compiled_artifact_path(path)
+    if not settings.model_mmap or not compiled_path.exists():
+        return None
+    if path.exists() and compiled_path.stat().st_mtime < path.stat().st_mtime:
+        logger.warning("Ignoring stale compiled model %s", compiled_path)
+        return None
+    logger.info("Loading compiled model %s (memory-mapped)", compiled_path.name)
+    return joblib.load(compiled_path, mmap_mode="r")
+
+
+@lru_cache(maxsize=2)
+def _compiled_model(path: Path) -> Optional[CompiledForest]:
+    """The saved compiled forest; without one, the sklearn pipeline compiled in process."""
+    saved = _compiled_artifact(path)
+    if saved is not None:
+        return saved["model"]
+    return compile_model(_load_artifact(path)["model"])
+
 
-    out = df.copy()
-    for c in cols_emission:
-        if c not in out.columns:
-            out[c] = 0.0
-    for c in cols_load:
-        if c not in out.columns:
-            out[c] = 0.0
+def _feature_columns(path: Path) -> List[str]:
+    # Read from the compiled artifact when there is one, so that small-batch
+    # inference never unpickles the sklearn pipeline.
+    saved = _compiled_artifact(path)
+    return list((saved if saved is not None else _load_artifact(path))["feature_columns"])
 
-    X_emission = out[cols_emission].fillna(0.0)
-    X_load = out[cols_load].fillna(0.0)
 
-    out["predicted_co2"] = pipe_emission.predict(X_emission)
-    out["predicted_load_ratio"] = pipe_load.predict(X_load)
-    return out
+def _model_predict(path: Path, X: np.ndarray) -> np.ndarray:
+    # The compiled engine wins on small, latency-bound batches (simulate, batched API
+    # calls); sklearn's Cython traversal is faster on whole-table scoring, so the
+    # pipeline is only loaded once a large batch arrives.
+    if settings.inference_engine == "compiled" and len(X) <= settings.inference_compiled_max_rows:
+        compiled = _compiled_model(path)
+        if compiled is not None:
+            return compiled.predict(X)
+    artifact = _load_artifact(path)
+    # Wrap in a frame so the pipeline sees the feature names it was fitted with.
+    return artifact["model"].predict(pd.DataFrame(X, columns=artifact["feature_columns"]))
+
+
+def predict_matrices(
+    X_emission: np.ndarray,
+    X_load: np.ndarray,
+    emission_model_path: Optional[Path] = None,
+    load_model_path: Optional[Path] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict (co2, load_ratio) from raw feature matrices in artifact column order;
+    one call per model. Uses the compiled tree engine unless INFERENCE_ENGINE=sklearn.
+    """
+    return (
+        _model_predict(emission_model_path or EMISSION_MODEL_PATH, X_emission),
+        _model_predict(load_model_path or LOAD_MODEL_PATH, X_load),
+    )
+
+
+def feature_columns(
+    emission_model_path: Optional[Path] = None,
+    load_model_path: Optional[Path] = None,
+) -> Tuple[List[str], List[str]]:
+    """Feature column order expected by the (emission, load) artifacts."""
+    return (
+        _feature_columns(emission_model_path or EMISSION_MODEL_PATH),
+        _feature_columns(load_model_path or LOAD_MODEL_PATH),
+    )
+
+
+def predict(
+    df: pd.DataFrame,
+    emission_model_path: Optional[Path] = None,
+    load_model_path: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Accept dataframe with feature columns (from features.py). Returns copy of df
+    with added columns: predicted_co2, predicted_load_ratio.
+    """
+    cols_emission, cols_load = feature_columns(emission_model_path, load_model_path)
+    co2, load = predict_matrices(
+        feature_matrix(df, cols_emission),
+        feature_matrix(df, cols_load),
+        emission_model_path,
+        load_model_path,
+    )
+    return df.assign(predicted_co2=co2, predicted_load_ratio=load)
@@ -3,23 +3,22 @@ What-if simulator: given order_id and alternative vehicle type, simulate new loa
 predicted emissions, CO2 savings %, utilization improvement using ML predictions.
 """
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 
+import numpy as np
+import pandas as pd
 from sqlalchemy.orm import Session
 
-from app.database.models import TransportType, VehicleAttributes
+from app.database.reference_data import get_reference_data
+from app.ml.batching import get_batch_predictor
 from app.ml.features import build_features_from_session
-from app.ml.inference import predict
+from app.ml.inference import feature_columns, feature_matrix, predict_matrices
 
 logger = logging.getLogger(__name__)
 
 
 def _capacity_by_type_name(session: Session) -> Dict[str, float]:
-    q = (
-        session.query(TransportType.name, VehicleAttributes.capacity_kg)
-        .join(VehicleAttributes, TransportType.transport_type_id == VehicleAttributes.transport_type_id)
-    )
-    return {str(name): float(cap) for name, cap in q.all() if name and cap is not None}
+    return get_reference_data(session).capacity_by_type_name
 
 
 def simulate_order(
@@ -47,14 +46,7 @@ def simulate_order(
             "available_types": list(type_to_capacity.keys()),
         }
 
-    current = predict(order_rows.copy(), emission_model_path, load_model_path)
-    cur_co2 = current["predicted_co2"].sum()
-    cur_load = current["predicted_load_ratio"].mean()
-
-    # Re-calculate stable type encoding map
-    all_types = [t.name for t in session.query(TransportType.name).order_by(TransportType.name).all()]
-    type_to_code = {name.strip(): i for i, name in enumerate(all_types)}
-    
+    type_to_code = get_reference_data(session).type_to_code
     alt_type = alternative_vehicle_type.strip()
     code = type_to_code.get(alt_type, -1)
 
@@ -65,9 +57,15 @@ def simulate_order(
     if "emission_per_km" in alt_df.columns:
         alt_df["emission_per_km"] = 0.0
 
-    alt_pred = predict(alt_df, emission_model_path, load_model_path)
-    alt_co2 = alt_pred["predicted_co2"].sum()
-    alt_load = alt_pred["predicted_load_ratio"].mean()
+    # Current and alternative scenario share one (batched) model call.
+    n = len(order_rows)
+    pred = get_batch_predictor(emission_model_path, load_model_path).predict(
+        pd.concat([order_rows, alt_df], ignore_index=True)
+    )
+    cur_co2 = pred["predicted_co2"].iloc[:n].sum()
+    cur_load = pred["predicted_load_ratio"].iloc[:n].mean()
+    alt_co2 = pred["predicted_co2"].iloc[n:].sum()
+    alt_load = pred["predicted_load_ratio"].iloc[n:].mean()
 
     co2_savings_pct = (1.0 - alt_co2 / cur_co2) * 100.0 if cur_co2 > 0 else 0.0
     utilization_improvement = float(alt_load - cur_load)
@@ -81,4 +79,105 @@ def simulate_order(
         "alternative_predicted_load_ratio": float(alt_load),
         "co2_savings_percent": float(co2_savings_pct),
         "utilization_improvement": utilization_improvement,
-    }
\ No newline at end of file
+    }
+
+
+def simulate_orders(
+    session: Session,
+    order_ids: Sequence[int],
+    vehicle_types: Optional[Sequence[str]] = None,
+    emission_model_path: Optional[Any] = None,
+    load_model_path: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Evaluate every order against every candidate vehicle type (default: all types
+    with known capacity). The order x type cross product is built as one feature
+    matrix per model, so the whole batch costs two model calls.
+    Returns the best (lowest predicted CO2) alternative per order, in input order.
+    """
+    type_to_capacity = _capacity_by_type_name(session)
+    requested = [t.strip() for t in (vehicle_types or type_to_capacity.keys())]
+    types = [t for t in dict.fromkeys(requested) if t in type_to_capacity]
+    unknown = [t for t in dict.fromkeys(requested) if t not in type_to_capacity]
+    if not types:
+        return {
+            "error": f"Unknown vehicle types: {', '.join(unknown)}",
+            "available_types": list(type_to_capacity.keys()),
+        }
+
+    unique_ids = list(dict.fromkeys(int(o) for o in order_ids))
+    feats = build_features_from_session(session, order_ids=unique_ids)
+    if feats.empty:
+        return {"results": [], "missing_order_ids": unique_ids, "unknown_vehicle_types": unknown}
+
+    type_to_code = get_reference_data(session).type_to_code
+
+    order_codes, order_index = pd.factorize(feats["order_id"])
+    n_orders, n_types, n_stages = len(order_index), len(types), len(feats)
+    capacity = np.array([type_to_capacity[t] for t in types], dtype=np.float64)
+    codes = np.array([type_to_code.get(t, -1) for t in types], dtype=np.float64)
+    alt_load_ratio = np.clip(
+        feats["load_weight"].to_numpy(dtype=np.float64)[:, None] / capacity[None, :], 0.0, 2.0
+    )
+
+    def cross_product(cols: list) -> np.ndarray:
+        # Current rows first, then stage s / type k at row n_stages + s * n_types + k.
+        base = feature_matrix(feats, cols)
+        alt = np.repeat(base, n_types, axis=0)
+        overrides = {
+            "vehicle_capacity": np.tile(capacity, n_stages),
+            "load_ratio": alt_load_ratio.ravel(),
+            "vehicle_type_encoded": np.tile(codes, n_stages),
+            "emission_per_km": 0.0,
+        }
+        for col, values in overrides.items():
+            if col in cols:
+                alt[:, cols.index(col)] = values
+        return np.vstack([base, alt])
+
+    cols_emission, cols_load = feature_columns(emission_model_path, load_model_path)
+    co2, load = predict_matrices(
+        cross_product(cols_emission), cross_product(cols_load),
+        emission_model_path, load_model_path,
+    )
+
+    stage_counts = np.bincount(order_codes, minlength=n_orders).astype(np.float64)
+    cur_co2 = np.bincount(order_codes, weights=co2[:n_stages], minlength=n_orders)
+    cur_load = np.bincount(order_codes, weights=load[:n_stages], minlength=n_orders) / stage_counts
+    pair = (order_codes[:, None] * n_types + np.arange(n_types)[None, :]).ravel()
+    size = n_orders * n_types
+    alt_co2 = np.bincount(pair, weights=co2[n_stages:], minlength=size).reshape(n_orders, n_types)
+    alt_load = (
+        np.bincount(pair, weights=load[n_stages:], minlength=size).reshape(n_orders, n_types)
+        / stage_counts[:, None]
+    )
+
+    best = alt_co2.argmin(axis=1)
+    rows = np.arange(n_orders)
+    best_co2 = alt_co2[rows, best]
+    best_load = alt_load[rows, best]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        savings = np.where(cur_co2 > 0, (1.0 - best_co2 / cur_co2) * 100.0, 0.0)
+
+    by_order = {
+        int(oid): {
+            "order_id": int(oid),
+            "best_vehicle_type": types[best[i]],
+            "current_predicted_co2": float(cur_co2[i]),
+            "alternative_predicted_co2": float(best_co2[i]),
+            "current_predicted_load_ratio": float(cur_load[i]),
+            "alternative_predicted_load_ratio": float(best_load[i]),
+            "co2_savings_percent": float(savings[i]),
+            "utilization_improvement": float(best_load[i] - cur_load[i]),
+        }
+        for i, oid in enumerate(order_index)
+    }
+    logger.info(
+        "Simulated %d orders x %d vehicle types (%d rows)",
+        n_orders, n_types, n_stages * (n_types + 1),
+    )
+    return {
+        "results": [by_order[o] for o in unique_ids if o in by_order],
+        "missing_order_ids": [o for o in unique_ids if o not in by_order],
+        "unknown_vehicle_types": unknown,
+    }
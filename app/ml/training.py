@@ -13,6 +13,9 @@ from sklearn.preprocessing import StandardScaler
 
 from app.ml.dataset import get_feature_matrix, get_ml_dataset
 from app.ml.features import TARGET_CO2, TARGET_LOAD
+from app.ml.compiled import compile_model
+from app.ml.inference import compiled_artifact_path
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -88,11 +91,34 @@ def train_load_model(
     }
 
 
+def save_artifact(
+    artifact: Dict[str, Any],
+    path: Path,
+    compress: Optional[int] = None,
+) -> Optional[Path]:
+    """
+    Persist an artifact compressed at path (small, portable), plus its CompiledForest
+    and feature columns uncompressed next to it, so inference can open the node arrays
+    with mmap_mode='r' without loading the pipeline. Returns the path of the compiled
+    copy, None if the model cannot be compiled.
+    """
+    compress = settings.model_compress if compress is None else compress
+    joblib.dump(artifact, path, compress=compress)
+    compiled_path = compiled_artifact_path(path)
+    compiled = compile_model(artifact["model"])
+    if compiled is None:
+        compiled_path.unlink(missing_ok=True)
+        return None
+    joblib.dump({"model": compiled, "feature_columns": list(artifact["feature_columns"])}, compiled_path)
+    return compiled_path
+
+
 def run_training(
     session=None,
     cache_path: Optional[Path] = None,
     use_cache: bool = False,
     models_dir: Optional[Path] = None,
+    compress: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
     Build dataset, train both models, persist to models_dir (default: project models/).
@@ -112,8 +138,8 @@ def run_training(
     emission_artifact = train_emission_model(train_df, test_df)
     load_artifact = train_load_model(train_df, test_df)
 
-    joblib.dump(emission_artifact, models_dir / "emission_model.joblib")
-    joblib.dump(load_artifact, models_dir / "load_model.joblib")
+    save_artifact(emission_artifact, models_dir / "emission_model.joblib", compress)
+    save_artifact(load_artifact, models_dir / "load_model.joblib", compress)
     logger.info(
         "Saved emission model (test MAE=%.2f R2=%.3f) and load model (test MAE=%.3f R2=%.3f)",
         emission_artifact["metrics"].get("mae", 0),
@@ -0,0 +1,340 @@
+"""
+Load consolidation by 2-D bin packing: freight units are assigned to vehicle trips so
+that both weight and volume capacity hold, using first-fit / best-fit decreasing plus
+an optional time-boxed local search that empties the least-filled trips. Each trip is
+then given the lowest-emission vehicle type it fits, and the plan is costed with the
+fact table's emission model against the units' current orders.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.analytics.fact_builder import compute_stage_co2
+from app.database.models import FreightOrder, FreightOrderItem, FreightUnit
+from app.database.reference_data import ReferenceData, get_reference_data
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("best_fit", "first_fit")
+
+_EPS = 1e-9
+
+
+@dataclass
+class ConsolidationPlan:
+    assignments: pd.DataFrame        # unit_id, trip_id
+    trips: pd.DataFrame              # one row per consolidated trip
+    unpacked_unit_ids: List[int]     # heavier/bulkier than any single vehicle
+    baseline_trips: int
+    consolidated_trips: int
+    baseline_co2_kg: float
+    consolidated_co2_kg: float
+    co2_delta_kg: float              # consolidated - baseline (negative = saving)
+    elapsed_s: float
+
+
+def pack_units(
+    weights: np.ndarray,
+    volumes: np.ndarray,
+    capacity_kg: float,
+    capacity_volume: Optional[float] = None,
+    strategy: str = "best_fit",
+    deadline: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Trip index (0..n_trips-1) per unit for vehicles of the given capacity, -1 for units
+    that exceed a whole vehicle. Units are placed largest first (by their larger
+    normalized dimension) into the first trip that fits or the one left tightest.
+    If deadline (time.monotonic()) is given, local search runs until then.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {STRATEGIES}")
+    nw = np.nan_to_num(np.asarray(weights, dtype=np.float64)) / capacity_kg
+    if capacity_volume is not None and capacity_volume > 0:
+        nv = np.nan_to_num(np.asarray(volumes, dtype=np.float64)) / capacity_volume
+    else:
+        nv = np.zeros(len(nw))
+
+    assignment = np.full(len(nw), -1, dtype=np.int64)
+    order = np.lexsort((-(nw + nv), -np.maximum(nw, nv)))
+    order = order[(nw[order] <= 1.0 + _EPS) & (nv[order] <= 1.0 + _EPS)]
+
+    # Residual capacity per open trip, normalized to 1.0 per dimension.
+    rw = np.empty(len(order))
+    rv = np.empty(len(order))
+    n_trips = 0
+    for i in order:
+        j = -1
+        if n_trips:
+            feasible = (rw[:n_trips] >= nw[i] - _EPS) & (rv[:n_trips] >= nv[i] - _EPS)
+            if strategy == "first_fit":
+                j = int(feasible.argmax()) if feasible.any() else -1
+            elif feasible.any():
+                slack = np.where(feasible, rw[:n_trips] + rv[:n_trips], np.inf)
+                j = int(slack.argmin())
+        if j < 0:
+            j = n_trips
+            rw[j] = rv[j] = 1.0
+            n_trips += 1
+        rw[j] -= nw[i]
+        rv[j] -= nv[i]
+        assignment[i] = j
+
+    if deadline is not None and n_trips > 1:
+        assignment = _eliminate_trips(nw, nv, assignment, n_trips, deadline)
+    return assignment
+
+
+def _eliminate_trips(
+    nw: np.ndarray, nv: np.ndarray, assignment: np.ndarray, n_trips: int, deadline: float
+) -> np.ndarray:
+    """
+    Local search: repeatedly try to move every unit of the least-filled trip into the
+    remaining trips (best fit); a trip is dropped when all of its units fit elsewhere.
+    Stops at the deadline or after a pass without improvement. Trips are renumbered.
+    """
+    packed = assignment >= 0
+    rw = 1.0 - np.bincount(assignment[packed], weights=nw[packed], minlength=n_trips)
+    rv = 1.0 - np.bincount(assignment[packed], weights=nv[packed], minlength=n_trips)
+    alive = np.ones(n_trips, dtype=bool)
+    by_trip = np.argsort(assignment, kind="stable")
+    starts = np.searchsorted(assignment[by_trip], np.arange(n_trips + 1))
+    members = {t: list(by_trip[starts[t]:starts[t + 1]]) for t in range(n_trips)}
+
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        fill = np.maximum(1.0 - rw, 1.0 - rv)
+        for t in np.argsort(np.where(alive, fill, np.inf), kind="stable"):
+            if not alive[t] or time.monotonic() >= deadline:
+                break
+            alive[t] = False
+            moves = []
+            for i in sorted(members[t], key=lambda i: -max(nw[i], nv[i])):
+                feasible = alive & (rw >= nw[i] - _EPS) & (rv >= nv[i] - _EPS)
+                if not feasible.any():
+                    break
+                j = int(np.where(feasible, rw + rv, np.inf).argmin())
+                rw[j] -= nw[i]
+                rv[j] -= nv[i]
+                moves.append((i, j))
+            if len(moves) == len(members[t]):
+                for i, j in moves:
+                    assignment[i] = j
+                    members[j].append(i)
+                members[t] = []
+                improved = True
+            else:
+                for i, j in moves:
+                    rw[j] += nw[i]
+                    rv[j] += nv[i]
+                alive[t] = True
+
+    renumbered = np.full(len(assignment), -1, dtype=np.int64)
+    renumbered[packed] = np.unique(assignment[packed], return_inverse=True)[1]
+    return renumbered
+
+
+def load_freight_units(session: Session) -> pd.DataFrame:
+    """
+    Freight units with the order (and so the vehicle type) currently carrying them:
+    unit_id, weight_kg, volume, distance_km, planned_date, order_id, transport_type_id.
+    distance_km is the unit's direct distance; order_id / transport_type_id are -1
+    for units not on any order.
+    """
+    units = pd.DataFrame(
+        session.query(
+            FreightUnit.unit_id,
+            FreightUnit.weight,
+            FreightUnit.volume,
+            FreightUnit.direct_distance,
+            FreightUnit.planned_date,
+        ).all(),
+        columns=["unit_id", "weight_kg", "volume", "distance_km", "planned_date"],
+    )
+    carriers = pd.DataFrame(
+        session.query(FreightOrderItem.unit_id, FreightOrderItem.order_id, FreightOrder.vehicle_id)
+        .join(FreightOrder, FreightOrder.order_id == FreightOrderItem.order_id)
+        .all(),
+        columns=["unit_id", "order_id", "vehicle_id"],
+    ).drop_duplicates("unit_id")
+
+    df = units.merge(carriers, on="unit_id", how="left")
+    ref = get_reference_data(session)
+    vehicle_ids = df["vehicle_id"].fillna(-1).to_numpy(dtype=np.int64)
+    df["transport_type_id"] = ref.vehicle_type_ids_for(vehicle_ids)
+    df["order_id"] = df["order_id"].fillna(-1).astype(np.int64)
+    for col in ("weight_kg", "volume", "distance_km"):
+        df[col] = df[col].astype(float)
+    return df.drop(columns="vehicle_id")
+
+
+def _trip_co2(
+    ref: ReferenceData, type_pos: np.ndarray, weight: np.ndarray, distance: np.ndarray
+) -> np.ndarray:
+    capacity = ref.capacity_kg[type_pos]
+    load_ratio = np.divide(weight, capacity, out=np.zeros(len(weight)), where=capacity > 0)
+    return compute_stage_co2(
+        distance, load_ratio, ref.co2_empty_kg_km[type_pos], ref.co2_loaded_kg_km[type_pos]
+    )
+
+
+def _lowest_emission_types(
+    ref: ReferenceData, weight: np.ndarray, volume: np.ndarray, distance: np.ndarray
+) -> np.ndarray:
+    """Position (in ref arrays) of the fitting type with the least CO2 for each trip."""
+    cap_w = ref.capacity_kg[None, :]
+    cap_v = np.where(np.isnan(ref.capacity_volume), np.inf, ref.capacity_volume)[None, :]
+    fits = (weight[:, None] <= cap_w + _EPS) & (volume[:, None] <= cap_v + _EPS)
+    load_ratio = np.divide(
+        weight[:, None], cap_w, out=np.zeros(fits.shape), where=cap_w > 0
+    )
+    co2 = compute_stage_co2(
+        distance[:, None], load_ratio, ref.co2_empty_kg_km[None, :], ref.co2_loaded_kg_km[None, :]
+    )
+    co2 = np.where(fits & ~np.isnan(co2), co2, np.inf)
+    return co2.argmin(axis=1)
+
+
+def plan_consolidation(
+    units: pd.DataFrame,
+    ref: ReferenceData,
+    transport_type: Optional[str] = None,
+    strategy: str = "best_fit",
+    time_budget_s: float = 10.0,
+    local_search: bool = True,
+) -> ConsolidationPlan:
+    """
+    Pack units (columns of load_freight_units) into trips of `transport_type` (default:
+    the largest type by capacity_kg), separately per planned_date, then right-size
+    each trip to its lowest-emission fitting type.
+
+    Trip distance is the longest direct distance among its units; the baseline costs
+    each current order the same way with its actual vehicle type (units without an
+    order count as one trip each), so the CO2 delta compares like with like. Units
+    too large for a single vehicle are left out of both. Local search uses whatever
+    is left of time_budget_s after the greedy packing.
+    """
+    started = time.monotonic()
+    deadline = started + time_budget_s
+    with_attrs = ~np.isnan(ref.capacity_kg) & (ref.capacity_kg > 0)
+    if not with_attrs.any():
+        raise ValueError("No transport type has capacity attributes")
+    if transport_type is None:
+        pack_pos = int(np.nanargmax(np.where(with_attrs, ref.capacity_kg, -np.inf)))
+    else:
+        tt_id = ref.type_name_to_id.get(transport_type.strip())
+        pack_pos = int(ref.type_positions(np.array([tt_id if tt_id is not None else -1]))[0])
+        if pack_pos < 0 or not with_attrs[pack_pos]:
+            raise ValueError(f"Unknown transport type or no capacity: {transport_type}")
+    capacity_kg = float(ref.capacity_kg[pack_pos])
+    capacity_volume = ref.capacity_volume[pack_pos]
+    capacity_volume = None if np.isnan(capacity_volume) else float(capacity_volume)
+
+    df = units.reset_index(drop=True)
+    weight = np.nan_to_num(df["weight_kg"].to_numpy(dtype=np.float64))
+    volume = np.nan_to_num(df["volume"].to_numpy(dtype=np.float64))
+    distance = np.nan_to_num(df["distance_km"].to_numpy(dtype=np.float64))
+
+    day_codes, days = pd.factorize(df["planned_date"], use_na_sentinel=False)
+    groups = [np.flatnonzero(day_codes == d) for d in range(len(days))]
+    trip_of = np.full(len(df), -1, dtype=np.int64)
+    offset = 0
+    for k, idx in enumerate(groups):
+        group_deadline = None
+        if local_search:
+            # Share the remaining budget evenly across the days still to pack.
+            remaining = max(deadline - time.monotonic(), 0.0)
+            group_deadline = time.monotonic() + remaining / (len(groups) - k)
+        assignment = pack_units(
+            weight[idx], volume[idx], capacity_kg, capacity_volume, strategy, group_deadline
+        )
+        packed = assignment >= 0
+        trip_of[idx[packed]] = assignment[packed] + offset
+        offset += int(assignment.max()) + 1 if packed.any() else 0
+
+    packed = trip_of >= 0
+    n_trips = offset
+    trip_weight = np.bincount(trip_of[packed], weights=weight[packed], minlength=n_trips)
+    trip_volume = np.bincount(trip_of[packed], weights=volume[packed], minlength=n_trips)
+    trip_distance = np.zeros(n_trips)
+    np.maximum.at(trip_distance, trip_of[packed], distance[packed])
+    trip_units = np.bincount(trip_of[packed], minlength=n_trips)
+    trip_day = np.zeros(n_trips, dtype=np.int64)
+    trip_day[trip_of[packed]] = day_codes[packed]
+
+    type_pos = _lowest_emission_types(ref, trip_weight, trip_volume, trip_distance)
+    trip_co2 = _trip_co2(ref, type_pos, trip_weight, trip_distance)
+    name_by_id = {tt_id: name for name, tt_id in ref.type_name_to_id.items()}
+    type_names = np.array([name_by_id[t] for t in ref.type_ids.tolist()], dtype=object)
+    trips = pd.DataFrame({
+        "trip_id": np.arange(n_trips),
+        "planned_date": np.asarray(days, dtype=object)[trip_day],
+        "transport_type": type_names[type_pos],
+        "n_units": trip_units,
+        "weight_kg": trip_weight,
+        "volume": trip_volume,
+        "capacity_kg": ref.capacity_kg[type_pos],
+        "load_ratio": trip_weight / ref.capacity_kg[type_pos],
+        "distance_km": trip_distance,
+        "co2_kg": trip_co2,
+    })
+
+    # Baseline: the current orders, costed with the same model and distance proxy.
+    base = df[packed].assign(weight_kg=weight[packed], distance_km=distance[packed])
+    current_pos = ref.type_positions(base["transport_type_id"].to_numpy(dtype=np.int64))
+    known = (base["order_id"].to_numpy() >= 0) & (current_pos >= 0)
+    known[known] &= with_attrs[current_pos[known]]
+    on_orders = (
+        base[known]
+        .assign(type_pos=current_pos[known])
+        .groupby("order_id")
+        .agg(weight_kg=("weight_kg", "sum"), distance_km=("distance_km", "max"), type_pos=("type_pos", "first"))
+    )
+    loose = base[~known]
+    baseline_co2 = float(
+        _trip_co2(
+            ref,
+            on_orders["type_pos"].to_numpy(dtype=np.int64),
+            on_orders["weight_kg"].to_numpy(),
+            on_orders["distance_km"].to_numpy(),
+        ).sum()
+        + _trip_co2(
+            ref,
+            np.full(len(loose), pack_pos),
+            loose["weight_kg"].to_numpy(),
+            loose["distance_km"].to_numpy(),
+        ).sum()
+    )
+    consolidated_co2 = float(trip_co2.sum())
+
+    plan = ConsolidationPlan(
+        assignments=pd.DataFrame({
+            "unit_id": df["unit_id"].to_numpy()[packed],
+            "trip_id": trip_of[packed],
+        }),
+        trips=trips,
+        unpacked_unit_ids=[int(u) for u in df["unit_id"].to_numpy()[~packed]],
+        baseline_trips=len(on_orders) + len(loose),
+        consolidated_trips=n_trips,
+        baseline_co2_kg=baseline_co2,
+        consolidated_co2_kg=consolidated_co2,
+        co2_delta_kg=consolidated_co2 - baseline_co2,
+        elapsed_s=time.monotonic() - started,
+    )
+    logger.info(
+        "Consolidated %d units into %d trips (baseline %d), CO2 %.1f -> %.1f kg in %.2f s",
+        int(packed.sum()), plan.consolidated_trips, plan.baseline_trips,
+        baseline_co2, consolidated_co2, plan.elapsed_s,
+    )
+    return plan
+
+
+def consolidate_freight_units(session: Session, **kwargs) -> ConsolidationPlan:
+    """plan_consolidation over all freight units in the database."""
+    return plan_consolidation(load_freight_units(session), get_reference_data(session), **kwargs)
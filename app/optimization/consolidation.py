@@ -1,11 +1,30 @@
 import logging
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+from sklearn.neighbors import BallTree
+from sqlalchemy.orm import Session
+
+from app.database.models import Address, FreightOrder, FreightOrderStop
+from app.database.reference_data import get_reference_data
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371.0088
+
+PAIR_COLUMNS = ["order_id_a", "order_id_b", "avg_load_ratio", "combined_distance_km"]
+SPATIAL_PAIR_COLUMNS = [
+    "order_id_a",
+    "order_id_b",
+    "origin_distance_km",
+    "destination_distance_km",
+    "combined_weight_kg",
+    "capacity_kg",
+    "combined_load_ratio",
+]
+
 
 @dataclass
 class ConsolidationCandidate:
@@ -14,23 +33,31 @@ class ConsolidationCandidate:
     combined_distance_km: float
 
 
-def detect_low_load_consolidation(
+def consolidation_pairs(
     df_stages: pd.DataFrame,
     load_threshold: float = 0.4,
-) -> List[ConsolidationCandidate]:
+    max_pairs_per_order: Optional[int] = 5,
+    max_distance_gap_km: Optional[float] = None,
+) -> pd.DataFrame:
     """
-    Heuristic: find pairs of low-load orders that share the same vehicle and
-    similar distance; suitable for potential consolidation.
+    Pairs of low-load orders on the same vehicle with similar distance, as a DataFrame
+    (order_id_a < order_id_b, avg_load_ratio, combined_distance_km) sorted by order ids.
+
+    Orders are sorted by (vehicle_id, distance_km) and paired with the orders of their
+    vehicle at most max_pairs_per_order positions away in that sweep, which covers
+    every order's max_pairs_per_order nearest neighbours by distance. Each order_id_a
+    then keeps at most max_pairs_per_order of those pairs, smallest distance gap first.
+    None pairs every order with all orders of its vehicle.
+    max_distance_gap_km additionally drops pairs whose distances differ by more.
     """
     if df_stages.empty:
-        return []
+        return pd.DataFrame(columns=PAIR_COLUMNS)
 
-    df = df_stages.copy()
-    df["load_ratio"] = df["load_ratio"].astype(float)
-    low = df[df["load_ratio"] < load_threshold]
+    load_ratio = df_stages["load_ratio"].astype(float)
+    low = df_stages[load_ratio < load_threshold].assign(load_ratio=load_ratio)
     if low.empty:
         logger.info("No low-load stages found for consolidation")
-        return []
+        return pd.DataFrame(columns=PAIR_COLUMNS)
 
     grouped = (
         low.groupby("order_id")
@@ -40,24 +67,228 @@ def detect_low_load_consolidation(
             vehicle_id=("vehicle_id", "first"),
         )
         .reset_index()
+        .dropna(subset=["vehicle_id"])  # unassigned orders share no vehicle to pair on
+        .sort_values(["vehicle_id", "distance_km", "order_id"], kind="stable")
     )
+    if grouped.empty:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    order_ids = grouped["order_id"].to_numpy(dtype=np.int64)
+    vehicles = grouped["vehicle_id"].to_numpy()
+    load = grouped["avg_load_ratio"].to_numpy(dtype=np.float64)
+    dist = grouped["distance_km"].to_numpy(dtype=np.float64)
 
-    candidates: List[ConsolidationCandidate] = []
-    for i in range(len(grouped)):
-        for j in range(i + 1, len(grouped)):
-            row_i = grouped.iloc[i]
-            row_j = grouped.iloc[j]
-            if row_i["vehicle_id"] != row_j["vehicle_id"]:
-                continue
-            avg_load = (row_i["avg_load_ratio"] + row_j["avg_load_ratio"]) / 2.0
-            combined_dist = float(row_i["distance_km"] + row_j["distance_km"])
-            candidates.append(
-                ConsolidationCandidate(
-                    order_ids=(int(row_i["order_id"]), int(row_j["order_id"])),
-                    avg_load_ratio=avg_load,
-                    combined_distance_km=combined_dist,
-                )
-            )
+    n = len(grouped)
+    largest_group = int(grouped.groupby("vehicle_id").size().max())
+    max_offset = largest_group - 1
+    if max_pairs_per_order is not None:
+        max_offset = min(max_offset, max_pairs_per_order)
+
+    # One vectorized comparison per sweep offset: row i against row i + offset.
+    firsts, seconds = [], []
+    for offset in range(1, max_offset + 1):
+        a = np.arange(n - offset)
+        b = a + offset
+        keep = vehicles[a] == vehicles[b]
+        if max_distance_gap_km is not None:
+            keep &= dist[b] - dist[a] <= max_distance_gap_km
+        firsts.append(a[keep])
+        seconds.append(b[keep])
+    if not firsts:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    a = np.concatenate(firsts)
+    b = np.concatenate(seconds)
+
+    ids_a, ids_b = order_ids[a], order_ids[b]
+    pairs = pd.DataFrame({
+        "order_id_a": np.minimum(ids_a, ids_b),
+        "order_id_b": np.maximum(ids_a, ids_b),
+        "avg_load_ratio": (load[a] + load[b]) / 2.0,
+        "combined_distance_km": dist[a] + dist[b],
+    })
+    if max_pairs_per_order is not None:
+        gap = np.abs(dist[b] - dist[a])
+        pairs = (
+            pairs.assign(_gap=gap)
+            .sort_values(["order_id_a", "_gap", "order_id_b"], kind="stable")
+            .groupby("order_id_a", sort=False)
+            .head(max_pairs_per_order)
+            .drop(columns="_gap")
+        )
+    return pairs.sort_values(["order_id_a", "order_id_b"], kind="stable").reset_index(drop=True)
+
+
+def detect_low_load_consolidation(
+    df_stages: pd.DataFrame,
+    load_threshold: float = 0.4,
+    max_pairs_per_order: Optional[int] = 5,
+    max_distance_gap_km: Optional[float] = None,
+) -> List[ConsolidationCandidate]:
+    """
+    Heuristic: find pairs of low-load orders that share the same vehicle and
+    similar distance; suitable for potential consolidation. See consolidation_pairs.
+    """
+    pairs = consolidation_pairs(df_stages, load_threshold, max_pairs_per_order, max_distance_gap_km)
+    candidates = [
+        ConsolidationCandidate(
+            order_ids=(int(order_a), int(order_b)),
+            avg_load_ratio=float(avg_load),
+            combined_distance_km=float(combined_dist),
+        )
+        for order_a, order_b, avg_load, combined_dist in pairs.itertuples(index=False)
+    ]
     logger.info("Detected %d low-load consolidation candidates", len(candidates))
     return candidates
 
+
+def load_order_endpoints(session: Session) -> pd.DataFrame:
+    """
+    One row per order with origin (first stop) and destination (last stop)
+    coordinates, time window, weight and the capacity of its vehicle's type:
+    order_id, origin_lat, origin_lon, dest_lat, dest_lon, window_start, window_end,
+    weight_kg, capacity_kg. Orders without a located stop are dropped. The window
+    spans the stops' arrival times, or the planned day when none are recorded.
+    """
+    stops = pd.DataFrame(
+        session.query(
+            FreightOrderStop.order_id,
+            FreightOrderStop.sequence_number,
+            FreightOrderStop.arrival_time,
+            Address.latitude,
+            Address.longitude,
+        )
+        .join(Address, Address.address_id == FreightOrderStop.address_id)
+        .filter(Address.latitude.isnot(None), Address.longitude.isnot(None))
+        .all(),
+        columns=["order_id", "sequence_number", "arrival_time", "lat", "lon"],
+    )
+    orders = pd.DataFrame(
+        session.query(
+            FreightOrder.order_id,
+            FreightOrder.vehicle_id,
+            FreightOrder.total_weight,
+            FreightOrder.planned_date,
+        ).all(),
+        columns=["order_id", "vehicle_id", "weight_kg", "planned_date"],
+    )
+    if stops.empty or orders.empty:
+        return pd.DataFrame(columns=[
+            "order_id", "origin_lat", "origin_lon", "dest_lat", "dest_lon",
+            "window_start", "window_end", "weight_kg", "capacity_kg",
+        ])
+
+    stops["arrival_time"] = pd.to_datetime(stops["arrival_time"])
+    by_order = stops.sort_values(["order_id", "sequence_number"]).groupby("order_id")
+    endpoints = pd.DataFrame({
+        "origin_lat": by_order["lat"].first(),
+        "origin_lon": by_order["lon"].first(),
+        "dest_lat": by_order["lat"].last(),
+        "dest_lon": by_order["lon"].last(),
+        "window_start": by_order["arrival_time"].min(),
+        "window_end": by_order["arrival_time"].max(),
+    }).reset_index()
+
+    ref = get_reference_data(session)
+    type_pos = ref.type_positions(
+        ref.vehicle_type_ids_for(orders["vehicle_id"].to_numpy(dtype=np.int64))
+    )
+    orders["capacity_kg"] = np.where(
+        type_pos >= 0, ref.capacity_kg[np.maximum(type_pos, 0)], np.nan
+    )
+
+    df = endpoints.merge(orders, on="order_id", how="inner")
+    day = pd.to_datetime(df["planned_date"])
+    no_times = df["window_start"].isna()
+    df.loc[no_times, "window_start"] = day[no_times]
+    df.loc[no_times, "window_end"] = day[no_times] + pd.Timedelta(days=1)
+    df["weight_kg"] = df["weight_kg"].astype(float)
+    return df.drop(columns=["vehicle_id", "planned_date"])
+
+
+def _haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def spatial_consolidation_pairs(
+    orders: pd.DataFrame,
+    load_threshold: float = 0.4,
+    radius_km: float = 25.0,
+    time_slack_min: float = 120.0,
+    max_pairs_per_order: int = 5,
+    candidates_per_order: int = 20,
+) -> pd.DataFrame:
+    """
+    Pairs of low-load orders (weight_kg / capacity_kg < load_threshold) whose origins
+    and destinations are both within radius_km of each other, whose time windows
+    overlap (allowing time_slack_min), and whose combined weight fits the larger of
+    the two vehicles' capacity. `orders` has the columns of load_order_endpoints.
+
+    Origins are indexed in a haversine BallTree; each order's candidates_per_order
+    nearest origins are checked, and each order_id_a keeps its max_pairs_per_order
+    closest matches (by origin + destination distance). Sorted by order ids,
+    order_id_a < order_id_b.
+    """
+    if orders.empty:
+        return pd.DataFrame(columns=SPATIAL_PAIR_COLUMNS)
+
+    weight = orders["weight_kg"].to_numpy(dtype=np.float64)
+    capacity = orders["capacity_kg"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        low = (capacity > 0) & (weight / capacity < load_threshold)
+    low &= orders[["origin_lat", "origin_lon", "dest_lat", "dest_lon"]].notna().all(axis=1).to_numpy()
+    df = orders[low].reset_index(drop=True)
+    if len(df) < 2:
+        return pd.DataFrame(columns=SPATIAL_PAIR_COLUMNS)
+
+    origin = np.radians(df[["origin_lat", "origin_lon"]].to_numpy(dtype=np.float64))
+    k = min(candidates_per_order + 1, len(df))  # +1: every order is its own nearest neighbour
+    dist_rad, neighbours = BallTree(origin, metric="haversine").query(origin, k=k)
+
+    a = np.repeat(np.arange(len(df)), k)
+    b = neighbours.ravel()
+    origin_km = dist_rad.ravel() * EARTH_RADIUS_KM
+    keep = (a != b) & (origin_km <= radius_km)
+    a, b, origin_km = a[keep], b[keep], origin_km[keep]
+
+    dest_lat = df["dest_lat"].to_numpy(dtype=np.float64)
+    dest_lon = df["dest_lon"].to_numpy(dtype=np.float64)
+    dest_km = _haversine_km(dest_lat[a], dest_lon[a], dest_lat[b], dest_lon[b])
+
+    weight = df["weight_kg"].to_numpy(dtype=np.float64)
+    capacity = df["capacity_kg"].to_numpy(dtype=np.float64)
+    combined_weight = weight[a] + weight[b]
+    pair_capacity = np.maximum(capacity[a], capacity[b])
+
+    slack = np.timedelta64(int(time_slack_min * 60), "s")
+    start = df["window_start"].to_numpy(dtype="datetime64[ns]")
+    end = df["window_end"].to_numpy(dtype="datetime64[ns]")
+    unknown = np.isnat(start[a]) | np.isnat(start[b])  # no window recorded: no constraint
+    overlap = (start[a] <= end[b] + slack) & (start[b] <= end[a] + slack)
+
+    keep = (dest_km <= radius_km) & (combined_weight <= pair_capacity) & (unknown | overlap)
+    pairs = pd.DataFrame({
+        "order_id_a": df["order_id"].to_numpy(dtype=np.int64)[a[keep]],
+        "order_id_b": df["order_id"].to_numpy(dtype=np.int64)[b[keep]],
+        "origin_distance_km": origin_km[keep],
+        "destination_distance_km": dest_km[keep],
+        "combined_weight_kg": combined_weight[keep],
+        "capacity_kg": pair_capacity[keep],
+    })
+    pairs["combined_load_ratio"] = pairs["combined_weight_kg"] / pairs["capacity_kg"]
+
+    # Each match was found from both ends; keep one row per unordered pair, then the
+    # max_pairs_per_order closest matches per order_id_a.
+    ids = pairs[["order_id_a", "order_id_b"]].to_numpy()
+    pairs = pairs.assign(order_id_a=ids.min(axis=1), order_id_b=ids.max(axis=1))
+    pairs = pairs.drop_duplicates(["order_id_a", "order_id_b"])
+    pairs = pairs.assign(_score=pairs["origin_distance_km"] + pairs["destination_distance_km"])
+    pairs = pairs.sort_values(["order_id_a", "_score", "order_id_b"], kind="stable")
+    pairs = pairs[pairs.groupby("order_id_a").cumcount() < max_pairs_per_order].drop(columns="_score")
+    logger.info("Detected %d spatial consolidation candidates", len(pairs))
+    return pairs.sort_values(["order_id_a", "order_id_b"]).reset_index(drop=True)
+
+
+def detect_spatial_consolidation(session: Session, **kwargs) -> pd.DataFrame:
+    """spatial_consolidation_pairs over all orders in the database."""
+    return spatial_consolidation_pairs(load_order_endpoints(session), **kwargs)
@@ -0,0 +1,304 @@
+"""
+Fleet-wide scenario engine: Monte-Carlo sweeps over vehicle substitution rates per
+transport type (e.g. "replace 0-60% of diesel trucks with e-trucks"), each scenario
+costed for CO2 and operating cost, reduced to the Pareto front of the two.
+
+Switching one vehicle changes only that vehicle's stages, so one pass over the
+memory-mapped stage array yields each vehicle's CO2 / cost delta per substitution;
+a scenario is then the baseline plus prefix sums of those deltas, which makes
+thousands of scenarios cost microseconds each.
+"""
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.analytics.cost_analysis import compute_stage_cost, stage_tariffs
+from app.analytics.fact_builder import compute_stage_co2, fact_version
+from app.database.models import TransportStageFact
+from app.database.reference_data import ReferenceData, get_reference_data
+
+logger = logging.getLogger(__name__)
+
+_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "ml_cache"
+
+STAGE_DTYPE = np.dtype([
+    ("vehicle_id", np.int64),
+    ("distance_km", np.float64),
+    ("duration_min", np.float64),
+    ("total_weight_kg", np.float64),
+    ("co2_kg", np.float64),
+])
+
+# Stage arrays smaller than this are reduced in-process.
+MIN_STAGES_FOR_POOL = 1_000_000
+
+
+@dataclass(frozen=True)
+class Substitution:
+    source_type: str    # TransportType.name currently in the fleet
+    target_type: str    # TransportType.name replacing it
+    max_rate: float = 1.0  # upper bound of the sampled share of source vehicles
+
+
+@dataclass
+class ScenarioPoint:
+    rates: Dict[str, float]    # source_type -> share of its vehicles substituted
+    vehicles_switched: int
+    co2_kg: float
+    cost: float
+
+
+@dataclass
+class ScenarioSweep:
+    baseline_co2_kg: float
+    baseline_cost: float
+    n_scenarios: int
+    pareto_front: List[ScenarioPoint]   # ascending CO2, descending cost
+
+
+def stage_array_path(session: Session, cache_dir: Optional[Path] = None) -> Path:
+    """
+    .npy of the fact table's stages (STAGE_DTYPE) for the current fact build,
+    written on first use; np.load(..., mmap_mode="r") shares its pages across workers.
+    """
+    version = fact_version(session)
+    cache_dir = Path(cache_dir or _CACHE_DIR)
+    safe_version = "".join(c if c.isalnum() else "_" for c in version)
+    path = cache_dir / f"scenario_stages_{safe_version}.npy"
+    if path.exists():
+        return path
+
+    rows = (
+        session.query(
+            TransportStageFact.vehicle_id,
+            TransportStageFact.distance_km,
+            TransportStageFact.duration_min,
+            TransportStageFact.total_weight_kg,
+            TransportStageFact.co2_kg,
+        )
+        .filter(TransportStageFact.vehicle_id.isnot(None))
+        .all()
+    )
+    stages = np.array(
+        [tuple(0.0 if v is None else v for v in row) for row in rows], dtype=STAGE_DTYPE
+    )
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Unique per writer and outside the scenario_stages_* pattern, so concurrent
+    # workers never write the same temp file or delete each other's.
+    with tempfile.NamedTemporaryFile(dir=cache_dir, prefix=".tmp_", suffix=".npy", delete=False) as tmp:
+        np.save(tmp, stages)
+    os.replace(tmp.name, path)
+    for stale in cache_dir.glob("scenario_stages_*.npy"):
+        if stale != path:
+            stale.unlink(missing_ok=True)  # open memory maps keep their pages
+    logger.info("Wrote %d stages to %s", len(stages), path)
+    return path
+
+
+def _trip_co2_cost(
+    distance: np.ndarray,
+    weight: np.ndarray,
+    cost: np.ndarray,
+    type_pos: np.ndarray,
+    capacity_kg: np.ndarray,
+    co2_empty_kg_km: np.ndarray,
+    co2_loaded_kg_km: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    CO2 and cost of stages run with the given types. Loads above capacity are split
+    into extra trips, each emitting at its share of the load and costing the stage cost.
+    """
+    cap = np.where(capacity_kg[type_pos] > 0, capacity_kg[type_pos], np.inf)
+    trips = np.maximum(np.ceil(weight / cap), 1.0)
+    co2 = trips * compute_stage_co2(
+        distance, weight / (cap * trips), co2_empty_kg_km[type_pos], co2_loaded_kg_km[type_pos]
+    )
+    return co2, trips * cost
+
+
+def _reduce_slice(
+    path: Path,
+    start: int,
+    end: int,
+    vehicle_ids: np.ndarray,
+    current_pos_by_vehicle: np.ndarray,
+    target_pos_by_vehicle: np.ndarray,
+    capacity_kg: np.ndarray,
+    co2_empty_kg_km: np.ndarray,
+    co2_loaded_kg_km: np.ndarray,
+    cost_per_km: np.ndarray,
+    driver_cost_per_min: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    """
+    Baseline CO2 / cost totals and per-vehicle (CO2 delta, cost delta) of switching,
+    for stages[start:end]. Stages whose current type has no attributes keep their
+    fact CO2 and a single trip. Stages are costed with the tariff of the type that
+    runs them (current or target).
+    """
+    stages = np.load(path, mmap_mode="r")[start:end]
+    n_vehicles = len(vehicle_ids)
+    distance = np.asarray(stages["distance_km"])
+    duration = np.asarray(stages["duration_min"])
+    weight = np.asarray(stages["total_weight_kg"])
+    co2 = np.array(stages["co2_kg"])
+    if n_vehicles == 0:
+        return np.zeros(0), np.zeros(0), float(co2.sum()), float(compute_stage_cost(distance, duration).sum())
+
+    at = np.searchsorted(vehicle_ids, stages["vehicle_id"]).clip(0, n_vehicles - 1)
+    known = vehicle_ids[at] == stages["vehicle_id"]
+    current = np.where(known, current_pos_by_vehicle[at], -1)
+    target = np.where(known, target_pos_by_vehicle[at], -1)
+    cost = compute_stage_cost(distance, duration, *stage_tariffs(cost_per_km, driver_cost_per_min, current))
+    attrs = np.ones(len(stages), dtype=bool)
+    attrs[current >= 0] = ~np.isnan(capacity_kg[current[current >= 0]])
+    modeled = (current >= 0) & attrs
+    base_cost = cost.copy()
+    co2[modeled], base_cost[modeled] = _trip_co2_cost(
+        distance[modeled], weight[modeled], cost[modeled], current[modeled],
+        capacity_kg, co2_empty_kg_km, co2_loaded_kg_km,
+    )
+
+    switched = target >= 0
+    target_cost = compute_stage_cost(
+        distance[switched], duration[switched],
+        *stage_tariffs(cost_per_km, driver_cost_per_min, target[switched]),
+    )
+    new_co2, new_cost = _trip_co2_cost(
+        distance[switched], weight[switched], target_cost, target[switched],
+        capacity_kg, co2_empty_kg_km, co2_loaded_kg_km,
+    )
+    idx = at[switched]
+    co2_delta = np.bincount(idx, weights=new_co2 - co2[switched], minlength=n_vehicles)
+    cost_delta = np.bincount(idx, weights=new_cost - base_cost[switched], minlength=n_vehicles)
+    return co2_delta, cost_delta, float(co2.sum()), float(base_cost.sum())
+
+
+def pareto_front(co2: np.ndarray, cost: np.ndarray) -> np.ndarray:
+    """Indices of non-dominated (co2, cost) points, both minimized, by ascending CO2."""
+    order = np.lexsort((cost, co2))
+    running_min = np.minimum.accumulate(cost[order])
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = cost[order][1:] < running_min[:-1]
+    return order[keep]
+
+
+def run_scenario_sweep(
+    stage_path: Path,
+    ref: ReferenceData,
+    substitutions: Sequence[Substitution],
+    n_scenarios: int = 1000,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+) -> ScenarioSweep:
+    """
+    Sample n_scenarios substitution-rate vectors (uniform in [0, max_rate] per
+    substitution, plus the all-zero and all-max corners) and return the CO2 / cost
+    Pareto front. Which vehicles of a type switch first is a fixed random order
+    (seeded), so scenarios differ only in their rates.
+    """
+    names = [s.source_type.strip() for s in substitutions]
+    if len(set(names)) != len(names):
+        raise ValueError("Each source_type may appear in only one substitution")
+
+    source_pos, target_pos = [], []
+    for s in substitutions:
+        src, dst = ref.type_name_to_id.get(s.source_type.strip()), ref.type_name_to_id.get(s.target_type.strip())
+        if src is None or dst is None:
+            raise ValueError(f"Unknown transport type in {s.source_type} -> {s.target_type}")
+        dst_pos = int(ref.type_positions(np.array([dst]))[0])
+        if np.isnan(ref.capacity_kg[dst_pos]):
+            raise ValueError(f"No vehicle attributes for {s.target_type}")
+        source_pos.append(int(ref.type_positions(np.array([src]))[0]))
+        target_pos.append(dst_pos)
+
+    # Target type position for every vehicle whose type is being substituted.
+    vehicle_type_pos = ref.type_positions(ref.vehicle_type_ids)
+    target_by_vehicle = np.full(len(ref.vehicle_ids), -1, dtype=np.int64)
+    for src, dst in zip(source_pos, target_pos):
+        target_by_vehicle[vehicle_type_pos == src] = dst
+
+    n_stages = len(np.load(stage_path, mmap_mode="r"))
+    workers = max_workers or os.cpu_count() or 1
+    args = (
+        ref.vehicle_ids, vehicle_type_pos, target_by_vehicle,
+        ref.capacity_kg, ref.co2_empty_kg_km, ref.co2_loaded_kg_km,
+        ref.cost_per_km, ref.driver_cost_per_min,
+    )
+    if workers <= 1 or n_stages < MIN_STAGES_FOR_POOL:
+        parts = [_reduce_slice(stage_path, 0, n_stages, *args)]
+    else:
+        bounds = np.linspace(0, n_stages, workers + 1).astype(int)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_reduce_slice, stage_path, int(a), int(b), *args)
+                for a, b in zip(bounds[:-1], bounds[1:])
+            ]
+            parts = [f.result() for f in futures]
+    co2_delta = sum(p[0] for p in parts)
+    cost_delta = sum(p[1] for p in parts)
+    base_co2 = float(sum(p[2] for p in parts))
+    base_cost = float(sum(p[3] for p in parts))
+
+    rng = np.random.default_rng(seed)
+    max_rates = np.array([min(max(s.max_rate, 0.0), 1.0) for s in substitutions])
+    rates = rng.uniform(0.0, 1.0, (n_scenarios, len(substitutions))) * max_rates
+    rates = np.vstack([np.zeros(len(substitutions)), max_rates, rates])
+
+    co2 = np.full(len(rates), base_co2)
+    cost = np.full(len(rates), base_cost)
+    switched = np.zeros(len(rates), dtype=np.int64)
+    for k, src in enumerate(source_pos):
+        vehicles = np.flatnonzero(vehicle_type_pos == src)
+        vehicles = vehicles[rng.permutation(len(vehicles))]
+        # Prefix sums: the delta of switching the first m vehicles of this type.
+        cum_co2 = np.concatenate([[0.0], np.cumsum(co2_delta[vehicles])])
+        cum_cost = np.concatenate([[0.0], np.cumsum(cost_delta[vehicles])])
+        m = np.rint(rates[:, k] * len(vehicles)).astype(np.int64)
+        co2 += cum_co2[m]
+        cost += cum_cost[m]
+        switched += m
+
+    front = pareto_front(co2, cost)
+    logger.info(
+        "Evaluated %d scenarios over %d stages: %d on the Pareto front",
+        len(rates), n_stages, len(front),
+    )
+    return ScenarioSweep(
+        baseline_co2_kg=base_co2,
+        baseline_cost=base_cost,
+        n_scenarios=len(rates),
+        pareto_front=[
+            ScenarioPoint(
+                rates={n: float(r) for n, r in zip(names, rates[i])},
+                vehicles_switched=int(switched[i]),
+                co2_kg=float(co2[i]),
+                cost=float(cost[i]),
+            )
+            for i in front
+        ],
+    )
+
+
+def sweep_fleet_scenarios(
+    session: Session,
+    substitutions: Sequence[Substitution],
+    n_scenarios: int = 1000,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+) -> ScenarioSweep:
+    """run_scenario_sweep over the current fact table and master data."""
+    return run_scenario_sweep(
+        stage_array_path(session),
+        get_reference_data(session),
+        substitutions,
+        n_scenarios=n_scenarios,
+        seed=seed,
+        max_workers=max_workers,
+    )
@@ -1,8 +1,46 @@
+"""
+Optimization scoring of transport stages: a weighted sum of load gap, distance and
+CO2, per stage or aggregated per order / vehicle / transport type. The kernel works
+on plain NumPy columns, which are loaded once per fact build; top-N selection uses
+argpartition instead of sorting every row. The same score can also be computed in
+the database so only the top rows are transferred.
+"""
 import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.analytics.fact_builder import fact_version
+from app.config import settings
+from app.database.models import TransportStageFact
 
 logger = logging.getLogger(__name__)
 
+CANDIDATE_COLUMNS = ["optimization_score", "order_id", "vehicle_id", "distance_km", "co2_kg", "load_ratio"]
+
+
+def score_kernel(
+    load_ratio: np.ndarray,
+    distance_km: np.ndarray,
+    co2_kg: np.ndarray,
+    low_load_weight: float,
+    distance_weight: float,
+    emission_weight: float,
+    target_load: float = 0.8,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(optimization_score, load_gap) for aligned float arrays."""
+    load_gap = np.maximum(target_load - load_ratio, 0.0)
+    score = low_load_weight * load_gap
+    score += distance_weight * distance_km
+    score += emission_weight * co2_kg
+    return score, load_gap
+
 
 def compute_optimization_score(
     df: pd.DataFrame,
@@ -14,16 +52,18 @@ def compute_optimization_score(
     if df.empty:
         return df
     work = df.copy()
-    load = work.get("load_ratio", 0.0).astype(float)
-    distance = work.get("distance_km", 0.0).astype(float)
-    co2 = work.get("co2_kg", 0.0).astype(float)
-    load_gap = (target_load - load).clip(lower=0.0)
-    work["load_gap"] = load_gap
-    work["optimization_score"] = (
-        low_load_weight * load_gap
-        + distance_weight * distance
-        + emission_weight * co2
+
+    def column(name: str) -> np.ndarray:
+        if name not in work.columns:
+            return np.zeros(len(work))
+        return work[name].to_numpy(dtype=np.float64)
+
+    score, load_gap = score_kernel(
+        column("load_ratio"), column("distance_km"), column("co2_kg"),
+        low_load_weight, distance_weight, emission_weight, target_load,
     )
+    work["load_gap"] = load_gap
+    work["optimization_score"] = score
     logger.info("Computed optimization scores for %d rows", len(work))
     return work
 
@@ -34,8 +74,223 @@ def rank_optimization_candidates(
 ) -> pd.DataFrame:
     if df_scored.empty:
         return df_scored
-    cols = ["optimization_score", "order_id", "vehicle_id", "distance_km", "co2_kg", "load_ratio"]
-    existing_cols = [c for c in cols if c in df_scored.columns]
-    ranked = df_scored.sort_values("optimization_score", ascending=False)
-    return ranked[existing_cols].head(top_n)
+    existing_cols = [c for c in CANDIDATE_COLUMNS if c in df_scored.columns]
+    idx = top_n_indices(df_scored["optimization_score"].to_numpy(), top_n)
+    return df_scored[existing_cols].iloc[idx]
+
+
+def top_n_indices(scores: np.ndarray, top_n: Optional[int]) -> np.ndarray:
+    """
+    Indices of the top_n highest scores, best first, without sorting the whole array.
+    Ties keep their original order (same result as a stable descending sort). NaN
+    ranks above every number, as it does in PostgreSQL's ORDER BY ... DESC.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    nan = np.isnan(scores)
+    if nan.any():
+        first, rest = np.flatnonzero(nan), np.flatnonzero(~nan)
+        n_rest = None if top_n is None else max(top_n - len(first), 0)
+        idx = np.concatenate([first, rest[top_n_indices(scores[rest], n_rest)]])
+        return idx if top_n is None else idx[: max(top_n, 0)]
+    if top_n is None or top_n >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if top_n <= 0:
+        return np.empty(0, dtype=np.int64)
+    cutoff = scores[np.argpartition(-scores, top_n - 1)[:top_n]].min()
+    above = np.flatnonzero(scores > cutoff)
+    ties = np.flatnonzero(scores == cutoff)[: top_n - len(above)]
+    idx = np.sort(np.concatenate([above, ties]))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+# Aggregation levels other than "stage": level -> grouping column of the output.
+LEVEL_KEYS = {"order": "order_id", "vehicle": "vehicle_id", "transport_type": "transport_type"}
+LEVELS = ["stage", *LEVEL_KEYS]
+
+
+def candidate_columns(level: str) -> List[str]:
+    if level == "stage":
+        return CANDIDATE_COLUMNS
+    if level not in LEVEL_KEYS:
+        raise ValueError(f"Unknown scoring level {level!r}; expected one of {LEVELS}")
+    return ["optimization_score", LEVEL_KEYS[level], "n_stages", "distance_km", "co2_kg", "load_ratio"]
+
+
+@dataclass(frozen=True)
+class LevelAggregates:
+    """Per-group totals: n_stages, summed distance / CO2 and mean stage load_ratio."""
+    keys: np.ndarray
+    n_stages: np.ndarray
+    distance_km: np.ndarray
+    co2_kg: np.ndarray
+    load_ratio: np.ndarray
 
+
+def _nullable_ids(ids: np.ndarray) -> pd.api.extensions.ExtensionArray:
+    return pd.array(np.where(ids < 0, None, ids), dtype="Int64")
+
+
+@dataclass(frozen=True)
+class ScoreInputs:
+    """
+    Stage fact columns used for scoring in stage id order, NULL measures as 0.0.
+    order_id / vehicle_id NULL is -1; transport_type holds codes into
+    transport_type_names, -1 for NULL.
+    """
+    version: str
+    order_id: np.ndarray
+    vehicle_id: np.ndarray
+    distance_km: np.ndarray
+    co2_kg: np.ndarray
+    load_ratio: np.ndarray
+    transport_type: np.ndarray
+    transport_type_names: List[str]
+    _aggregates: Dict[str, LevelAggregates] = field(default_factory=dict, compare=False, repr=False)
+
+    def aggregate(self, level: str) -> LevelAggregates:
+        """Grouped reductions for an aggregation level, computed once per snapshot."""
+        cached = self._aggregates.get(level)
+        if cached is not None:
+            return cached
+        candidate_columns(level)
+        column = {"order": self.order_id, "vehicle": self.vehicle_id, "transport_type": self.transport_type}[level]
+        known = column >= 0
+        keys, inverse, counts = np.unique(column[known], return_inverse=True, return_counts=True)
+        n = len(keys)
+        aggregates = LevelAggregates(
+            keys=keys,
+            n_stages=counts,
+            distance_km=np.bincount(inverse, weights=self.distance_km[known], minlength=n),
+            co2_kg=np.bincount(inverse, weights=self.co2_kg[known], minlength=n),
+            load_ratio=np.bincount(inverse, weights=self.load_ratio[known], minlength=n) / np.maximum(counts, 1),
+        )
+        self._aggregates[level] = aggregates
+        return aggregates
+
+    def top_candidates(self, weights: Dict[str, float], top_n: int = 20, level: str = "stage") -> pd.DataFrame:
+        """Top-scored rows of candidate_columns(level), highest score first."""
+        if level != "stage":
+            agg = self.aggregate(level)
+            score, _ = score_kernel(agg.load_ratio, agg.distance_km, agg.co2_kg, **weights)
+            idx = top_n_indices(score, top_n)
+            keys = agg.keys[idx]
+            if level == "transport_type":
+                keys = np.asarray(self.transport_type_names, dtype=object)[keys]
+            return pd.DataFrame({
+                "optimization_score": score[idx],
+                LEVEL_KEYS[level]: keys,
+                "n_stages": agg.n_stages[idx],
+                "distance_km": agg.distance_km[idx],
+                "co2_kg": agg.co2_kg[idx],
+                "load_ratio": agg.load_ratio[idx],
+            })
+
+        score, _ = score_kernel(self.load_ratio, self.distance_km, self.co2_kg, **weights)
+        idx = top_n_indices(score, top_n)
+        return pd.DataFrame({
+            "optimization_score": score[idx],
+            "order_id": _nullable_ids(self.order_id[idx]),
+            "vehicle_id": _nullable_ids(self.vehicle_id[idx]),
+            "distance_km": self.distance_km[idx],
+            "co2_kg": self.co2_kg[idx],
+            "load_ratio": self.load_ratio[idx],
+        })
+
+
+_inputs: Optional[ScoreInputs] = None
+_inputs_checked_at = float("-inf")
+_inputs_lock = threading.Lock()
+
+
+def get_score_inputs(session: Session, refresh: bool = False) -> ScoreInputs:
+    """
+    Scoring columns of transport_stage_fact, read from the database only when the fact
+    build changed since the last call (see fact_version). The version itself is
+    re-checked at most every settings.score_inputs_check_s seconds unless refresh.
+    """
+    global _inputs, _inputs_checked_at
+    now = time.monotonic()
+    cached = _inputs
+    if cached is not None and not refresh and now - _inputs_checked_at < settings.score_inputs_check_s:
+        return cached
+    with _inputs_lock:
+        version = fact_version(session)
+        _inputs_checked_at = now
+        if _inputs is not None and _inputs.version == version:
+            return _inputs
+        rows = session.query(
+            func.coalesce(TransportStageFact.order_id, -1),
+            func.coalesce(TransportStageFact.vehicle_id, -1),
+            func.coalesce(TransportStageFact.distance_km, 0.0),
+            func.coalesce(TransportStageFact.co2_kg, 0.0),
+            func.coalesce(TransportStageFact.load_ratio, 0.0),
+            TransportStageFact.transport_type,
+        ).order_by(TransportStageFact.id).all()  # ties rank by id, as in top_candidates_in_db
+        columns = list(zip(*rows)) if rows else [()] * 6
+        type_codes, type_names = pd.factorize(pd.Series(columns[5], dtype=object), sort=True)
+        _inputs = ScoreInputs(
+            version=version,
+            order_id=np.asarray(columns[0], dtype=np.int64),
+            vehicle_id=np.asarray(columns[1], dtype=np.int64),
+            distance_km=np.asarray(columns[2], dtype=np.float64),
+            co2_kg=np.asarray(columns[3], dtype=np.float64),
+            load_ratio=np.asarray(columns[4], dtype=np.float64),
+            transport_type=type_codes.astype(np.int64),
+            transport_type_names=[str(n) for n in type_names],
+        )
+        logger.info("Loaded %d stage rows for optimization scoring (facts %s)", len(rows), version)
+        return _inputs
+
+
+def _load_gap_sql(load, target_load: float):
+    return case((load < target_load, target_load - load), else_=0.0)
+
+
+def top_candidates_in_db(
+    session: Session,
+    low_load_weight: float,
+    distance_weight: float,
+    emission_weight: float,
+    target_load: float = 0.8,
+    top_n: int = 20,
+    level: str = "stage",
+) -> pd.DataFrame:
+    """
+    Same ranking as ScoreInputs.top_candidates, scored with ORDER BY ... LIMIT in SQL;
+    aggregation levels GROUP BY first, so the weights apply to group totals. Equal
+    scores rank by stage id, or by group key on aggregation levels.
+    """
+    columns = candidate_columns(level)
+    distance = func.coalesce(TransportStageFact.distance_km, 0.0)
+    co2 = func.coalesce(TransportStageFact.co2_kg, 0.0)
+    load = func.coalesce(TransportStageFact.load_ratio, 0.0)
+    if level == "stage":
+        score = (
+            low_load_weight * _load_gap_sql(load, target_load)
+            + distance_weight * distance
+            + emission_weight * co2
+        ).label("optimization_score")
+        query = session.query(
+            score, TransportStageFact.order_id, TransportStageFact.vehicle_id, distance, co2, load
+        ).order_by(score.desc(), TransportStageFact.id)
+    else:
+        key = getattr(TransportStageFact, LEVEL_KEYS[level])
+        total_distance, total_co2, avg_load = func.sum(distance), func.sum(co2), func.avg(load)
+        score = (
+            low_load_weight * _load_gap_sql(avg_load, target_load)
+            + distance_weight * total_distance
+            + emission_weight * total_co2
+        ).label("optimization_score")
+        query = (
+            session.query(score, key, func.count(), total_distance, total_co2, avg_load)
+            .filter(key.isnot(None))
+            .group_by(key)
+            .order_by(score.desc(), key)
+        )
+    df = pd.DataFrame(query.limit(top_n).all(), columns=columns)
+    measures = ["optimization_score", "distance_km", "co2_kg", "load_ratio"]
+    df[measures] = df[measures].astype(np.float64)  # Numeric columns arrive as Decimal
+    for key in ("order_id", "vehicle_id"):
+        if key in df.columns:
+            df[key] = df[key].astype("Int64")
+    return df
@@ -1,11 +1,13 @@
 import logging
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
+from sqlalchemy.orm import Session
 
-from app.database.models import VehicleAttributes, TransportType, Vehicle
-from app.database.connection import SessionLocal
+from app.analytics.fact_builder import compute_stage_co2
+from app.database.reference_data import ReferenceData, get_reference_data
 
 logger = logging.getLogger(__name__)
 
@@ -20,47 +22,26 @@ class ScenarioResult:
     load_ratio_improvement: float
 
 
-def _load_vehicle_attribute_map() -> Dict[int, VehicleAttributes]:
-    session = SessionLocal()
-    try:
-        rows = (
-            session.query(Vehicle.transport_type_id, VehicleAttributes)
-            .join(
-                VehicleAttributes,
-                Vehicle.transport_type_id == VehicleAttributes.transport_type_id,
-            )
-            .all()
-        )
-        return {int(tt_id): va for tt_id, va in rows}
-    finally:
-        session.close()
-
-
 def simulate_vehicle_change(
     df_stages: pd.DataFrame,
     new_transport_type_by_vehicle: Dict[int, str],
+    session: Optional[Session] = None,
+    reference: Optional[ReferenceData] = None,
 ) -> pd.DataFrame:
     """
     Simulate assigning different transport types (e.g. downsizing).
     new_transport_type_by_vehicle maps vehicle_id -> new TransportType.name.
+
+    Adds vehicle_capacity_kg_after, load_ratio_after and co2_kg_after (plus the
+    *_before copies). Stages of unmapped vehicles, or mapped to an unknown type or
+    one without attributes, keep their current values; a type whose capacity is
+    NULL is simulated with capacity 0. Master data comes from
+    `reference`, else the shared cache (loaded through `session` if given).
     """
     if df_stages.empty:
         return df_stages
 
-    session = SessionLocal()
-    try:
-        name_to_tt = {
-            name: tt_id
-            for tt_id, name in session.query(
-                TransportType.transport_type_id, TransportType.name
-            ).all()
-        }
-        va_by_tt = {
-            vt.transport_type_id: vt
-            for vt in session.query(VehicleAttributes).all()
-        }
-    finally:
-        session.close()
+    ref = reference if reference is not None else get_reference_data(session)
 
     df = df_stages.copy()
     df["vehicle_id"] = df["vehicle_id"].astype(int)
@@ -69,35 +50,45 @@ def simulate_vehicle_change(
     df["load_ratio_before"] = df["load_ratio"]
     df["co2_kg_before"] = df["co2_kg"]
 
-    new_vehicle_capacity = []
-    new_co2 = []
-    for _, row in df.iterrows():
-        vid = int(row["vehicle_id"])
-        tt_name = new_transport_type_by_vehicle.get(vid)
-        if not tt_name:
-            new_vehicle_capacity.append(row["vehicle_capacity_kg"])
-            new_co2.append(row["co2_kg"])
-            continue
-        tt_id = name_to_tt.get(tt_name)
-        va = va_by_tt.get(tt_id) if tt_id is not None else None
-        if not va:
-            new_vehicle_capacity.append(row["vehicle_capacity_kg"])
-            new_co2.append(row["co2_kg"])
-            continue
-        cap = float(va.capacity_kg or 0.0)
-        load_ratio = (
-            0.0 if cap <= 0 else float(row["total_weight_kg"]) / cap
-        )
-        co2_empty = float(va.co2_empty_kg_km or 0.0)
-        co2_loaded = float(va.co2_loaded_kg_km or 0.0)
-        co2 = float(row["distance_km"]) * (
-            co2_empty + load_ratio * (co2_loaded - co2_empty)
-        )
-        new_vehicle_capacity.append(cap)
-        new_co2.append(co2)
-
-    df["vehicle_capacity_kg_after"] = new_vehicle_capacity
-    df["co2_kg_after"] = new_co2
+    # vehicle -> new type position in the reference arrays, sorted for searchsorted.
+    mapped_vehicles = np.array(sorted(new_transport_type_by_vehicle), dtype=np.int64)
+    new_type_ids = np.array([
+        ref.type_name_to_id.get((new_transport_type_by_vehicle[v] or "").strip(), -1)
+        for v in mapped_vehicles.tolist()
+    ], dtype=np.int64)
+    new_type_pos = ref.type_positions(new_type_ids)
+
+    vehicle_ids = df["vehicle_id"].to_numpy(dtype=np.int64)
+    pos = np.full(len(df), -1, dtype=np.int64)
+    if len(mapped_vehicles):
+        at = np.searchsorted(mapped_vehicles, vehicle_ids).clip(0, len(mapped_vehicles) - 1)
+        pos = np.where(mapped_vehicles[at] == vehicle_ids, new_type_pos[at], -1)
+    changed = pos >= 0
+    # co2 rates are NaN only for types without a vehicle_attributes row; a NULL
+    # capacity on an existing row counts as 0 (empty load, empty-run emissions).
+    changed[changed] = ~np.isnan(ref.co2_empty_kg_km[pos[changed]])
+    idx = pos[changed]
+
+    capacity = np.nan_to_num(ref.capacity_kg[idx], nan=0.0)
+    weight = df["total_weight_kg"].to_numpy(dtype=np.float64)[changed]
+    load_ratio = np.divide(weight, capacity, out=np.zeros(len(idx)), where=capacity > 0)
+    co2 = compute_stage_co2(
+        df["distance_km"].to_numpy(dtype=np.float64)[changed],
+        load_ratio,
+        ref.co2_empty_kg_km[idx],
+        ref.co2_loaded_kg_km[idx],
+    )
+
+    capacity_after = df["vehicle_capacity_kg"].to_numpy(dtype=np.float64, copy=True)
+    load_ratio_after = df["load_ratio"].to_numpy(dtype=np.float64, copy=True)
+    co2_after = df["co2_kg"].to_numpy(dtype=np.float64, copy=True)
+    capacity_after[changed] = capacity
+    load_ratio_after[changed] = load_ratio
+    co2_after[changed] = co2
+
+    df["vehicle_capacity_kg_after"] = capacity_after
+    df["load_ratio_after"] = load_ratio_after
+    df["co2_kg_after"] = co2_after
     return df
 
 
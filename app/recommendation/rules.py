@@ -0,0 +1,230 @@
+"""
+Declarative recommendation rules. A rule set is a JSON (or YAML, if PyYAML is
+installed) document compiled once into conditions that evaluate as boolean masks
+over whole per-order columns.
+
+Condition syntax:
+    {"column": "distance_km", "op": ">=", "value": 200}
+    {"column": "emission_per_km", "op": ">=", "value": {"quantile": 0.85}}
+    {"all": [...]}, {"any": [...]}, {"not": {...}}
+"""
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("default_rules.json")
+
+# Per-order aggregates built by engine.generate_recommendations that rules may reference.
+ORDER_COLUMNS = ("predicted_co2", "predicted_load_ratio", "emission_per_km", "distance_km")
+
+_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+# Fired rules are tracked as one int64 bitmask per order.
+MAX_RULES = 63
+
+RESULT_COLUMNS = ["order_id", "priority_score", "recommendation", "estimated_co2_reduction"]
+
+
+@dataclass(frozen=True)
+class Comparison:
+    column: str
+    op: str
+    value: float
+    quantile: bool = False  # value is a quantile of the column, resolved per evaluation
+
+    def mask(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        values = columns[self.column]
+        threshold = np.nanquantile(values, self.value) if self.quantile else self.value
+        return _OPERATORS[self.op](values, threshold)
+
+
+@dataclass(frozen=True)
+class Compound:
+    kind: str  # "all", "any" or "not"
+    children: Tuple["Condition", ...]
+
+    def mask(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        masks = [c.mask(columns) for c in self.children]
+        if self.kind == "not":
+            return ~masks[0]
+        reduce = np.logical_and if self.kind == "all" else np.logical_or
+        return reduce.reduce(masks)
+
+
+Condition = Union[Comparison, Compound]
+
+
+def parse_condition(spec: Any, where: str = "condition") -> Condition:
+    """Compile a condition document; raises ValueError naming the offending part."""
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: expected an object, got {type(spec).__name__}")
+    for kind in ("all", "any"):
+        if kind in spec:
+            children = spec[kind]
+            if not isinstance(children, list) or not children:
+                raise ValueError(f"{where}: '{kind}' needs a non-empty list")
+            return Compound(kind, tuple(
+                parse_condition(c, f"{where}.{kind}[{i}]") for i, c in enumerate(children)
+            ))
+    if "not" in spec:
+        return Compound("not", (parse_condition(spec["not"], f"{where}.not"),))
+
+    column, op, value = spec.get("column"), spec.get("op"), spec.get("value")
+    if column not in ORDER_COLUMNS:
+        raise ValueError(f"{where}: unknown column {column!r}; expected one of {ORDER_COLUMNS}")
+    if op not in _OPERATORS:
+        raise ValueError(f"{where}: unknown op {op!r}; expected one of {tuple(_OPERATORS)}")
+    if isinstance(value, dict) and "quantile" in value:
+        q = float(value["quantile"])
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f"{where}: quantile must be within [0, 1]")
+        return Comparison(column, op, q, quantile=True)
+    try:
+        return Comparison(column, op, float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: value must be a number or {{'quantile': q}}") from None
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    label: str                 # recommendation text when the rule fires
+    when: Condition
+    co2_reduction: float       # fraction of predicted CO2 saved when the rule fires
+    priority: float            # points added to the priority score
+    priority_when: Condition   # when the points apply (defaults to `when`)
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    Priority = min(max_priority, sum of rule points + base_priority - rank * rank_decay),
+    where rank is the order's row position in the evaluated frame.
+    """
+    rules: Tuple[Rule, ...]
+    base_priority: float = 10.0
+    rank_decay: float = 0.5
+    max_priority: float = 100.0
+
+    def evaluate(self, by_order: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate every rule over by_order (order_id plus ORDER_COLUMNS) in one columnar
+        pass. Returns the orders that triggered at least one rule with order_id,
+        priority_score, recommendation and estimated_co2_reduction.
+        """
+        if by_order.empty or not self.rules:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        columns = {c: by_order[c].to_numpy(dtype=np.float64) for c in ORDER_COLUMNS}
+        n = len(by_order)
+        reduction = np.zeros(n)
+        priority = self.base_priority - np.arange(n, dtype=np.float64) * self.rank_decay
+        fired = np.zeros((n, len(self.rules)), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            fired[:, i] = rule.when.mask(columns)
+            reduction += rule.co2_reduction * fired[:, i]
+            points_mask = fired[:, i] if rule.priority_when is rule.when else rule.priority_when.mask(columns)
+            priority += rule.priority * points_mask
+        reduction *= columns["predicted_co2"]
+        priority = np.minimum(self.max_priority, priority)
+
+        flags = fired.astype(np.int64) @ (np.int64(1) << np.arange(len(self.rules), dtype=np.int64))
+        hit = flags > 0
+        # Text is built once per distinct combination of fired rules, not per order.
+        combos, inverse = np.unique(flags[hit], return_inverse=True)
+        labels = np.array([
+            "; ".join(r.label for bit, r in enumerate(self.rules) if combo & (1 << bit))
+            for combo in combos.tolist()
+        ], dtype=object)
+
+        return pd.DataFrame({
+            "order_id": by_order["order_id"].to_numpy()[hit].astype(np.int64),
+            "priority_score": np.round(priority[hit], 1),
+            "recommendation": labels[inverse],
+            "estimated_co2_reduction": np.round(reduction[hit], 2),
+        })
+
+
+def parse_rules(document: Dict[str, Any]) -> RuleSet:
+    """Compile a rule set document (already parsed from JSON/YAML)."""
+    specs = document.get("rules")
+    if not isinstance(specs, list):
+        raise ValueError("rule set needs a 'rules' list")
+    if len(specs) > MAX_RULES:
+        raise ValueError(f"at most {MAX_RULES} rules are supported, got {len(specs)}")
+    rules: List[Rule] = []
+    for i, spec in enumerate(specs):
+        name = spec.get("name") or f"rule_{i}"
+        if not spec.get("label"):
+            raise ValueError(f"rule {name!r}: 'label' is required")
+        when = parse_condition(spec.get("when"), f"{name}.when")
+        priority_when = (
+            parse_condition(spec["priority_when"], f"{name}.priority_when")
+            if "priority_when" in spec else when
+        )
+        rules.append(Rule(
+            name=name,
+            label=str(spec["label"]),
+            when=when,
+            co2_reduction=float(spec.get("co2_reduction", 0.0)),
+            priority=float(spec.get("priority", 0.0)),
+            priority_when=priority_when,
+        ))
+    return RuleSet(
+        rules=tuple(rules),
+        base_priority=float(document.get("base_priority", 10.0)),
+        rank_decay=float(document.get("rank_decay", 0.5)),
+        max_priority=float(document.get("max_priority", 100.0)),
+    )
+
+
+def load_rules(path: Path) -> RuleSet:
+    """Load and compile a .json, .yaml or .yml rule set file."""
+    raw = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"PyYAML is required to read {path}; install it or use JSON") from None
+        document = yaml.safe_load(raw)
+    else:
+        document = json.loads(raw)
+    return parse_rules(document)
+
+
+_cache: Dict[Path, Tuple[int, RuleSet]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_rules(path: Optional[Path] = None) -> RuleSet:
+    """
+    Rule set from `path`, settings.recommendation_rules_path or the bundled defaults.
+    Recompiled only when the file's mtime changes, so edits apply without a restart.
+    """
+    path = Path(path or settings.recommendation_rules_path or DEFAULT_RULES_PATH)
+    mtime = path.stat().st_mtime_ns
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        rules = load_rules(path)
+        _cache[path] = (mtime, rules)
+    logger.info("Loaded %d recommendation rules from %s", len(rules.rules), path)
+    return rules
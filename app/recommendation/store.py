@@ -0,0 +1,143 @@
+"""
+Materialized recommendations: generate_recommendations over the whole fact table is
+run once per fact build / model training and stored in the recommendations table,
+so the alerts API reads ranked rows instead of re-running feature extraction and
+ML inference on every request. Each build is logged in recommendation_builds, so
+readers can tell an empty build from none and detect rows that are out of date.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.analytics.fact_builder import fact_version
+from app.config import settings
+from app.database.models import Recommendation, RecommendationBuild
+from app.ml.inference import model_version
+from app.recommendation.engine import generate_recommendations
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+_current: Optional[Tuple[str, str]] = None
+_current_checked_at = float("-inf")
+_current_lock = threading.Lock()
+
+
+def alert_type_for(recommendation: str) -> str:
+    """Alert type shown in the UI: the first rule that fired."""
+    return recommendation.split(";")[0].strip() if recommendation else "optimization"
+
+
+def _clear_recommendations(session: Session) -> None:
+    # TRUNCATE ... RESTART IDENTITY is PostgreSQL; elsewhere ids keep counting up,
+    # which still preserves rank order within a build.
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("TRUNCATE recommendations RESTART IDENTITY"))
+    else:
+        session.execute(text("DELETE FROM recommendations"))
+
+
+def build_recommendation_table(
+    session: Session,
+    emission_model_path: Optional[Path] = None,
+    load_model_path: Optional[Path] = None,
+) -> int:
+    """
+    Rebuild the recommendations table from the current facts and models.
+    Rows are inserted in rank order, so recommendation_id breaks priority ties the
+    same way the live engine does. Caller commits. Returns inserted row count.
+    """
+    versions = (
+        model_version(emission_model_path, load_model_path),
+        fact_version(session),
+    )
+    recs = generate_recommendations(
+        session, emission_model_path, load_model_path, top_n=None
+    )
+    _clear_recommendations(session)
+    rows = [
+        {
+            "order_id": r["order_id"],
+            "alert_type": alert_type_for(r["recommendation"]),
+            "recommendation": r["recommendation"],
+            "estimated_co2_reduction": r["estimated_co2_reduction"],
+            "priority_score": r["priority_score"],
+            "model_version": versions[0],
+            "fact_version": versions[1],
+        }
+        for r in recs
+    ]
+    for i in range(0, len(rows), BATCH_SIZE):
+        session.bulk_insert_mappings(Recommendation, rows[i : i + BATCH_SIZE])
+    session.add(
+        RecommendationBuild(model_version=versions[0], fact_version=versions[1], row_count=len(rows))
+    )
+    session.flush()
+    invalidate_current_versions()
+    logger.info(
+        "Materialized %d recommendations (model %s, facts %s)", len(rows), *versions
+    )
+    return len(rows)
+
+
+def stored_versions(session: Session) -> Optional[Tuple[str, str]]:
+    """(model_version, fact_version) of the latest build, None if none ever ran."""
+    row = (
+        session.query(RecommendationBuild.model_version, RecommendationBuild.fact_version)
+        .order_by(RecommendationBuild.build_id.desc())
+        .first()
+    )
+    return (row[0], row[1]) if row else None
+
+
+def invalidate_current_versions() -> None:
+    """Force recommendations_stale to re-read the fact and model versions next call."""
+    global _current_checked_at
+    with _current_lock:
+        _current_checked_at = float("-inf")
+
+
+def recommendations_stale(session: Session, versions: Tuple[str, str], refresh: bool = False) -> bool:
+    """
+    True if stored `versions` differ from the current facts or models (or these are
+    missing). The current versions are re-read at most every
+    settings.recommendations_check_s seconds unless refresh.
+    """
+    global _current, _current_checked_at
+    now = time.monotonic()
+    current = _current
+    if current is None or refresh or now - _current_checked_at >= settings.recommendations_check_s:
+        with _current_lock:
+            try:
+                current = (model_version(), fact_version(session))
+            except FileNotFoundError:
+                current = None
+            _current, _current_checked_at = current, now
+    return current != versions
+
+
+def read_recommendations(
+    session: Session,
+    alert_type: Optional[str] = None,
+    min_priority: Optional[float] = None,
+    limit: int = 50,
+) -> List[Recommendation]:
+    """Highest-priority stored recommendations; served by the priority indexes."""
+    query = session.query(Recommendation)
+    if alert_type is not None:
+        query = query.filter(Recommendation.alert_type == alert_type)
+    if min_priority is not None:
+        query = query.filter(Recommendation.priority_score >= min_priority)
+    return (
+        query.order_by(
+            Recommendation.priority_score.desc(), Recommendation.recommendation_id
+        )
+        .limit(limit)
+        .all()
+    )
@@ -1,14 +1,12 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
 import pandas as pd
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.services.analytics_service import get_stage_facts
-from app.optimization.scoring import (
-    compute_optimization_score,
-    rank_optimization_candidates,
-)
+from app.optimization.scoring import get_score_inputs, top_candidates_in_db
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +22,25 @@ def get_kpi_candidates(
     session: Session,
     weights: Dict[str, float],
     top_n: int = 20,
+    in_database: Optional[bool] = None,
+    level: str = "stage",
 ) -> pd.DataFrame:
-    df = load_optimization_view(session)
-    if df.empty:
-        return df
-    df_scored = compute_optimization_score(df, **weights)
-    ranked = rank_optimization_candidates(df_scored, top_n=top_n)
-    logger.info("Selected top %d optimization candidates", len(ranked))
+    """
+    Top-scored stages, or orders / vehicles / transport types (level) ranked on their
+    aggregated distance, CO2 and mean load. Scores the cached fact columns in memory,
+    or with GROUP BY / ORDER BY ... LIMIT in the database
+    (settings.optimization_score_in_db) so only top_n rows are transferred.
+    """
+    if in_database is None:
+        in_database = settings.optimization_score_in_db
+    if in_database:
+        ranked = top_candidates_in_db(session, top_n=top_n, level=level, **weights)
+    else:
+        inputs = get_score_inputs(session)
+        if len(inputs.order_id) == 0:
+            logger.warning("No data in transport_stage_fact for optimization view")
+            return pd.DataFrame()
+        ranked = inputs.top_candidates(weights, top_n=top_n, level=level)
+    logger.info("Selected top %d optimization candidates (%s level)", len(ranked), level)
     return ranked
 
@@ -0,0 +1,4 @@
+"""
+Standalone performance benchmarks. Run from the project root, e.g.:
+    python -m benchmarks.bench_batched_inference
+"""
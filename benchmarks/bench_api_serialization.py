@@ -0,0 +1,122 @@
+"""
+API serialization (app.api.responses): one Pydantic model per row validated and
+dumped through the response_model, versus plain dicts and column arrays rendered by
+FastJSONResponse, for /api/orders and /api/routes/map payloads built from synthetic
+query rows.
+
+    python -m benchmarks.bench_api_serialization [--orders 100000] [--stops 4] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import time
+from typing import List
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from app.api.responses import FastJSONResponse, orjson
+from app.api.routes.orders import order_summary_payload
+from app.api.routes.routes import route_map_payload
+from app.api.schemas import OrderSummary, RouteMapOrder, RouteStop
+
+
+def synthetic_rows(n_orders: int, stops_per_order: int, seed: int = 0):
+    """(order summary rows, stop rows, load-ratio rows) shaped like the endpoint queries."""
+    rng = np.random.default_rng(seed)
+    order_ids = np.arange(1, n_orders + 1)
+    vehicle_ids = rng.integers(1, 5000, n_orders)
+    distance = rng.gamma(2.0, 60.0, n_orders)
+    co2 = distance * rng.uniform(0.2, 1.2, n_orders)
+    load = rng.beta(2.0, 3.0, n_orders)
+    summary_rows = [
+        (int(o), int(v), f"AB-{v:05d}", float(d), float(c), float(l))
+        for o, v, d, c, l in zip(order_ids, vehicle_ids, distance, co2, load)
+    ]
+    lat = rng.uniform(47.0, 55.0, n_orders * stops_per_order)
+    lon = rng.uniform(6.0, 15.0, n_orders * stops_per_order)
+    stop_rows = [
+        (int(order_ids[i // stops_per_order]), i % stops_per_order + 1, float(a), float(b))
+        for i, (a, b) in enumerate(zip(lat, lon))
+    ]
+    ratio_rows = [(int(o), float(l)) for o, l in zip(order_ids, load)]
+    return summary_rows, stop_rows, ratio_rows
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--stops", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    summary_rows, stop_rows, ratio_rows = synthetic_rows(args.orders, args.stops)
+    render = FastJSONResponse(None).render
+    summaries_adapter = TypeAdapter(List[OrderSummary])
+    map_adapter = TypeAdapter(List[RouteMapOrder])
+
+    def summaries_models() -> bytes:
+        # Previous path: an OrderSummary per row, re-validated by the response_model.
+        models = [
+            OrderSummary(
+                order_id=o, vehicle_id=v, license_plate=p,
+                distance_km=d, total_co2_kg=c, avg_load_ratio=l,
+            )
+            for o, v, p, d, c, l in summary_rows
+        ]
+        return summaries_adapter.dump_json(summaries_adapter.validate_python(models))
+
+    def map_models() -> bytes:
+        ratios = dict(ratio_rows)
+        orders = {}
+        for o, s, a, b in stop_rows:
+            orders.setdefault(o, []).append(RouteStop(sequence=s, lat=a, lon=b))
+        models = [
+            RouteMapOrder(order_id=o, avg_load_ratio=ratios.get(o, 0.0), stops=stops)
+            for o, stops in orders.items()
+        ]
+        return map_adapter.dump_json(map_adapter.validate_python(models))
+
+    cases = [
+        (
+            "/api/orders",
+            summaries_models,
+            lambda: render(order_summary_payload(summary_rows)),
+            lambda: render(order_summary_payload(summary_rows, columnar=True)),
+        ),
+        (
+            "/api/routes/map",
+            map_models,
+            lambda: render(route_map_payload(stop_rows, ratio_rows)),
+            lambda: render(route_map_payload(stop_rows, ratio_rows, columnar=True)),
+        ),
+    ]
+
+    print(f"{args.orders:,} orders, {args.stops} stops each, orjson {'on' if orjson else 'off (stdlib json)'}")
+    ok = True
+    for name, models, rows, columns in cases:
+        same = json.loads(models()) == json.loads(rows())
+        ok &= same
+        t_models = best_of(args.repeat, models)
+        t_rows = best_of(args.repeat, rows)
+        t_columns = best_of(args.repeat, columns)
+        print(name)
+        print(f"  models + response_model: {t_models * 1e3:8.1f} ms  {len(models()) / 1e6:6.1f} MB")
+        print(f"  dicts + FastJSONResponse: {t_rows * 1e3:8.1f} ms  ({t_models / t_rows:.1f}x)")
+        print(f"  columns:                  {t_columns * 1e3:8.1f} ms  ({t_models / t_columns:.1f}x)  "
+              f"{len(columns()) / 1e6:6.1f} MB")
+        print(f"  same document: {'OK' if same else 'FAIL'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
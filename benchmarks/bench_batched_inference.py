@@ -0,0 +1,67 @@
+"""
+Simulations/sec under concurrency: direct per-request inference.predict vs the
+micro-batching BatchPredictor. Uses the trained artifacts in models/ and synthetic
+order feature rows (no database needed).
+
+    python -m benchmarks.bench_batched_inference [--threads 16] [--requests 2000]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.ml.batching import BatchPredictor
+from app.ml.inference import predict
+
+
+def synthetic_simulation_frames(n: int, stages: int = 3, seed: int = 0) -> list[pd.DataFrame]:
+    """One frame per simulate call: current + alternative rows for an order."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n):
+        rows = 2 * stages
+        capacity = rng.choice([900.0, 3500.0, 7500.0, 24000.0], size=rows)
+        weight = rng.uniform(50.0, 8000.0, size=rows)
+        frames.append(pd.DataFrame({
+            "distance_km": rng.uniform(5.0, 600.0, size=rows),
+            "load_weight": weight,
+            "vehicle_capacity": capacity,
+            "load_ratio": np.clip(weight / capacity, 0.0, 2.0),
+            "emission_per_km": rng.uniform(0.0, 1.2, size=rows),
+            "vehicle_type_encoded": rng.integers(0, 8, size=rows),
+            "weekday": rng.integers(0, 7, size=rows),
+        }))
+    return frames
+
+
+def run(fn, frames: list[pd.DataFrame], threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fn, frames))
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    frames = synthetic_simulation_frames(args.requests)
+    predict(frames[0])  # load artifacts outside the timed region
+    predictor = BatchPredictor(window_ms=args.window_ms)
+
+    direct = run(predict, frames, args.threads)
+    batched = run(predictor.predict, frames, args.threads)
+    print(f"threads={args.threads} requests={args.requests}")
+    print(f"  direct predict : {direct:10.1f} simulations/s")
+    print(f"  batched predict: {batched:10.1f} simulations/s "
+          f"({predictor.batches} model calls, {predictor.requests / max(predictor.batches, 1):.1f} req/call)")
+    print(f"  speedup        : {batched / direct:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Bin-packing load consolidation (app.optimization.bin_packing) on synthetic freight
+units: packs 50k units against a small fleet and checks the plan is feasible, within
+the time budget, and how close it gets to the capacity lower bound.
+
+    python -m benchmarks.bench_bin_packing [--units 50000] [--days 20] [--budget-s 10]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.database.reference_data import ReferenceData, TypeAttributes
+from app.optimization.bin_packing import pack_units, plan_consolidation
+
+FLEET = [
+    # name, capacity_kg, capacity_volume, co2_empty_kg_km, co2_loaded_kg_km
+    ("Van", 1200.0, 12.0, 0.18, 0.26),
+    ("Rigid truck", 7500.0, 45.0, 0.55, 0.85),
+    ("Semi trailer", 24000.0, 90.0, 0.75, 1.20),
+]
+
+
+def synthetic_reference_data(fleet=FLEET) -> ReferenceData:
+    attrs = {
+        i + 1: TypeAttributes(i + 1, name, cap, vol, empty, loaded)
+        for i, (name, cap, vol, empty, loaded) in enumerate(fleet)
+    }
+    type_ids = np.array(sorted(attrs), dtype=np.int64)
+    names = sorted(a.name for a in attrs.values())
+    return ReferenceData(
+        version=("synthetic",),
+        type_names=names,
+        type_to_code={n: i for i, n in enumerate(names)},
+        type_name_to_id={a.name: t for t, a in attrs.items()},
+        attributes_by_type_id=attrs,
+        type_ids=type_ids,
+        capacity_kg=np.array([attrs[t].capacity_kg for t in type_ids]),
+        capacity_volume=np.array([attrs[t].capacity_volume for t in type_ids]),
+        co2_empty_kg_km=np.array([attrs[t].co2_empty_kg_km for t in type_ids]),
+        co2_loaded_kg_km=np.array([attrs[t].co2_loaded_kg_km for t in type_ids]),
+        cost_per_km=np.full(len(type_ids), np.nan),  # no tariffs: settings rates
+        driver_cost_per_min=np.full(len(type_ids), np.nan),
+        vehicle_ids=np.array([], dtype=np.int64),
+        vehicle_type_ids=np.array([], dtype=np.int64),
+    )
+
+
+def synthetic_units(n_units: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """Units currently shipped ~4 per order on rigid trucks; volume loosely tracks weight."""
+    rng = np.random.default_rng(seed)
+    weight = rng.lognormal(6.0, 1.0, n_units).clip(5.0, 20000.0)
+    return pd.DataFrame({
+        "unit_id": np.arange(1, n_units + 1),
+        "weight_kg": weight,
+        "volume": weight / rng.uniform(150.0, 400.0, n_units),
+        "distance_km": rng.gamma(2.0, 90.0, n_units),
+        "planned_date": pd.Timestamp("2026-01-05") + pd.to_timedelta(rng.integers(0, n_days, n_units), unit="D"),
+        "order_id": np.arange(n_units) // 4,
+        "transport_type_id": np.full(n_units, 2, dtype=np.int64),
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--units", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--budget-s", type=float, default=10.0)
+    args = parser.parse_args()
+
+    ref = synthetic_reference_data()
+    units = synthetic_units(args.units, args.days)
+    pack_cap_kg, pack_cap_vol = FLEET[-1][1], FLEET[-1][2]
+
+    results = {}
+    for strategy, local_search in (("first_fit", False), ("best_fit", False), ("best_fit", True)):
+        plan = plan_consolidation(
+            units, ref, strategy=strategy, time_budget_s=args.budget_s, local_search=local_search
+        )
+        results[(strategy, local_search)] = plan
+        label = f"{strategy}{' + local search' if local_search else ''}"
+        print(f"{label:<26} {plan.consolidated_trips:>6,} trips  CO2 {plan.consolidated_co2_kg:>12,.0f} kg "
+              f"(delta {plan.co2_delta_kg:>+12,.0f})  {plan.elapsed_s:6.2f} s")
+
+    plan = results[("best_fit", True)]
+    print(f"baseline (current orders)  {plan.baseline_trips:>6,} trips  CO2 {plan.baseline_co2_kg:>12,.0f} kg")
+
+    # Lower bound on trips of the packing type: per day, the larger normalized total.
+    packable = units[~units["unit_id"].isin(plan.unpacked_unit_ids)]
+    per_day = packable.groupby("planned_date")[["weight_kg", "volume"]].sum()
+    bound = int(np.ceil(np.maximum(per_day["weight_kg"] / pack_cap_kg, per_day["volume"] / pack_cap_vol)).sum())
+    print(f"capacity lower bound       {bound:>6,} trips of {FLEET[-1][0]}")
+
+    # Feasibility: every trip fits the type it was right-sized to, and every packable unit is placed once.
+    cap_vol = plan.trips["transport_type"].map({name: vol for name, _, vol, _, _ in FLEET})
+    feasible = bool(
+        (plan.trips["weight_kg"] <= plan.trips["capacity_kg"] + 1e-6).all()
+        and (plan.trips["volume"] <= cap_vol + 1e-6).all()
+        and plan.assignments["unit_id"].is_unique
+        and len(plan.assignments) + len(plan.unpacked_unit_ids) == len(units)
+    )
+    within_budget = plan.elapsed_s <= args.budget_s * 1.1
+    print(f"feasible: {'OK' if feasible else 'FAIL'}  within budget: {'OK' if within_budget else 'FAIL'}")
+
+    start = time.perf_counter()
+    day = units[units["planned_date"] == units["planned_date"].iloc[0]]
+    pack_units(day["weight_kg"].to_numpy(), day["volume"].to_numpy(), pack_cap_kg, pack_cap_vol)
+    print(f"single day greedy pack ({len(day):,} units): {(time.perf_counter() - start) * 1e3:.1f} ms")
+    sys.exit(0 if feasible and within_budget else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Parity and latency check for the compiled tree engine (app.ml.compiled) against
+sklearn's Pipeline.predict, using the trained artifacts in models/.
+
+Exits non-zero if predictions diverge or the /api/simulate-sized call (current +
+alternative rows of one order) misses the p99 latency target. Also sweeps batch sizes
+for the crossover where sklearn becomes faster (INFERENCE_COMPILED_MAX_ROWS).
+
+    python -m benchmarks.bench_compiled_forest [--rows 20000] [--target-p99-us 2000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ml.inference import EMISSION_MODEL_PATH, LOAD_MODEL_PATH, _load_artifact
+from app.ml.compiled import CompiledForest
+from benchmarks.bench_batched_inference import synthetic_simulation_frames
+
+
+def latency_us(fn, X: np.ndarray, repeat: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+
+CROSSOVER_SIZES = (64, 128, 256, 512, 1024, 2048, 3072, 4096, 8192)
+
+
+def crossover_rows(sklearn_predict, compiled_predict, X: np.ndarray, repeat: int = 5) -> int:
+    """Largest swept batch size at which the compiled engine is still faster (median)."""
+    best = 0
+    for n in CROSSOVER_SIZES:
+        if n > len(X):
+            break
+        sk, _ = latency_us(sklearn_predict, X[:n], repeat)
+        cp, _ = latency_us(compiled_predict, X[:n], repeat)
+        print(f"    {n:6d} rows: sklearn {sk / 1e3:7.2f} ms, compiled {cp / 1e3:7.2f} ms")
+        if cp < sk:
+            best = n
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--target-p99-us", type=float, default=2000.0)
+    args = parser.parse_args()
+
+    frame = pd.concat(synthetic_simulation_frames(args.rows // 6 + 1), ignore_index=True)
+    failed = False
+    for name, path in (("emission", EMISSION_MODEL_PATH), ("load", LOAD_MODEL_PATH)):
+        artifact = _load_artifact(path)
+        cols = artifact["feature_columns"]
+        X = frame[cols].to_numpy(dtype=np.float64)
+        compiled = CompiledForest.from_pipeline(artifact["model"])
+
+        start = time.perf_counter()
+        expected = artifact["model"].predict(pd.DataFrame(X, columns=cols))
+        sk_batch = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled.predict(X.astype(np.float32))
+        cp_batch = time.perf_counter() - start
+        got64 = compiled.predict(X)
+        max_err = float(np.max(np.abs(expected - got64)))
+        parity = np.allclose(expected, got64, rtol=1e-9, atol=1e-9)
+
+        sk_p50, sk_p99 = latency_us(
+            lambda x: artifact["model"].predict(pd.DataFrame(x, columns=cols)), X[:6], 30
+        )
+        row_p50, row_p99 = latency_us(compiled.predict, X[:1], args.repeat)
+        sim_p50, sim_p99 = latency_us(compiled.predict, X[:6], args.repeat)
+
+        print(f"{name} model: {len(compiled.roots)} trees, {len(compiled.value)} nodes, depth {compiled.max_depth}")
+        print(f"  parity vs sklearn on {len(X)} rows: max |diff| = {max_err:.3g} -> {'OK' if parity else 'FAIL'}")
+        print(f"  batch {len(X)} rows: sklearn {sk_batch * 1e3:8.1f} ms, compiled {cp_batch * 1e3:8.1f} ms")
+        print(f"  1 row  : compiled p50 {row_p50:8.0f} us  p99 {row_p99:8.0f} us")
+        print(f"  6 rows : compiled p50 {sim_p50:8.0f} us  p99 {sim_p99:8.0f} us "
+              f"(sklearn p50 {sk_p50:8.0f} us, target p99 <= {args.target_p99_us:.0f} us)")
+        print("  crossover:")
+        crossover = crossover_rows(
+            lambda x: artifact["model"].predict(pd.DataFrame(x, columns=cols)), compiled.predict, X
+        )
+        print(f"  compiled is faster up to ~{crossover} rows")
+        failed |= not parity or sim_p99 > args.target_p99_us
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
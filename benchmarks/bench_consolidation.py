@@ -0,0 +1,150 @@
+"""
+Consolidation detection on synthetic data:
+- per-vehicle: the sorted sweep (consolidation_pairs) vs the previous nested iloc
+  pair loop, which runs on a small subset to check the uncapped sweep finds exactly
+  the same pairs;
+- spatial: the BallTree search (spatial_consolidation_pairs) vs brute force over all
+  pairs on a subset, then timed on the full order count.
+
+    python -m benchmarks.bench_consolidation [--orders 100000] [--vehicles 500] [--legacy-orders 300]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.optimization.consolidation import (
+    _haversine_km,
+    consolidation_pairs,
+    detect_low_load_consolidation,
+    spatial_consolidation_pairs,
+)
+
+
+def synthetic_low_load_stages(n_orders: int, n_vehicles: int, seed: int = 0) -> pd.DataFrame:
+    """Two stages per order, all below the default load threshold."""
+    rng = np.random.default_rng(seed)
+    order_ids = np.repeat(np.arange(1, n_orders + 1), 2)
+    vehicles = np.repeat(rng.integers(1, n_vehicles + 1, n_orders), 2)
+    return pd.DataFrame({
+        "order_id": order_ids,
+        "vehicle_id": vehicles,
+        "load_ratio": rng.uniform(0.05, 0.39, len(order_ids)),
+        "distance_km": rng.gamma(2.0, 60.0, len(order_ids)),
+    })
+
+
+def legacy_pairs(df_stages: pd.DataFrame, load_threshold: float = 0.4) -> set:
+    """The pre-sweep implementation: every pair, grouped.iloc inside nested loops."""
+    df = df_stages.copy()
+    df["load_ratio"] = df["load_ratio"].astype(float)
+    low = df[df["load_ratio"] < load_threshold]
+    grouped = (
+        low.groupby("order_id")
+        .agg(
+            avg_load_ratio=("load_ratio", "mean"),
+            distance_km=("distance_km", "sum"),
+            vehicle_id=("vehicle_id", "first"),
+        )
+        .reset_index()
+    )
+    out = set()
+    for i in range(len(grouped)):
+        for j in range(i + 1, len(grouped)):
+            row_i = grouped.iloc[i]
+            row_j = grouped.iloc[j]
+            if row_i["vehicle_id"] != row_j["vehicle_id"]:
+                continue
+            out.add((int(row_i["order_id"]), int(row_j["order_id"])))
+    return out
+
+
+def synthetic_order_endpoints(n_orders: int, seed: int = 0) -> pd.DataFrame:
+    """Orders spread over Germany, same-day windows within one week, mixed capacities."""
+    rng = np.random.default_rng(seed)
+    origin_lat = rng.uniform(47.5, 54.5, n_orders)
+    origin_lon = rng.uniform(6.0, 14.5, n_orders)
+    start = np.datetime64("2026-01-05T06:00") + rng.integers(0, 7 * 24 * 60, n_orders).astype("timedelta64[m]")
+    return pd.DataFrame({
+        "order_id": np.arange(1, n_orders + 1),
+        "origin_lat": origin_lat,
+        "origin_lon": origin_lon,
+        "dest_lat": origin_lat + rng.normal(0.0, 0.5, n_orders),
+        "dest_lon": origin_lon + rng.normal(0.0, 0.7, n_orders),
+        "window_start": start,
+        "window_end": start + rng.integers(60, 600, n_orders).astype("timedelta64[m]"),
+        "weight_kg": rng.uniform(50.0, 3000.0, n_orders),
+        "capacity_kg": rng.choice([3500.0, 7500.0, 12000.0], n_orders),
+    })
+
+
+def brute_force_spatial_pairs(orders: pd.DataFrame, radius_km: float, slack_min: float) -> set:
+    """All-pairs reference for spatial_consolidation_pairs without the per-order caps."""
+    low = orders[orders["weight_kg"] / orders["capacity_kg"] < 0.4].reset_index(drop=True)
+    a, b = np.triu_indices(len(low), k=1)
+    col = {c: low[c].to_numpy() for c in low.columns}
+    slack = np.timedelta64(int(slack_min * 60), "s")
+    keep = (
+        (_haversine_km(col["origin_lat"][a], col["origin_lon"][a], col["origin_lat"][b], col["origin_lon"][b]) <= radius_km)
+        & (_haversine_km(col["dest_lat"][a], col["dest_lon"][a], col["dest_lat"][b], col["dest_lon"][b]) <= radius_km)
+        & (col["weight_kg"][a] + col["weight_kg"][b] <= np.maximum(col["capacity_kg"][a], col["capacity_kg"][b]))
+        & (col["window_start"][a] <= col["window_end"][b] + slack)
+        & (col["window_start"][b] <= col["window_end"][a] + slack)
+    )
+    ids = col["order_id"]
+    return {(int(min(x, y)), int(max(x, y))) for x, y in zip(ids[a[keep]], ids[b[keep]])}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--legacy-orders", type=int, default=300)
+    parser.add_argument("--max-pairs", type=int, default=5)
+    parser.add_argument("--spatial-check-orders", type=int, default=3000)
+    args = parser.parse_args()
+
+    subset = synthetic_low_load_stages(args.legacy_orders, max(args.legacy_orders // 20, 1))
+    start = time.perf_counter()
+    legacy = legacy_pairs(subset)
+    legacy_s = time.perf_counter() - start
+    swept = consolidation_pairs(subset, max_pairs_per_order=None)
+    identical = legacy == set(zip(swept["order_id_a"].tolist(), swept["order_id_b"].tolist()))
+    print(f"legacy pair loop ({args.legacy_orders:>7,} orders): {legacy_s:8.2f} s ({len(legacy):,} pairs)")
+    print(f"parity of uncapped sweep with legacy: {'OK' if identical else 'FAIL'}")
+
+    full = synthetic_low_load_stages(args.orders, args.vehicles)
+    start = time.perf_counter()
+    pairs = consolidation_pairs(full, max_pairs_per_order=args.max_pairs)
+    sweep_s = time.perf_counter() - start
+    start = time.perf_counter()
+    candidates = detect_low_load_consolidation(full, max_pairs_per_order=args.max_pairs)
+    objects_s = time.perf_counter() - start
+    print(f"sorted sweep     ({args.orders:>7,} orders): {sweep_s:8.3f} s "
+          f"({len(pairs):,} pairs, cap {args.max_pairs}/order)")
+    print(f"with ConsolidationCandidate objects:     {objects_s:8.3f} s ({len(candidates):,})")
+    legacy_full = legacy_s * (args.orders / args.legacy_orders) ** 2
+    print(f"legacy extrapolated to {args.orders:,} orders: ~{legacy_full / 3600:,.1f} h")
+
+    endpoints = synthetic_order_endpoints(args.spatial_check_orders)
+    expected = brute_force_spatial_pairs(endpoints, radius_km=60.0, slack_min=120.0)
+    found = spatial_consolidation_pairs(
+        endpoints, radius_km=60.0, max_pairs_per_order=len(endpoints),
+        candidates_per_order=len(endpoints),
+    )
+    spatial_ok = expected == set(zip(found["order_id_a"].tolist(), found["order_id_b"].tolist()))
+    print(f"spatial parity with brute force ({args.spatial_check_orders:,} orders, "
+          f"{len(expected):,} pairs): {'OK' if spatial_ok else 'FAIL'}")
+
+    endpoints = synthetic_order_endpoints(args.orders)
+    start = time.perf_counter()
+    spatial = spatial_consolidation_pairs(endpoints, max_pairs_per_order=args.max_pairs)
+    spatial_s = time.perf_counter() - start
+    print(f"spatial BallTree ({args.orders:>7,} orders): {spatial_s:8.3f} s ({len(spatial):,} pairs)")
+    sys.exit(0 if identical and spatial_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Stage fact export (app.analytics.export): all rows fetched, turned into dicts and
+rendered as JSON, then parsed back into pandas the way analysts consumed /api/orders,
+versus the streamed Arrow IPC / Parquet export read with pyarrow. Reports server-side
+time and peak Python heap, payload size and client-side load time, on synthetic facts
+in a scratch SQLite file (or --url).
+
+    python -m benchmarks.bench_export [--stages 500000] [--batch-size 65536]
+"""
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.analytics.export import export_stream, pa, pq
+from app.api.responses import FastJSONResponse
+from app.database.connection import Base
+from app.database.models import TransportStageFact
+from tests.fleet_data import populate
+
+COLUMNS = ["order_id", "vehicle_id", "distance_km", "load_ratio", "co2_kg"]
+
+
+def measured(fn):
+    """(seconds, peak traced Python heap in bytes, result); timed without tracing."""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--stages", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=65_536)
+    parser.add_argument("--url", help="database URL to use instead of a scratch SQLite file (tables are created)")
+    args = parser.parse_args()
+    if pa is None:
+        print("pyarrow is not installed")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.url or f"sqlite:///{Path(tmp) / 'export.db'}")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            populate(session, args.vehicles, args.stages)
+
+            def as_json() -> bytes:
+                # Previous route for analysts: every row materialized as a dict, one JSON document.
+                rows = session.query(*(getattr(TransportStageFact, c) for c in COLUMNS)).all()
+                return FastJSONResponse(None).render([dict(zip(COLUMNS, row)) for row in rows])
+
+            def streamed(fmt: str):
+                def run() -> bytes:
+                    out = io.BytesIO()
+                    for chunk in export_stream(session, "facts", fmt, columns=COLUMNS, batch_size=args.batch_size):
+                        out.write(chunk)  # stands in for the socket; only one batch is in flight
+                    return out.getvalue()
+                return run
+
+            results = {
+                "json": measured(as_json),
+                "arrow": measured(streamed("arrow")),
+                "parquet": measured(streamed("parquet")),
+            }
+        engine.dispose()
+
+    readers = {
+        "json": lambda b: pd.DataFrame(json.loads(b)),
+        "arrow": lambda b: pa.ipc.open_stream(b).read_all().to_pandas(),
+        "parquet": lambda b: pq.read_table(io.BytesIO(b)).to_pandas(),
+    }
+    frames = {}
+    print(f"{args.stages:,} stages, columns {', '.join(COLUMNS)} ({engine.dialect.name})")
+    for name, (elapsed, peak, payload) in results.items():
+        start = time.perf_counter()
+        frames[name] = readers[name](payload)
+        load = time.perf_counter() - start
+        print(f"{name:8s} server {elapsed * 1e3:8.1f} ms, peak heap {peak / 1e6:7.1f} MB, "
+              f"payload {len(payload) / 1e6:7.1f} MB, client load {load * 1e3:7.1f} ms")
+
+    expected = frames["json"]
+    ok = all(
+        len(frame) == len(expected)
+        and np.isclose(frame["co2_kg"].sum(), expected["co2_kg"].sum())
+        and frame["order_id"].sum() == expected["order_id"].sum()
+        for frame in frames.values()
+    )
+    print(f"same rows: {'OK' if ok else 'FAIL'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
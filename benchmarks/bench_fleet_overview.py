@@ -0,0 +1,58 @@
+"""
+Fleet overview latency (GET /api/fleet/overview): the previous three-query version
+(stage-level outer join + COUNT DISTINCT, EV count, full-table AVG) against the
+single round trip over per-vehicle pre-aggregates, on a synthetic fleet written to a
+scratch SQLite file (or --url, e.g. a disposable PostgreSQL database).
+
+    python -m benchmarks.bench_fleet_overview [--vehicles 2000] [--stages 500000] [--repeat 5]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.routes.fleet import get_fleet_overview
+from app.database.connection import Base
+from tests.fleet_data import legacy_fleet_overview, populate, same
+
+
+def best_of(repeat: int, fn):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--stages", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", help="database URL to use instead of a scratch SQLite file (tables are created)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.url or f"sqlite:///{Path(tmp) / 'fleet.db'}")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            populate(session, args.vehicles, args.stages)
+            t_legacy, legacy = best_of(args.repeat, lambda: legacy_fleet_overview(session))
+            t_single, single = best_of(args.repeat, lambda: get_fleet_overview(session))
+        engine.dispose()
+
+    ok = same(legacy, single)
+    print(f"{args.vehicles:,} vehicles, {args.stages:,} stages ({engine.dialect.name})")
+    print(f"three queries, stage-level join: {t_legacy * 1e3:8.1f} ms")
+    print(f"one round trip, per-vehicle agg: {t_single * 1e3:8.1f} ms  ({t_legacy / t_single:.1f}x)")
+    print(f"same overview: {'OK' if ok else 'FAIL'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
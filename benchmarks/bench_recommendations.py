@@ -0,0 +1,119 @@
+"""
+Recommendation rule evaluation over synthetic per-order aggregates: the vectorized
+engine (evaluate_rules + argpartition top-N) vs the previous iterrows implementation.
+The legacy loop runs on a subset (it is far too slow for 1M rows) and is used to
+check that both produce identical recommendations.
+
+    python -m benchmarks.bench_recommendations [--orders 1000000] [--legacy-orders 50000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.recommendation.engine import evaluate_rules, rank_recommendations
+
+# Thresholds of the legacy hard-coded rules (now app/recommendation/default_rules.json).
+LOAD_CONSOLIDATION_THRESHOLD = 0.40
+EMISSION_PER_KM_HIGH_PERCENTILE = 0.85
+LONG_DISTANCE_KM = 200.0
+LOW_LOAD_THRESHOLD = 0.35
+
+
+def synthetic_by_order(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "order_id": np.arange(1, n + 1),
+        "predicted_co2": rng.gamma(2.0, 60.0, n),
+        "predicted_load_ratio": rng.beta(2.0, 3.0, n),
+        "emission_per_km": rng.gamma(2.0, 0.2, n) * (rng.random(n) > 0.1),
+        "distance_km": rng.gamma(2.0, 80.0, n),
+    })
+
+
+def legacy_recommendations(by_order: pd.DataFrame, top_n: int) -> list:
+    """The pre-vectorization loop (iterrows, per-row Series for the priority)."""
+    def priority_score(row: pd.Series, rank: int) -> float:
+        score = 0.0
+        if row.get("predicted_load_ratio", 1) < LOAD_CONSOLIDATION_THRESHOLD:
+            score += 40.0
+        if row.get("emission_per_km", 0) > 0:
+            score += 25.0
+        if row.get("distance_km", 0) >= LONG_DISTANCE_KM and row.get("predicted_load_ratio", 0) < LOW_LOAD_THRESHOLD:
+            score += 35.0
+        return min(100.0, score + (10.0 - rank * 0.5))
+
+    recs = [
+        {k: float(row[k]) for k in ("predicted_co2", "predicted_load_ratio", "emission_per_km", "distance_km")}
+        | {"order_id": int(row["order_id"])}
+        for _, row in by_order.iterrows()
+    ]
+    emission_high = by_order["emission_per_km"].quantile(EMISSION_PER_KM_HIGH_PERCENTILE)
+    out = []
+    for rank, r in enumerate(recs):
+        plr, ekm, dist = r["predicted_load_ratio"], r["emission_per_km"], r["distance_km"]
+        reco, est = [], 0.0
+        if plr < LOAD_CONSOLIDATION_THRESHOLD:
+            reco.append("suggest consolidation")
+            est += r["predicted_co2"] * 0.15
+        if ekm >= emission_high:
+            reco.append("suggest vehicle replacement")
+            est += r["predicted_co2"] * 0.20
+        if dist >= LONG_DISTANCE_KM and plr < LOW_LOAD_THRESHOLD:
+            reco.append("suggest route merge")
+            est += r["predicted_co2"] * 0.10
+        if not reco:
+            continue
+        priority = priority_score(
+            pd.Series({"predicted_load_ratio": plr, "emission_per_km": ekm, "distance_km": dist}), rank
+        )
+        out.append({
+            "order_id": r["order_id"],
+            "priority_score": round(priority, 1),
+            "recommendation": "; ".join(reco),
+            "estimated_co2_reduction": round(est, 2),
+        })
+    out.sort(key=lambda x: float(x["priority_score"]), reverse=True)
+    return out[:top_n]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--legacy-orders", type=int, default=50_000)
+    parser.add_argument("--top-n", type=int, default=50)
+    args = parser.parse_args()
+
+    subset = synthetic_by_order(args.legacy_orders)
+    start = time.perf_counter()
+    legacy = legacy_recommendations(subset, args.top_n)
+    legacy_s = time.perf_counter() - start
+    vectorized = rank_recommendations(evaluate_rules(subset), args.top_n).to_dict("records")
+    identical = len(legacy) == len(vectorized) and all(
+        a["order_id"] == b["order_id"]
+        and a["recommendation"] == b["recommendation"]
+        and np.isclose(a["priority_score"], b["priority_score"])
+        and np.isclose(a["estimated_co2_reduction"], b["estimated_co2_reduction"])
+        for a, b in zip(legacy, vectorized)
+    )
+    print(f"legacy iterrows  ({args.legacy_orders:>9,} orders): {legacy_s:8.2f} s")
+    print(f"parity with legacy on subset: {'OK' if identical else 'FAIL'}")
+
+    full = synthetic_by_order(args.orders)
+    start = time.perf_counter()
+    recs = evaluate_rules(full)
+    rules_s = time.perf_counter() - start
+    start = time.perf_counter()
+    top = rank_recommendations(recs, args.top_n)
+    topn_s = time.perf_counter() - start
+    print(f"vectorized rules ({args.orders:>9,} orders): {rules_s:8.3f} s "
+          f"({len(recs):,} flagged), top-{args.top_n} {topn_s * 1e3:.1f} ms, "
+          f"{len(top)} returned")
+    print(f"legacy extrapolated to {args.orders:,} orders: ~{legacy_s * args.orders / args.legacy_orders:,.0f} s")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Stop re-sequencing (app.optimization.routing) on synthetic orders: checks the
+heuristic against brute force on small orders, then times thousands of orders
+in-process and across a process pool.
+
+    python -m benchmarks.bench_routing [--orders 5000] [--stops 12] [--workers 4]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+from app.optimization.routing import haversine_matrix, optimize_route, optimize_routes, route_length
+
+
+def synthetic_orders(n_orders: int, n_stops: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        (i, rng.uniform(47.5, 54.5, n_stops), rng.uniform(6.0, 14.5, n_stops))
+        for i in range(n_orders)
+    ]
+
+
+def optimality_gap(n_checks: int, n_stops: int) -> float:
+    """Mean excess over the brute-force optimum (fixed start and end)."""
+    gaps = []
+    for _, lat, lon in synthetic_orders(n_checks, n_stops, seed=1):
+        dist = haversine_matrix(lat, lon)
+        best = min(
+            route_length(np.array([0, *p, n_stops - 1]), dist)
+            for p in itertools.permutations(range(1, n_stops - 1))
+        )
+        gaps.append(optimize_route(lat, lon).optimized_km / best - 1.0)
+    return float(np.mean(gaps))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--stops", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    gap = optimality_gap(200, 8)
+    print(f"mean gap to optimum (200 orders, 8 stops): {gap:.3%}")
+
+    orders = synthetic_orders(args.orders, args.stops)
+    start = time.perf_counter()
+    serial = optimize_routes(orders, max_workers=1)
+    serial_s = time.perf_counter() - start
+    start = time.perf_counter()
+    pooled = optimize_routes(orders, max_workers=args.workers)
+    pooled_s = time.perf_counter() - start
+
+    original = sum(r.original_km for r in serial)
+    optimized = sum(r.optimized_km for r in serial)
+    same = all(np.array_equal(a.sequence, b.sequence) for a, b in zip(serial, pooled))
+    print(f"{args.orders:,} orders x {args.stops} stops: {original:,.0f} -> {optimized:,.0f} km "
+          f"({1 - optimized / original:.1%} saved)")
+    print(f"in-process: {serial_s:.2f} s, pool of {args.workers}: {pooled_s:.2f} s, "
+          f"results identical: {'OK' if same else 'FAIL'}")
+    sys.exit(0 if same and gap < 0.02 else 1)
+
+
+if __name__ == "__main__":
+    main()
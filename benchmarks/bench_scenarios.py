@@ -0,0 +1,117 @@
+"""
+Fleet scenario sweep (app.optimization.scenarios) over a synthetic memory-mapped
+stage array: checks the prefix-sum evaluation against recomputing every stage for a
+few scenarios, then times thousands of scenarios in-process and with a process pool.
+
+    python -m benchmarks.bench_scenarios [--stages 5000000] [--vehicles 5000] [--scenarios 10000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.database.reference_data import ReferenceData
+from app.optimization.scenarios import STAGE_DTYPE, Substitution, run_scenario_sweep
+from benchmarks.bench_bin_packing import FLEET, synthetic_reference_data
+
+# Battery-electric types: far lower CO2 per km but less payload, so switching a
+# well-loaded diesel vehicle adds trips (and cost).
+ELECTRIC = [
+    ("E-van", 900.0, 10.0, 0.03, 0.05),
+    ("E-truck", 16000.0, 70.0, 0.12, 0.20),
+]
+# Cheaper per km to run than the settings rate; other types have no tariff.
+ELECTRIC_COST_PER_KM = 1.1
+
+
+def synthetic_fleet(n_vehicles: int, seed: int = 0) -> ReferenceData:
+    ref = synthetic_reference_data(FLEET + ELECTRIC)
+    rng = np.random.default_rng(seed)
+    vehicle_ids = np.arange(1, n_vehicles + 1, dtype=np.int64)
+    cost_per_km = ref.cost_per_km.copy()
+    cost_per_km[len(FLEET):] = ELECTRIC_COST_PER_KM
+    return ReferenceData(**{
+        **ref.__dict__,
+        "cost_per_km": cost_per_km,
+        "vehicle_ids": vehicle_ids,
+        "vehicle_type_ids": rng.choice(np.arange(1, len(FLEET) + 1), n_vehicles),
+    })
+
+
+def write_stages(path: Path, n_stages: int, ref: ReferenceData, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    stages = np.lib.format.open_memmap(path, mode="w+", dtype=STAGE_DTYPE, shape=(n_stages,))
+    vehicles = rng.integers(1, len(ref.vehicle_ids) + 1, n_stages)
+    capacity = ref.capacity_kg[ref.type_positions(ref.vehicle_type_ids[vehicles - 1])]
+    stages["vehicle_id"] = vehicles
+    stages["distance_km"] = rng.gamma(2.0, 60.0, n_stages)
+    stages["duration_min"] = stages["distance_km"] * rng.uniform(0.8, 1.5, n_stages)
+    stages["total_weight_kg"] = capacity * rng.beta(2.0, 3.0, n_stages)
+    stages["co2_kg"] = 0.0  # recomputed from the current type by the sweep
+    stages.flush()
+    del stages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", type=int, default=5_000_000)
+    parser.add_argument("--vehicles", type=int, default=5000)
+    parser.add_argument("--scenarios", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    ref = synthetic_fleet(args.vehicles)
+    substitutions = [
+        Substitution("Semi trailer", "E-truck", 0.8),
+        Substitution("Van", "E-van", 1.0),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "stages.npy"
+        write_stages(path, args.stages, ref)
+
+        start = time.perf_counter()
+        serial = run_scenario_sweep(path, ref, substitutions, args.scenarios, max_workers=1)
+        serial_s = time.perf_counter() - start
+        start = time.perf_counter()
+        pooled = run_scenario_sweep(path, ref, substitutions, args.scenarios, max_workers=args.workers)
+        pooled_s = time.perf_counter() - start
+
+        same = len(serial.pareto_front) == len(pooled.pareto_front) and all(
+            np.isclose(a.co2_kg, b.co2_kg) and np.isclose(a.cost, b.cost)
+            for a, b in zip(serial.pareto_front, pooled.pareto_front)
+        )
+
+        # The all-max corner (every source vehicle switched) must equal a plain
+        # baseline of the fleet with those vehicles re-typed.
+        full = [Substitution(s.source_type, s.target_type, 1.0) for s in substitutions]
+        corners = run_scenario_sweep(path, ref, full, 0, max_workers=1)
+        retyped = ref.vehicle_type_ids.copy()
+        for s in full:
+            retyped[ref.vehicle_type_ids == ref.type_name_to_id[s.source_type]] = ref.type_name_to_id[s.target_type]
+        direct = run_scenario_sweep(
+            path, ReferenceData(**{**ref.__dict__, "vehicle_type_ids": retyped}), [], 0, max_workers=1
+        )
+        max_corner = [p for p in corners.pareto_front if all(r == 1.0 for r in p.rates.values())]
+        if max_corner:
+            corner_ok = bool(np.isclose(max_corner[0].co2_kg, direct.baseline_co2_kg)
+                             and np.isclose(max_corner[0].cost, direct.baseline_cost))
+        else:  # dominated by the baseline, so it must be no better on both axes
+            corner_ok = (direct.baseline_co2_kg >= corners.baseline_co2_kg
+                         and direct.baseline_cost >= corners.baseline_cost)
+
+    print(f"{args.stages:,} stages, {args.vehicles:,} vehicles, {serial.n_scenarios:,} scenarios")
+    print(f"in-process: {serial_s:6.2f} s   pool of {args.workers}: {pooled_s:6.2f} s   identical: {'OK' if same else 'FAIL'}")
+    print(f"all-substituted corner matches a full recompute: {'OK' if corner_ok else 'FAIL'}")
+    print(f"baseline {serial.baseline_co2_kg:,.0f} kg CO2, cost {serial.baseline_cost:,.0f}; "
+          f"Pareto front {len(serial.pareto_front)} points:")
+    for p in serial.pareto_front[:: max(len(serial.pareto_front) // 5, 1)]:
+        rates = ", ".join(f"{k} {v:.0%}" for k, v in p.rates.items())
+        print(f"  {p.co2_kg:14,.0f} kg  cost {p.cost:14,.0f}  [{rates}]")
+    sys.exit(0 if same and corner_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Optimization scoring (app.optimization.scoring): full-frame score + sort versus the
+NumPy kernel with argpartition top-N over cached columns, on synthetic stage facts;
+plus order-level ranking (grouped reductions) against a pandas groupby.
+
+    python -m benchmarks.bench_scoring [--rows 5000000] [--top-n 20] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.optimization.scoring import ScoreInputs, compute_optimization_score
+
+WEIGHTS = {"low_load_weight": 1.0, "distance_weight": 0.01, "emission_weight": 0.02}
+
+
+def synthetic_inputs(n_rows: int, seed: int = 0) -> ScoreInputs:
+    rng = np.random.default_rng(seed)
+    distance = rng.gamma(2.0, 60.0, n_rows)
+    return ScoreInputs(
+        version="synthetic",
+        order_id=np.arange(n_rows, dtype=np.int64) // 3,
+        vehicle_id=rng.integers(1, 5000, n_rows),
+        distance_km=distance,
+        co2_kg=distance * rng.uniform(0.2, 1.2, n_rows),
+        load_ratio=rng.beta(2.0, 3.0, n_rows),
+        transport_type=rng.integers(0, 3, n_rows),
+        transport_type_names=["Van", "Rigid truck", "Semi trailer"],
+    )
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    inputs = synthetic_inputs(args.rows)
+    df = pd.DataFrame({
+        "order_id": inputs.order_id,
+        "vehicle_id": inputs.vehicle_id,
+        "distance_km": inputs.distance_km,
+        "co2_kg": inputs.co2_kg,
+        "load_ratio": inputs.load_ratio,
+    })
+
+    def full_sort() -> pd.DataFrame:
+        # Previous path: copy and score the frame, then sort every row.
+        scored = compute_optimization_score(df, **WEIGHTS)
+        return scored.sort_values("optimization_score", ascending=False, kind="stable").head(args.top_n)
+
+    def kernel() -> pd.DataFrame:
+        return inputs.top_candidates(WEIGHTS, top_n=args.top_n)
+
+    expected, actual = full_sort(), kernel()
+    same = (
+        expected["order_id"].tolist() == actual["order_id"].tolist()
+        and np.allclose(expected["optimization_score"], actual["optimization_score"])
+    )
+    t_sort = best_of(args.repeat, full_sort)
+    t_kernel = best_of(args.repeat, kernel)
+    print(f"{args.rows:,} stages, top {args.top_n}")
+    print(f"frame score + full sort: {t_sort * 1e3:8.1f} ms")
+    print(f"kernel + argpartition:   {t_kernel * 1e3:8.1f} ms  ({t_sort / t_kernel:.1f}x)")
+    print(f"same top-N: {'OK' if same else 'FAIL'}")
+
+    def order_groupby() -> pd.DataFrame:
+        by_order = df.groupby("order_id").agg(
+            n_stages=("order_id", "size"), distance_km=("distance_km", "sum"),
+            co2_kg=("co2_kg", "sum"), load_ratio=("load_ratio", "mean"),
+        ).reset_index()
+        scored = compute_optimization_score(by_order, **WEIGHTS)
+        return scored.sort_values("optimization_score", ascending=False, kind="stable").head(args.top_n)
+
+    expected = order_groupby()
+    start = time.perf_counter()
+    actual = inputs.top_candidates(WEIGHTS, top_n=args.top_n, level="order")
+    t_first = time.perf_counter() - start
+    same_orders = (
+        expected["order_id"].tolist() == actual["order_id"].tolist()
+        and np.allclose(expected["optimization_score"], actual["optimization_score"])
+    )
+    t_groupby = best_of(args.repeat, order_groupby)
+    t_cached = best_of(args.repeat, lambda: inputs.top_candidates(WEIGHTS, top_n=args.top_n, level="order"))
+    print(f"order level, pandas groupby + sort: {t_groupby * 1e3:8.1f} ms")
+    print(f"order level, first call / cached:   {t_first * 1e3:8.1f} ms / {t_cached * 1e3:.1f} ms")
+    print(f"same top-N orders: {'OK' if same_orders else 'FAIL'}")
+    sys.exit(0 if same and same_orders else 1)
+
+
+if __name__ == "__main__":
+    main()
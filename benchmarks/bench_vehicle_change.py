@@ -0,0 +1,95 @@
+"""
+What-if vehicle type change (app.optimization.simulation.simulate_vehicle_change) on
+synthetic stage facts: the vectorized lookup vs the previous iterrows loop, which runs
+on a subset to check both produce the same capacities and CO2.
+
+    python -m benchmarks.bench_vehicle_change [--stages 5000000] [--legacy-stages 20000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.fact_builder import compute_stage_co2
+from app.optimization.simulation import compare_scenarios, simulate_vehicle_change
+from benchmarks.bench_bin_packing import FLEET, synthetic_reference_data
+
+
+def synthetic_stages(n_stages: int, n_vehicles: int = 2000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    capacity = rng.choice([cap for _, cap, _, _, _ in FLEET], n_stages)
+    weight = capacity * rng.beta(2.0, 3.0, n_stages)
+    distance = rng.gamma(2.0, 60.0, n_stages)
+    load_ratio = weight / capacity
+    return pd.DataFrame({
+        "order_id": np.arange(n_stages) // 3,
+        "vehicle_id": rng.integers(1, n_vehicles + 1, n_stages),
+        "distance_km": distance,
+        "total_weight_kg": weight,
+        "vehicle_capacity_kg": capacity,
+        "load_ratio": load_ratio,
+        "co2_kg": compute_stage_co2(distance, load_ratio, 0.55, 0.85),
+    })
+
+
+def legacy_simulate(df_stages: pd.DataFrame, mapping: dict, ref) -> pd.DataFrame:
+    """The pre-vectorization loop: iterrows with a per-row attribute lookup."""
+    df = df_stages.copy()
+    new_capacity, new_co2 = [], []
+    for _, row in df.iterrows():
+        tt_name = mapping.get(int(row["vehicle_id"]))
+        tt_id = ref.type_name_to_id.get(tt_name.strip()) if tt_name else None
+        va = ref.attributes_by_type_id.get(tt_id) if tt_id is not None else None
+        if not va:
+            new_capacity.append(row["vehicle_capacity_kg"])
+            new_co2.append(row["co2_kg"])
+            continue
+        cap = float(va.capacity_kg or 0.0)
+        load_ratio = 0.0 if cap <= 0 else float(row["total_weight_kg"]) / cap
+        new_capacity.append(cap)
+        new_co2.append(compute_stage_co2(
+            float(row["distance_km"]), load_ratio, va.co2_empty_kg_km, va.co2_loaded_kg_km
+        ))
+    df["vehicle_capacity_kg_after"] = new_capacity
+    df["co2_kg_after"] = new_co2
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", type=int, default=5_000_000)
+    parser.add_argument("--legacy-stages", type=int, default=20_000)
+    args = parser.parse_args()
+
+    ref = synthetic_reference_data()
+    rng = np.random.default_rng(1)
+    names = [name for name, _, _, _, _ in FLEET] + ["Unknown type"]
+    mapping = {int(v): str(rng.choice(names)) for v in rng.choice(np.arange(1, 2001), 800, replace=False)}
+
+    subset = synthetic_stages(args.legacy_stages)
+    start = time.perf_counter()
+    legacy = legacy_simulate(subset, mapping, ref)
+    legacy_s = time.perf_counter() - start
+    vectorized = simulate_vehicle_change(subset, mapping, reference=ref)
+    identical = bool(
+        np.allclose(legacy["vehicle_capacity_kg_after"], vectorized["vehicle_capacity_kg_after"])
+        and np.allclose(legacy["co2_kg_after"], vectorized["co2_kg_after"])
+    )
+    print(f"legacy iterrows ({args.legacy_stages:>9,} stages): {legacy_s:8.2f} s")
+    print(f"parity with legacy on subset: {'OK' if identical else 'FAIL'}")
+
+    full = synthetic_stages(args.stages)
+    start = time.perf_counter()
+    after = simulate_vehicle_change(full, mapping, reference=ref)
+    vector_s = time.perf_counter() - start
+    result = compare_scenarios(full, after)
+    print(f"vectorized      ({args.stages:>9,} stages): {vector_s:8.2f} s "
+          f"(CO2 saved {result.co2_saved:,.0f} kg, load {result.load_ratio_improvement:+.3f})")
+    print(f"legacy extrapolated to {args.stages:,} stages: ~{legacy_s * args.stages / args.legacy_stages:,.0f} s")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ from app.services.analytics_service import (
     get_order_summary,
 )
 from app.services.optimization_service import get_kpi_candidates
-from app.optimization.consolidation import detect_low_load_consolidation
+from app.optimization.scoring import LEVELS
+from app.optimization.consolidation import consolidation_pairs
 
 
 logging.basicConfig(
@@ -109,6 +110,7 @@ def main() -> None:
         emission_weight = weights_col3.number_input(
             "Emission weight", value=0.02, min_value=0.0
         )
+        level = st.selectbox("Rank by", LEVELS, format_func=lambda level_name: level_name.replace("_", " "))
 
         session = SessionLocal()
         try:
@@ -117,28 +119,20 @@ def main() -> None:
                 "distance_weight": distance_weight,
                 "emission_weight": emission_weight,
             }
-            df_top = get_kpi_candidates(session, weights, top_n=20)
+            df_top = get_kpi_candidates(session, weights, top_n=20, level=level)
         finally:
             session.close()
 
         if not df_top.empty:
-            st.markdown("**Top optimization candidates (by stage):**")
+            st.markdown(f"**Top optimization candidates (by {level.replace('_', ' ')}):**")
             st.dataframe(df_top)
 
         st.subheader("Low-load consolidation opportunities")
-        cons = detect_low_load_consolidation(df_facts)
+        cons = consolidation_pairs(df_facts)
         st.write(f"Detected {len(cons)} candidate order pairs.")
-        if cons:
+        if not cons.empty:
             st.dataframe(
-                [
-                    {
-                        "order_a": c.order_ids[0],
-                        "order_b": c.order_ids[1],
-                        "avg_load_ratio": c.avg_load_ratio,
-                        "combined_distance_km": c.combined_distance_km,
-                    }
-                    for c in cons[:50]
-                ]
+                cons.head(50).rename(columns={"order_id_a": "order_a", "order_id_b": "order_b"})
             )
 
 
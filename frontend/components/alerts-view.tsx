@@ -4,8 +4,10 @@ import { Card } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
 import { Button } from '@/components/ui/button'
 import { AlertTriangle, Info, Leaf, TrendingUp, Clock, Loader2, AlertCircle } from 'lucide-react'
+import { useEffect } from 'react'
 import useSWR from 'swr'
-import { fetchAlertsData, type AlertsData, type Alert } from '@/lib/api'
+import { fetchAlertsData, toAlertsData, type AlertsData, type Alert } from '@/lib/api'
+import { useLiveUpdates } from '@/hooks/use-live-updates'
 
 const ALERT_ICON_MAP: Record<string, typeof Leaf> = {
   optimization: TrendingUp,
@@ -34,13 +36,19 @@ const fallbackData: AlertsData = {
 }
 
 export function AlertsView() {
+  const live = useLiveUpdates()
   const { data, error, isLoading, mutate } = useSWR('alerts', fetchAlertsData, {
     fallbackData,
     revalidateOnFocus: true,
-    refreshInterval: 15000,
+    // Alerts are pushed while the live stream is connected; poll only without it.
+    refreshInterval: live.connected ? 0 : 15000,
     onError: () => { },
   })
 
+  useEffect(() => {
+    if (live.alerts) mutate(toAlertsData(live.alerts), { revalidate: false })
+  }, [live.alerts, mutate])
+
   const alerts = data?.alerts ?? fallbackData.alerts
   const summary = data?.summary ?? fallbackData.summary
 
@@ -4,8 +4,10 @@ import { Card } from '@/components/ui/card'
 import { Battery, Fuel, TrendingUp, TrendingDown, Leaf, DollarSign, Package, MapPin, Loader2, AlertCircle } from 'lucide-react'
 import { Badge } from '@/components/ui/badge'
 import { Button } from '@/components/ui/button'
+import { useEffect } from 'react'
 import useSWR from 'swr'
-import { fetchDashboardData, type DashboardData } from '@/lib/api'
+import { applySummary, fetchDashboardData, type DashboardData } from '@/lib/api'
+import { useLiveUpdates } from '@/hooks/use-live-updates'
 
 const ICON_MAP: Record<string, typeof Leaf> = {
   'CO₂ Emissions': Leaf,
@@ -36,13 +38,19 @@ const fallbackData: DashboardData = {
 }
 
 export function DashboardView() {
+  const live = useLiveUpdates()
   const { data, error, isLoading, mutate } = useSWR('dashboard', fetchDashboardData, {
     fallbackData,
     revalidateOnFocus: true,
-    refreshInterval: 30000,
+    // KPIs are pushed while the live stream is connected; poll only without it.
+    refreshInterval: live.connected ? 0 : 30000,
     onError: () => {},
   })
 
+  useEffect(() => {
+    if (live.summary) mutate((current) => current && applySummary(current, live.summary!), { revalidate: false })
+  }, [live.summary, mutate])
+
   const kpis = (data?.kpis ?? fallbackData.kpis).map((kpi) => ({
     ...kpi,
     icon: ICON_MAP[kpi.label] ?? Package,
@@ -9,7 +9,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs'
 import { Package, MapPin, Loader2, AlertCircle } from 'lucide-react'
 import useSWR from 'swr'
 import dynamic from 'next/dynamic'
-import { fetchOrdersData, fetchRouteMap, type OrdersData } from '@/lib/api'
+import { fetchOrdersData, fetchRouteMap, prefetchOrderDetails, type OrdersData } from '@/lib/api'
 import { OrderDetailsModal } from '@/components/order-details-modal'
 
 const fallbackData: OrdersData = {
@@ -55,6 +55,14 @@ export function OrdersView() {
   const orders = data?.orders ?? fallbackData.orders
   const scenarios = data?.scenarios ?? fallbackData.scenarios
 
+  // Open an order and fetch its neighbours' details in one batch request.
+  const openOrder = (orderId: string) => {
+    setSelectedOrderId(orderId)
+    const index = orders.findIndex((o) => o.id === orderId)
+    const neighbours = orders.slice(Math.max(index - 2, 0), index + 3)
+    prefetchOrderDetails(neighbours.filter((o) => o.id !== orderId).map((o) => o.id.replace('ORD-', '')))
+  }
+
   return (
     <div className="p-4 md:p-8 space-y-6">
       {/* Header */}
@@ -225,7 +233,7 @@ export function OrdersView() {
                         size="sm"
                         variant="outline"
                         className="flex-1 lg:flex-none"
-                        onClick={() => setSelectedOrderId(order.id)}
+                        onClick={() => openOrder(order.id)}
                       >
                         Details
                       </Button>
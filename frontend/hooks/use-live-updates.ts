@@ -0,0 +1,41 @@
+import * as React from 'react'
+
+import { subscribeLiveUpdates, type AlertRecommendation, type DashboardSummary, type LiveUpdate } from '@/lib/api'
+
+export interface LiveState {
+  connected: boolean
+  summary: DashboardSummary | null
+  alerts: AlertRecommendation[] | null
+}
+
+const alertKey = (a: { order_id: number; alert_type: string }) => `${a.order_id}|${a.alert_type}`
+
+function applyAlertChanges(alerts: AlertRecommendation[], update: LiveUpdate): AlertRecommendation[] {
+  const replaced = new Set([...update.removed_alerts, ...update.new_alerts].map(alertKey))
+  return alerts
+    .filter((a) => !replaced.has(alertKey(a)))
+    .concat(update.new_alerts)
+    .sort((a, b) => b.priority_score - a.priority_score)
+}
+
+/** Dashboard summary and alerts pushed by the API; `connected` is false while polling is needed. */
+export function useLiveUpdates(): LiveState {
+  const [state, setState] = React.useState<LiveState>({ connected: false, summary: null, alerts: null })
+
+  React.useEffect(
+    () =>
+      subscribeLiveUpdates({
+        onSnapshot: (snapshot) => setState({ connected: true, summary: snapshot.summary, alerts: snapshot.alerts }),
+        onUpdate: (update) =>
+          setState((prev) => ({
+            connected: true,
+            summary: update.summary,
+            alerts: prev.alerts ? applyAlertChanges(prev.alerts, update) : update.new_alerts,
+          })),
+        onConnectionChange: (connected) => setState((prev) => ({ ...prev, connected })),
+      }),
+    [],
+  )
+
+  return state
+}
@@ -137,21 +137,38 @@ import api from "../src/services/api";
 
 // ─── Dashboard ───────────────────────────────────────────────────────────────
 
+export interface DashboardSummary {
+  total_co2_emission: number
+  total_distance_km: number
+  average_load_ratio: number
+  number_of_orders: number
+  estimated_co2_savings: number
+}
+
+export function toKpis(s: DashboardSummary): KPI[] {
+  return [
+    { label: 'CO₂ Emissions', value: `${s.total_co2_emission.toLocaleString('en-US', { maximumFractionDigits: 0 })} kg`, change: 'live', trend: 'down' },
+    { label: 'Distance Traveled', value: `${s.total_distance_km.toLocaleString('en-US', { maximumFractionDigits: 0 })} km`, change: 'live', trend: 'up' },
+    { label: 'Orders Fulfilled', value: `${s.number_of_orders}`, change: 'live', trend: 'up' },
+    { label: 'Cost Savings', value: `~${s.estimated_co2_savings.toLocaleString('en-US', { maximumFractionDigits: 0 })} kg CO₂`, change: 'live', trend: 'down' },
+  ];
+}
+
+/** Dashboard data with KPIs from a pushed summary (fleet overview is kept). */
+export function applySummary(data: DashboardData, s: DashboardSummary): DashboardData {
+  return { ...data, kpis: toKpis(s), quickStats: { ...data.quickStats, activeRoutes: s.number_of_orders } };
+}
+
 export async function fetchDashboardData(): Promise<DashboardData> {
   const [summaryRes, fleetRes] = await Promise.all([
     api.get("/dashboard/summary"),
     api.get("/fleet/overview")
   ]);
-  const s = summaryRes.data;
+  const s: DashboardSummary = summaryRes.data;
   const f = fleetRes.data;
 
   return {
-    kpis: [
-      { label: 'CO₂ Emissions', value: `${s.total_co2_emission.toLocaleString('en-US', { maximumFractionDigits: 0 })} kg`, change: 'live', trend: 'down' },
-      { label: 'Distance Traveled', value: `${s.total_distance_km.toLocaleString('en-US', { maximumFractionDigits: 0 })} km`, change: 'live', trend: 'up' },
-      { label: 'Orders Fulfilled', value: `${s.number_of_orders}`, change: 'live', trend: 'up' },
-      { label: 'Cost Savings', value: `~${s.estimated_co2_savings.toLocaleString('en-US', { maximumFractionDigits: 0 })} kg CO₂`, change: 'live', trend: 'down' },
-    ],
+    kpis: toKpis(s),
     fleetOverview: f.vehicle_counts_by_type.map((vt: any) => ({
       type: vt.transport_type,
       count: vt.vehicle_count,
@@ -204,6 +221,7 @@ export async function fetchVehicleById(id: string): Promise<Vehicle> {
 
 export async function fetchOrdersData(): Promise<OrdersData> {
   const { data } = await api.get("/orders");
+  orderDetailCache.clear(); // details refresh together with the list
   return {
     orders: data.map((o: any) => ({
       id: `ORD-${o.order_id}`,
@@ -247,9 +265,26 @@ export async function fetchSimulateOrder(orderId: number, vehicleType: string):
   }
 }
 
+// Details fetched ahead of time by prefetchOrderDetails, keyed by numeric order id.
+const orderDetailCache = new Map<string, OrderDetail>();
+
+export async function prefetchOrderDetails(orderIds: string[]): Promise<void> {
+  const missing = orderIds.filter((id) => !orderDetailCache.has(id));
+  if (missing.length === 0) return;
+  try {
+    const { data } = await api.get("/orders/details", { params: { ids: missing.join(",") } });
+    for (const d of data as OrderDetail[]) orderDetailCache.set(String(d.order_id), d);
+  } catch (err) {
+    console.error(`Failed to prefetch order details ${missing.join(",")}:`, err);
+  }
+}
+
 export async function fetchOrderDetails(orderId: string): Promise<OrderDetail | null> {
+  const cached = orderDetailCache.get(orderId);
+  if (cached) return cached;
   try {
     const { data } = await api.get(`/orders/${orderId}`);
+    orderDetailCache.set(orderId, data);
     return data;
   } catch (err) {
     console.error(`Failed to load details for order ${orderId}:`, err);
@@ -269,9 +304,17 @@ export async function fetchRouteMap(): Promise<RouteMapOrder[]> {
 
 // ─── Alerts ──────────────────────────────────────────────────────────────────
 
-export async function fetchAlertsData(): Promise<AlertsData> {
-  const { data } = await api.get("/alerts/recommendations");
-  const mappedAlerts: Alert[] = data.map((r: any, idx: number) => ({
+export interface AlertRecommendation {
+  order_id: number
+  alert_type: string
+  explanation: string
+  estimated_co2_reduction: number
+  priority_score: number
+  stale?: boolean
+}
+
+export function toAlertsData(recommendations: AlertRecommendation[]): AlertsData {
+  const mappedAlerts: Alert[] = recommendations.map((r, idx) => ({
     id: idx + 1,
     type: (r.alert_type.includes("consolidation") || r.alert_type.includes("merge")) ? "optimization" : "sustainability",
     title: (r.alert_type.includes("consolidation") || r.alert_type.includes("merge")) ? `Optimize Order ${r.order_id}` : `Alert: Order ${r.order_id}`,
@@ -290,6 +333,47 @@ export async function fetchAlertsData(): Promise<AlertsData> {
   };
 }
 
+export async function fetchAlertsData(): Promise<AlertsData> {
+  const { data } = await api.get("/alerts/recommendations");
+  return toAlertsData(data);
+}
+
+// ─── Live updates (Server-Sent Events) ───────────────────────────────────────
+
+export interface LiveSnapshot {
+  version: string
+  summary: DashboardSummary
+  alerts: AlertRecommendation[]
+}
+
+export interface LiveUpdate {
+  version: string
+  source: string
+  summary: DashboardSummary
+  kpi_deltas: Partial<Record<keyof DashboardSummary, number>>
+  new_alerts: AlertRecommendation[]
+  removed_alerts: { order_id: number; alert_type: string }[]
+}
+
+export interface LiveHandlers {
+  onSnapshot: (snapshot: LiveSnapshot) => void
+  onUpdate: (update: LiveUpdate) => void
+  onConnectionChange?: (connected: boolean) => void
+}
+
+/**
+ * Subscribe to /live/stream: a snapshot on (re)connect, then an update after each
+ * fact / recommendation rebuild. EventSource reconnects on its own. Returns unsubscribe.
+ */
+export function subscribeLiveUpdates(handlers: LiveHandlers): () => void {
+  const source = new EventSource(`${api.defaults.baseURL}/live/stream`);
+  source.onopen = () => handlers.onConnectionChange?.(true);
+  source.onerror = () => handlers.onConnectionChange?.(false);
+  source.addEventListener("snapshot", (e) => handlers.onSnapshot(JSON.parse((e as MessageEvent).data)));
+  source.addEventListener("update", (e) => handlers.onUpdate(JSON.parse((e as MessageEvent).data)));
+  return () => source.close();
+}
+
 // ─── Profile / Driver ────────────────────────────────────────────────────────
 
 export async function fetchProfile(): Promise<DriverProfile> {
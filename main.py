@@ -14,6 +14,28 @@ logger = logging.getLogger(__name__)
 DEFAULT_DATA_DIR = Path(__file__).parent / "data" / "raw"
 
 
+def build_recommendations() -> None:
+    """Materialize recommendations for the current facts and models."""
+    from app.database.notify import notify_data_changed
+    from app.recommendation.store import build_recommendation_table
+
+    session = SessionLocal()
+    try:
+        inserted = build_recommendation_table(session)
+        notify_data_changed(session, "recommendations")
+        session.commit()
+        logger.info("Recommendation build complete with %d rows", inserted)
+    except FileNotFoundError as e:
+        session.rollback()
+        logger.warning("Skipping recommendation build: %s", e)
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to build recommendations")
+        raise
+    finally:
+        session.close()
+
+
 def main() -> None:
     command = sys.argv[1] if len(sys.argv) > 1 else "help"
 
@@ -41,12 +63,14 @@ def main() -> None:
             ensure_materialized_views,
             refresh_materialized_views,
         )
+        from app.database.notify import notify_data_changed
 
         session = SessionLocal()
         try:
             inserted = build_transport_stage_fact(session)
             ensure_materialized_views(session)
             refresh_materialized_views(session)
+            notify_data_changed(session, "facts")
             session.commit()
             logger.info("Fact build complete with %d rows", inserted)
         except Exception:
@@ -55,45 +79,65 @@ def main() -> None:
             raise
         finally:
             session.close()
+        build_recommendations()
+
+    elif command == "build-recommendations":
+        init_db()
+        build_recommendations()
 
     elif command == "analytics-report":
         init_db()
-        from sqlalchemy import func
-        from app.database.models import TransportStageFact
-        from app.analytics.utilization import (
-            find_underutilized_vehicles,
-            high_emission_routes,
-        )
+        args = sys.argv[2:]
+        from app.analytics.report import build_analytics_report
+
+        fmt, out_path, top_n, threshold = "text", None, 5, 0.5
+        for i, a in enumerate(args):
+            if i + 1 >= len(args):
+                continue
+            if a == "--format":
+                fmt = args[i + 1]
+            elif a == "--out":
+                out_path = Path(args[i + 1])
+            elif a == "--top":
+                top_n = int(args[i + 1])
+            elif a == "--threshold":
+                threshold = float(args[i + 1])
+        if fmt not in ("text", "json", "csv"):
+            logger.error("Unknown --format %s (expected text, json or csv)", fmt)
+            sys.exit(1)
 
         session = SessionLocal()
         try:
-            total_co2 = (
-                session.query(func.sum(TransportStageFact.co2_kg)).scalar() or 0.0
-            )
-            avg_load = (
-                session.query(func.avg(TransportStageFact.load_ratio)).scalar() or 0.0
-            )
-            underutilized = find_underutilized_vehicles(session)
-            worst_routes = high_emission_routes(session, top_n=5)
-
-            print(f"Total CO₂ emissions: {total_co2:.2f} kg")
-            print(f"Average fleet load ratio: {avg_load:.2%}")
-            print("Worst 5 routes by CO₂:")
-            for r in worst_routes:
-                print(
-                    f"  Order {r.order_id}: {r.total_co2:.2f} kg CO₂ over {r.total_distance_km:.1f} km"
-                )
-            print(
-                f"Underutilized vehicles below 50% load: {len(underutilized)} (potential optimization targets)"
-            )
-            session.commit()
+            report = build_analytics_report(session, top_n=top_n, underutilized_threshold=threshold)
         except Exception:
-            session.rollback()
             logger.exception("Failed to generate analytics report")
             raise
         finally:
             session.close()
 
+        if fmt == "text":
+            lines = [
+                f"Total CO₂ emissions: {report.total_co2_kg:.2f} kg",
+                f"Average fleet load ratio: {report.avg_load_ratio:.2%}",
+                f"Worst {top_n} routes by CO₂:",
+                *(
+                    f"  Order {r.order_id}: {r.total_co2:.2f} kg CO₂ over {r.total_distance_km:.1f} km"
+                    for r in report.high_emission_routes
+                ),
+                f"Underutilized vehicles below {threshold:.0%} load: {len(report.underutilized_vehicles)} "
+                "(potential optimization targets)",
+                f"Electric vehicles with tracked utilization: {len(report.electric_vehicles)}",
+                f"Report computed in {report.elapsed_s:.3f} s",
+            ]
+            output = "\n".join(lines) + "\n"
+        else:
+            output = report.to_json() + "\n" if fmt == "json" else report.to_csv()
+        if out_path is not None:
+            out_path.write_text(output, encoding="utf-8")
+            logger.info("Wrote %s report to %s", fmt, out_path)
+        else:
+            sys.stdout.write(output)
+
     elif command == "train-models":
         init_db()
         from app.ml.training import run_training
@@ -105,6 +149,7 @@ def main() -> None:
         except Exception:
             logger.exception("Training failed")
             raise
+        build_recommendations()
 
     elif command == "simulate":
         init_db()
@@ -141,15 +186,147 @@ def main() -> None:
         finally:
             session.close()
 
+    elif command == "optimize-routes":
+        init_db()
+        args = sys.argv[2:]
+        workers = None
+        for i, a in enumerate(args):
+            if a == "--workers" and i + 1 < len(args):
+                workers = int(args[i + 1])
+        from app.optimization.routing import optimize_order_routes
+        session = SessionLocal()
+        try:
+            df = optimize_order_routes(
+                session, fix_end="--free-end" not in args, max_workers=workers
+            )
+        finally:
+            session.close()
+        improved = df[df["distance_saving_km"] > 1e-6]
+        print(f"Orders re-sequenced: {len(df)}, improved: {len(improved)}")
+        print(f"Distance saving: {df['distance_saving_km'].sum():.1f} km, "
+              f"CO2 saving: {df['co2_saving_kg'].sum():.1f} kg")
+        for r in improved.nlargest(5, "co2_saving_kg").itertuples():
+            print(f"  Order {r.order_id}: {r.original_km:.1f} -> {r.optimized_km:.1f} km, "
+                  f"stops {r.stop_sequence}")
+
+    elif command == "scenario-sweep":
+        init_db()
+        args = sys.argv[2:]
+        from app.optimization.scenarios import Substitution, sweep_fleet_scenarios
+        substitutions = []
+        n_scenarios, seed, workers = 1000, 0, None
+        for i, a in enumerate(args):
+            if i + 1 >= len(args):
+                continue
+            if a == "--sub":
+                # SOURCE:TARGET[:MAX_RATE]
+                parts = args[i + 1].split(":")
+                max_rate = float(parts[2]) if len(parts) > 2 else 1.0
+                substitutions.append(Substitution(parts[0], parts[1], max_rate))
+            elif a == "--scenarios":
+                n_scenarios = int(args[i + 1])
+            elif a == "--seed":
+                seed = int(args[i + 1])
+            elif a == "--workers":
+                workers = int(args[i + 1])
+        if not substitutions:
+            logger.error(
+                "Usage: python main.py scenario-sweep --sub SOURCE:TARGET[:MAX_RATE] "
+                "[--sub ...] [--scenarios N] [--seed S] [--workers N]"
+            )
+            sys.exit(1)
+        session = SessionLocal()
+        try:
+            sweep = sweep_fleet_scenarios(
+                session, substitutions, n_scenarios=n_scenarios, seed=seed, max_workers=workers
+            )
+        except ValueError as e:
+            logger.error("%s", e)
+            sys.exit(1)
+        finally:
+            session.close()
+        print(f"Baseline: {sweep.baseline_co2_kg:.1f} kg CO2, cost {sweep.baseline_cost:.2f}")
+        print(f"Pareto front ({len(sweep.pareto_front)} of {sweep.n_scenarios} scenarios):")
+        for p in sweep.pareto_front:
+            rates = ", ".join(f"{name} {rate:.0%}" for name, rate in p.rates.items())
+            print(f"  {p.co2_kg:12.1f} kg CO2  cost {p.cost:12.2f}  [{rates}]")
+
+    elif command == "consolidate-units":
+        init_db()
+        args = sys.argv[2:]
+        from app.optimization.bin_packing import STRATEGIES, consolidate_freight_units
+        transport_type, strategy, budget_s = None, "best_fit", 10.0
+        for i, a in enumerate(args):
+            if i + 1 >= len(args):
+                continue
+            if a == "--vehicle-type":
+                transport_type = args[i + 1]
+            elif a == "--strategy":
+                strategy = args[i + 1]
+            elif a == "--budget-s":
+                budget_s = float(args[i + 1])
+        if strategy not in STRATEGIES:
+            logger.error(
+                "Usage: python main.py consolidate-units [--vehicle-type <type>] "
+                "[--strategy %s] [--budget-s S] [--no-local-search]", "|".join(STRATEGIES)
+            )
+            sys.exit(1)
+        session = SessionLocal()
+        try:
+            plan = consolidate_freight_units(
+                session,
+                transport_type=transport_type,
+                strategy=strategy,
+                time_budget_s=budget_s,
+                local_search="--no-local-search" not in args,
+            )
+        except ValueError as e:
+            logger.error("%s", e)
+            sys.exit(1)
+        finally:
+            session.close()
+        print(f"Trips: {plan.baseline_trips} -> {plan.consolidated_trips}, "
+              f"CO2: {plan.baseline_co2_kg:.1f} -> {plan.consolidated_co2_kg:.1f} kg "
+              f"({plan.co2_delta_kg:+.1f} kg) in {plan.elapsed_s:.2f} s")
+        if plan.unpacked_unit_ids:
+            print(f"Units larger than any single vehicle: {len(plan.unpacked_unit_ids)}")
+        for t, count in plan.trips["transport_type"].value_counts().items():
+            print(f"  {t}: {count} trips")
+
+    elif command == "set-tariff":
+        args = sys.argv[2:]
+        if len(args) != 3:
+            logger.error("Usage: python main.py set-tariff <transport_type> <cost_per_km> <driver_cost_per_min>")
+            sys.exit(1)
+        init_db()
+        from app.analytics.cost_analysis import set_tariff
+
+        session = SessionLocal()
+        try:
+            set_tariff(session, args[0], float(args[1]), float(args[2]))
+            session.commit()
+        except ValueError as e:
+            session.rollback()
+            logger.error("%s", e)
+            sys.exit(1)
+        finally:
+            session.close()
+
     else:
         print(
             "Usage:\n"
             "  python main.py init-db [--reset]              Create tables (or drop+recreate)\n"
             "  python main.py ingest [data_dir] [--replace]  Load CSVs (--replace truncates first)\n"
             "  python main.py build-facts                    Build transport_stage_fact and views\n"
-            "  python main.py analytics-report               Print key analytics KPIs\n"
+            "  python main.py build-recommendations          Materialize alert recommendations\n"
+            "  python main.py analytics-report [--format text|json|csv] [--out FILE] [--top N]  Analytics KPIs\n"
             "  python main.py train-models                   Train emission and load ML models\n"
             "  python main.py simulate --order <id> [--vehicle-type <type>]  What-if simulation\n"
+            "  python main.py optimize-routes [--free-end] [--workers N]  Re-sequence order stops\n"
+            "  python main.py scenario-sweep --sub SOURCE:TARGET[:MAX_RATE] [--scenarios N]  Fleet what-if sweep\n"
+            "  python main.py consolidate-units [--vehicle-type <type>] [--strategy best_fit|first_fit]"
+            "  Bin-pack freight units into trips\n"
+            "  python main.py set-tariff <type> <cost_per_km> <driver_cost_per_min>  Per-type cost rates\n"
         )
 
 
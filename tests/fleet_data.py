@@ -0,0 +1,102 @@
+"""
+Synthetic fleet data and the previous three-query fleet overview, shared by the
+fleet overview tests and benchmarks (benchmarks.bench_fleet_overview, bench_export).
+"""
+import math
+import uuid
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import distinct, func, insert
+from sqlalchemy.orm import Session
+
+from app.api.schemas import FleetOverview, FleetTypeStats
+from app.database.models import TransportStageFact, TransportType, Vehicle
+from app.database.powertrain import ELECTRIC, classify_powertrain
+
+TYPES = ["Kleintransporter", "LKW 7,5 t", "Sattelzug", "Elektro Sprinter", "E-LKW 18 t"]
+
+
+def legacy_fleet_overview(db: Session) -> FleetOverview:
+    rows = (
+        db.query(
+            TransportType.name,
+            func.count(distinct(Vehicle.vehicle_id)),
+            func.coalesce(func.avg(TransportStageFact.load_ratio), 0.0),
+            func.coalesce(func.sum(TransportStageFact.co2_kg), 0.0),
+            func.coalesce(func.sum(TransportStageFact.distance_km), 0.0),
+        )
+        .select_from(Vehicle)
+        .join(TransportType, Vehicle.transport_type_id == TransportType.transport_type_id)
+        .outerjoin(TransportStageFact, TransportStageFact.vehicle_id == Vehicle.vehicle_id)
+        .group_by(TransportType.name)
+        .all()
+    )
+    type_stats, total_vehicles = [], 0
+    for name, count, avg_load, total_co2, total_dist in rows:
+        total_vehicles += int(count or 0)
+        type_stats.append(FleetTypeStats(
+            transport_type=name,
+            vehicle_count=int(count or 0),
+            avg_load_ratio=float(avg_load or 0.0),
+            emission_intensity_kg_per_km=float(total_co2 or 0.0) / float(total_dist) if total_dist else 0.0,
+        ))
+    electric = int(
+        db.query(func.count(distinct(Vehicle.vehicle_id)))
+        .join(TransportType, Vehicle.transport_type_id == TransportType.transport_type_id)
+        .filter(TransportType.powertrain == ELECTRIC)
+        .scalar() or 0
+    )
+    avg_utilization = float(db.query(func.coalesce(func.avg(TransportStageFact.load_ratio), 0.0)).scalar() or 0.0)
+    return FleetOverview(
+        total_vehicles=total_vehicles,
+        vehicle_counts_by_type=type_stats,
+        electric_vehicles=electric,
+        combustion_vehicles=max(total_vehicles - electric, 0),
+        average_utilization=avg_utilization,
+    )
+
+
+def populate(session: Session, n_vehicles: int, n_stages: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    session.execute(insert(TransportType), [
+        {"transport_type_id": i + 1, "name": f"ZFT{i + 1:03d}", "description": d,
+         "powertrain": classify_powertrain(f"ZFT{i + 1:03d}", d)}
+        for i, d in enumerate(TYPES)
+    ])
+    type_ids = rng.integers(1, len(TYPES) + 1, n_vehicles)
+    session.execute(insert(Vehicle), [
+        {"vehicle_id": v + 1, "transport_type_id": int(t), "license_plate": f"P{v + 1}"}
+        for v, t in enumerate(type_ids)
+    ])
+    now = datetime.utcnow()
+    vehicles = rng.integers(1, n_vehicles + 1, n_stages)
+    distance = rng.gamma(2.0, 60.0, n_stages)
+    load = rng.beta(2.0, 3.0, n_stages)
+    co2 = distance * rng.uniform(0.1, 1.2, n_stages)
+    batch = 50_000
+    for start in range(0, n_stages, batch):
+        end = min(start + batch, n_stages)
+        session.execute(insert(TransportStageFact), [
+            {"id": uuid.uuid4(), "order_id": i // 3, "vehicle_id": int(vehicles[i]),
+             "distance_km": float(distance[i]), "load_ratio": float(load[i]),
+             "co2_kg": float(co2[i]), "created_at": now}
+            for i in range(start, end)
+        ])
+    session.commit()
+
+
+def same(a: FleetOverview, b: FleetOverview) -> bool:
+    if (a.total_vehicles, a.electric_vehicles, a.combustion_vehicles) != (
+        b.total_vehicles, b.electric_vehicles, b.combustion_vehicles
+    ) or not math.isclose(a.average_utilization, b.average_utilization, rel_tol=1e-9):
+        return False
+    by_name = {t.transport_type: t for t in b.vehicle_counts_by_type}
+    return len(by_name) == len(a.vehicle_counts_by_type) and all(
+        t.transport_type in by_name
+        and t.vehicle_count == by_name[t.transport_type].vehicle_count
+        and math.isclose(t.avg_load_ratio, by_name[t.transport_type].avg_load_ratio, rel_tol=1e-9)
+        and math.isclose(t.emission_intensity_kg_per_km,
+                         by_name[t.transport_type].emission_intensity_kg_per_km, rel_tol=1e-9)
+        for t in a.vehicle_counts_by_type
+    )
@@ -0,0 +1,56 @@
+"""In-memory ReferenceData snapshots for tests that need master data without a database."""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.database.reference_data import ReferenceData, TypeAttributes
+
+# name, capacity_kg, capacity_volume, co2_empty_kg_km, co2_loaded_kg_km
+FLEET = [
+    ("Van", 1200.0, 12.0, 0.18, 0.26),
+    ("Rigid truck", 7500.0, 45.0, 0.55, 0.85),
+    ("Semi trailer", 24000.0, 90.0, 0.75, 1.20),
+]
+
+
+def make_reference_data(
+    fleet: Sequence[Tuple] = FLEET,
+    tariffs: Optional[Dict[str, Tuple[float, float]]] = None,
+    vehicle_types: Optional[Dict[int, str]] = None,
+) -> ReferenceData:
+    """
+    Types 1..n from fleet rows; tariffs maps type name -> (cost_per_km,
+    driver_cost_per_min), vehicle_types maps vehicle_id -> type name.
+    """
+    attrs = {
+        i + 1: TypeAttributes(i + 1, name, cap, vol, empty, loaded)
+        for i, (name, cap, vol, empty, loaded) in enumerate(fleet)
+    }
+    type_ids = np.array(sorted(attrs), dtype=np.int64)
+    names = sorted(a.name for a in attrs.values())
+    name_to_id = {a.name: t for t, a in attrs.items()}
+
+    def column(attr: str) -> np.ndarray:
+        values = [getattr(attrs[t], attr) for t in type_ids]
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    rates = np.array(
+        [(tariffs or {}).get(attrs[t].name, (np.nan, np.nan)) for t in type_ids], dtype=np.float64
+    ).reshape(-1, 2)
+    vehicles = sorted((vehicle_types or {}).items())
+    return ReferenceData(
+        version=("test",),
+        type_names=names,
+        type_to_code={n: i for i, n in enumerate(names)},
+        type_name_to_id=name_to_id,
+        attributes_by_type_id=attrs,
+        type_ids=type_ids,
+        capacity_kg=column("capacity_kg"),
+        capacity_volume=column("capacity_volume"),
+        co2_empty_kg_km=column("co2_empty_kg_km"),
+        co2_loaded_kg_km=column("co2_loaded_kg_km"),
+        cost_per_km=rates[:, 0],
+        driver_cost_per_min=rates[:, 1],
+        vehicle_ids=np.array([v for v, _ in vehicles], dtype=np.int64),
+        vehicle_type_ids=np.array([name_to_id[n] for _, n in vehicles], dtype=np.int64),
+    )
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime
+
+from app.analytics.report import build_analytics_report
+from app.database.models import TransportStageFact
+
+
+def _stage(vehicle_id, order_id, load_ratio, distance_km=10.0):
+    return TransportStageFact(
+        id=uuid.uuid4(), order_id=order_id, vehicle_id=vehicle_id, load_ratio=load_ratio,
+        co2_kg=2.0, distance_km=distance_km, created_at=datetime.utcnow(),
+    )
+
+
+def test_vehicle_without_loads_is_not_underutilized(session):
+    session.add_all([
+        _stage(vehicle_id=1, order_id=1, load_ratio=0.2),
+        _stage(vehicle_id=1, order_id=2, load_ratio=0.4),
+        _stage(vehicle_id=2, order_id=3, load_ratio=None),
+        _stage(vehicle_id=2, order_id=4, load_ratio=None),
+        _stage(vehicle_id=3, order_id=5, load_ratio=0.9),
+    ])
+    session.commit()
+
+    report = build_analytics_report(session, underutilized_threshold=0.5)
+
+    by_id = {v.vehicle_id: v for v in report.vehicles}
+    assert abs(by_id[1].avg_load_ratio - 0.3) < 1e-12
+    assert by_id[2].avg_load_ratio is None
+    assert by_id[2].n_stages == 2
+    assert [v.vehicle_id for v in report.underutilized_vehicles] == [1]
+    assert abs(report.avg_load_ratio - 0.5) < 1e-12
+    assert '"avg_load_ratio": null' in report.to_json()
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.optimization.bin_packing import STRATEGIES, pack_units, plan_consolidation
+from tests.reference import FLEET, make_reference_data
+
+
+def _units(n_units, n_days=3, seed=0):
+    rng = np.random.default_rng(seed)
+    weight = rng.lognormal(6.0, 1.0, n_units).clip(5.0, 30000.0)
+    return pd.DataFrame({
+        "unit_id": np.arange(1, n_units + 1),
+        "weight_kg": weight,
+        "volume": weight / rng.uniform(100.0, 400.0, n_units),
+        "distance_km": rng.gamma(2.0, 90.0, n_units),
+        "planned_date": pd.Timestamp("2026-01-05") + pd.to_timedelta(rng.integers(0, n_days, n_units), unit="D"),
+        "order_id": np.arange(n_units) // 4,
+        "transport_type_id": np.full(n_units, 2, dtype=np.int64),
+    })
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("local_search", [False, True])
+def test_trips_never_exceed_capacity(strategy, local_search):
+    units = _units(600, n_days=1)
+    weight, volume = units["weight_kg"].to_numpy(), units["volume"].to_numpy()
+    capacity_kg, capacity_volume = 7500.0, 45.0
+    deadline = time.monotonic() + 0.5 if local_search else None
+
+    trips = pack_units(weight, volume, capacity_kg, capacity_volume, strategy, deadline)
+
+    oversized = (weight > capacity_kg) | (volume > capacity_volume)
+    assert ((trips < 0) == oversized).all()
+    packed = trips >= 0
+    n_trips = trips.max() + 1
+    assert set(trips[packed]) == set(range(n_trips))  # trips are numbered densely
+    assert (np.bincount(trips[packed], weights=weight[packed]) <= capacity_kg + 1e-6).all()
+    assert (np.bincount(trips[packed], weights=volume[packed]) <= capacity_volume + 1e-6).all()
+    assert n_trips >= np.ceil(max(weight[packed].sum() / capacity_kg, volume[packed].sum() / capacity_volume))
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        pack_units(np.ones(3), np.ones(3), 10.0, strategy="worst_fit")
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_plan_trips_fit_their_right_sized_type(strategy):
+    units = _units(400)
+    ref = make_reference_data()
+
+    plan = plan_consolidation(units, ref, strategy=strategy, time_budget_s=1.0)
+
+    volume_by_type = {name: vol for name, _, vol, _, _ in FLEET}
+    assert (plan.trips["weight_kg"] <= plan.trips["capacity_kg"] + 1e-6).all()
+    assert (plan.trips["volume"] <= plan.trips["transport_type"].map(volume_by_type) + 1e-6).all()
+    assert plan.assignments["unit_id"].is_unique
+    assert len(plan.assignments) + len(plan.unpacked_unit_ids) == len(units)
+    # A trip never mixes planned dates.
+    dates = units.set_index("unit_id")["planned_date"]
+    per_trip = plan.assignments.assign(day=dates.loc[plan.assignments["unit_id"]].to_numpy())
+    assert (per_trip.groupby("trip_id")["day"].nunique() == 1).all()
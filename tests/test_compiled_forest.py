@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+from app.ml.compiled import CHUNK_ROWS, CompiledForest, compile_model
+
+COLUMNS = ["distance_km", "total_weight_kg", "capacity_kg", "duration_min"]
+
+
+def _training_data(n_rows: int = 400, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.gamma(2.0, 50.0, (n_rows, len(COLUMNS))), columns=COLUMNS)
+    y = 0.8 * X["distance_km"] + 0.01 * X["total_weight_kg"] + rng.normal(0.0, 5.0, n_rows)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    X, y = _training_data()
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("model", RandomForestRegressor(n_estimators=15, max_depth=6, random_state=0)),
+    ]).fit(X, y)
+
+
+def test_matches_pipeline_predict(pipeline):
+    X, _ = _training_data(n_rows=CHUNK_ROWS * 2 + 37, seed=1)  # several traversal chunks
+    compiled = CompiledForest.from_pipeline(pipeline)
+    np.testing.assert_allclose(
+        compiled.predict(X.to_numpy()), pipeline.predict(X), rtol=1e-9, atol=1e-9
+    )
+
+
+def test_single_row_and_bare_tree():
+    X, y = _training_data()
+    tree = DecisionTreeRegressor(max_depth=4, random_state=0).fit(X.to_numpy(), y)
+    compiled = CompiledForest.from_pipeline(tree)
+    row = X.to_numpy()[0]
+    np.testing.assert_allclose(compiled.predict(row), tree.predict(row.reshape(1, -1)))
+
+
+def test_rejects_wrong_feature_count(pipeline):
+    compiled = CompiledForest.from_pipeline(pipeline)
+    with pytest.raises(ValueError):
+        compiled.predict(np.zeros((2, len(COLUMNS) + 1)))
+
+
+def test_unsupported_model_falls_back():
+    X, y = _training_data()
+    model = Pipeline([
+        ("scaler", StandardScaler()),
+        ("scaler2", StandardScaler()),
+        ("model", DecisionTreeRegressor(max_depth=3)),
+    ]).fit(X, y)
+    assert compile_model(model) is None
@@ -0,0 +1,109 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from app.optimization.consolidation import PAIR_COLUMNS, consolidation_pairs, spatial_consolidation_pairs
+
+
+def _stages(vehicle_ids, distances, load_ratio=0.2):
+    return pd.DataFrame({
+        "order_id": range(1, len(vehicle_ids) + 1),
+        "vehicle_id": vehicle_ids,
+        "distance_km": distances,
+        "load_ratio": load_ratio,
+    })
+
+
+def test_unassigned_orders_are_not_paired():
+    pairs = consolidation_pairs(_stages([None, None, None], [10.0, 12.0, 14.0]))
+    assert pairs.empty
+    assert list(pairs.columns) == PAIR_COLUMNS
+
+    pairs = consolidation_pairs(_stages([None, 5, None, 5], [10.0, 12.0, 14.0, 16.0]))
+    assert pairs[["order_id_a", "order_id_b"]].values.tolist() == [[2, 4]]
+
+
+def test_uncapped_pairs_every_order_of_a_vehicle():
+    vehicles = [1, 2, 1, 1, 2, 1]
+    pairs = consolidation_pairs(_stages(vehicles, [5.0, 8.0, 3.0, 9.0, 1.0, 4.0]), max_pairs_per_order=None)
+    expected = [
+        [i + 1, j + 1]
+        for i, j in itertools.combinations(range(len(vehicles)), 2)
+        if vehicles[i] == vehicles[j]
+    ]
+    assert pairs[["order_id_a", "order_id_b"]].values.tolist() == expected
+
+
+def test_per_order_cap():
+    rng = np.random.default_rng(0)
+    df = _stages(rng.integers(1, 3, 40).tolist(), rng.uniform(1.0, 100.0, 40))
+    cap = 3
+
+    capped = consolidation_pairs(df, max_pairs_per_order=cap, max_distance_gap_km=30.0)
+    uncapped = consolidation_pairs(df, max_pairs_per_order=None, max_distance_gap_km=30.0)
+
+    assert not capped.empty
+    assert capped.groupby("order_id_a").size().max() <= cap
+    keys = ["order_id_a", "order_id_b"]
+    assert set(map(tuple, capped[keys].values.tolist())) <= set(map(tuple, uncapped[keys].values.tolist()))
+    distance = df.set_index("order_id")["distance_km"]
+    gap = distance[capped["order_id_a"]].to_numpy() - distance[capped["order_id_b"]].to_numpy()
+    assert np.abs(gap).max() <= 30.0
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * np.arcsin(np.sqrt(h))
+
+
+def _orders(n_orders, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2026-03-02 06:00") + pd.to_timedelta(rng.integers(0, 48, n_orders) * 30, unit="min")
+    return pd.DataFrame({
+        "order_id": np.arange(1, n_orders + 1),
+        "origin_lat": 48.1 + rng.normal(0.0, 0.3, n_orders),
+        "origin_lon": 11.5 + rng.normal(0.0, 0.4, n_orders),
+        "dest_lat": 52.5 + rng.normal(0.0, 0.3, n_orders),
+        "dest_lon": 13.4 + rng.normal(0.0, 0.4, n_orders),
+        "weight_kg": rng.uniform(100.0, 3000.0, n_orders),
+        "capacity_kg": rng.choice([1200.0, 7500.0, 24000.0], n_orders),
+        "window_start": start,
+        "window_end": start + pd.Timedelta(hours=2),
+    })
+
+
+def test_spatial_pairs_stay_within_radius():
+    orders = _orders(300)
+    radius_km = 20.0
+
+    pairs = spatial_consolidation_pairs(orders, radius_km=radius_km, max_pairs_per_order=50, candidates_per_order=300)
+
+    assert not pairs.empty
+    a = orders.set_index("order_id").loc[pairs["order_id_a"]]
+    b = orders.set_index("order_id").loc[pairs["order_id_b"]]
+    origin_km = _haversine_km(a["origin_lat"].to_numpy(), a["origin_lon"].to_numpy(),
+                              b["origin_lat"].to_numpy(), b["origin_lon"].to_numpy())
+    dest_km = _haversine_km(a["dest_lat"].to_numpy(), a["dest_lon"].to_numpy(),
+                            b["dest_lat"].to_numpy(), b["dest_lon"].to_numpy())
+    assert (origin_km <= radius_km + 1e-6).all() and (dest_km <= radius_km + 1e-6).all()
+    np.testing.assert_allclose(pairs["origin_distance_km"], origin_km, atol=1e-6)
+    np.testing.assert_allclose(pairs["destination_distance_km"], dest_km, atol=1e-6)
+    assert (pairs["combined_weight_kg"] <= pairs["capacity_kg"]).all()
+    assert (pairs["order_id_a"] < pairs["order_id_b"]).all()
+
+    # With every order as a candidate, the tree finds exactly the brute-force matches.
+    low = orders[orders["weight_kg"] / orders["capacity_kg"] < 0.4]
+    slack = pd.Timedelta(minutes=120)
+    expected = set()
+    for x, y in itertools.combinations(low.itertuples(index=False), 2):
+        if (
+            _haversine_km(x.origin_lat, x.origin_lon, y.origin_lat, y.origin_lon) <= radius_km
+            and _haversine_km(x.dest_lat, x.dest_lon, y.dest_lat, y.dest_lon) <= radius_km
+            and x.weight_kg + y.weight_kg <= max(x.capacity_kg, y.capacity_kg)
+            and x.window_start <= y.window_end + slack
+            and y.window_start <= x.window_end + slack
+        ):
+            expected.add((min(x.order_id, y.order_id), max(x.order_id, y.order_id)))
+    assert set(map(tuple, pairs[["order_id_a", "order_id_b"]].values.tolist())) == expected
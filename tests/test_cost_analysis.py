@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.analytics.cost_analysis import (
+    compute_route_costs,
+    compute_stage_cost,
+    iter_route_costs,
+    route_costs_page,
+    set_tariff,
+    stage_tariffs,
+)
+from app.config import settings
+from app.database.models import TransportStageFact, TransportType, Vehicle
+
+
+@pytest.fixture
+def fleet(session):
+    """Vehicle 1 has a tariffed type, vehicle 2 a type without tariff; vehicle 3 is unknown."""
+    session.add_all([
+        TransportType(transport_type_id=1, name="ZFT001"),
+        TransportType(transport_type_id=2, name="ZFT002"),
+        Vehicle(vehicle_id=1, transport_type_id=1, license_plate="A"),
+        Vehicle(vehicle_id=2, transport_type_id=2, license_plate="B"),
+    ])
+    session.flush()
+    set_tariff(session, "ZFT001", 2.0, 0.75)
+    rng = np.random.default_rng(0)
+    session.add_all([
+        TransportStageFact(
+            id=uuid.uuid4(),
+            order_id=None if i % 23 == 0 else int(rng.integers(1, 40)),
+            vehicle_id=int(rng.integers(1, 4)),
+            distance_km=None if i % 9 == 0 else float(rng.uniform(5.0, 200.0)),
+            duration_min=float(rng.uniform(10.0, 240.0)),
+            co2_kg=float(rng.uniform(1.0, 50.0)),
+            created_at=datetime.utcnow(),
+        )
+        for i in range(150)
+    ])
+    session.commit()
+    return session
+
+
+def _expected_costs(session):
+    rates = {1: (2.0, 0.75)}
+    default = (settings.cost_per_km, settings.driver_cost_per_min)
+    costs = {}
+    for f in session.query(TransportStageFact).filter(TransportStageFact.order_id.isnot(None)):
+        per_km, per_min = rates.get(f.vehicle_id, default)
+        cost = float(f.distance_km or 0.0) * per_km + float(f.duration_min) * per_min
+        costs[f.order_id] = costs.get(f.order_id, 0.0) + cost
+    return costs
+
+
+def test_types_without_tariff_use_settings_rates(fleet):
+    expected = _expected_costs(fleet)
+    costs = {c.order_id: c.total_cost for c in compute_route_costs(fleet)}
+    assert costs.keys() == expected.keys()
+    for order_id, cost in costs.items():
+        assert cost == pytest.approx(expected[order_id])
+
+
+def test_stage_cost_falls_back_to_settings_rates():
+    per_km, per_min = stage_tariffs(np.array([2.0, np.nan]), np.array([0.75, np.nan]), np.array([0, 1, -1]))
+    cost = compute_stage_cost(np.array([10.0, 10.0, 10.0]), np.array([60.0, 60.0, 60.0]), per_km, per_min)
+    fallback = 10.0 * settings.cost_per_km + 60.0 * settings.driver_cost_per_min
+    np.testing.assert_allclose(cost, [10.0 * 2.0 + 60.0 * 0.75, fallback, fallback])
+
+
+@pytest.mark.parametrize("limit", [1, 7, 100])
+def test_pages_do_not_overlap(fleet, limit):
+    pages, after = [], None
+    while True:
+        page = route_costs_page(fleet, after_order_id=after, limit=limit)
+        if not page:
+            break
+        assert len(page) <= limit
+        pages.append(page)
+        after = page[-1].order_id
+
+    ids = [c.order_id for page in pages for c in page]
+    assert ids == sorted(set(ids))
+    assert ids == [c.order_id for c in iter_route_costs(fleet, batch_size=5)]
+
+
+def test_unknown_transport_type_tariff_is_rejected(session):
+    with pytest.raises(ValueError):
+        set_tariff(session, "ZFT999", 1.0, 1.0)
@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime
+
+from app.api.routes.fleet import get_fleet_overview
+from app.database.models import TransportStageFact, TransportType, Vehicle
+from tests.fleet_data import legacy_fleet_overview, populate, same
+
+
+def _stage(vehicle_id, load_ratio=0.5, co2_kg=10.0, distance_km=40.0):
+    return TransportStageFact(
+        id=uuid.uuid4(), order_id=1, vehicle_id=vehicle_id, load_ratio=load_ratio,
+        co2_kg=co2_kg, distance_km=distance_km, created_at=datetime.utcnow(),
+    )
+
+
+def test_matches_three_query_version(session):
+    populate(session, n_vehicles=40, n_stages=600)
+    assert same(legacy_fleet_overview(session), get_fleet_overview(session))
+
+
+def test_unknown_and_unassigned_facts(session):
+    populate(session, n_vehicles=10, n_stages=60)
+    session.add(TransportType(transport_type_id=99, name="ZFT099", description=None, powertrain=None))
+    session.add(Vehicle(vehicle_id=500, transport_type_id=99, license_plate="IDLE"))  # no facts
+    session.add_all([
+        _stage(vehicle_id=None, load_ratio=0.1),       # no vehicle: type NULL after the join
+        _stage(vehicle_id=12345, load_ratio=0.9),      # vehicle not in the fleet
+        _stage(vehicle_id=1, load_ratio=None),         # NULL measure
+    ])
+    session.commit()
+
+    overview = get_fleet_overview(session)
+    assert same(legacy_fleet_overview(session), overview)
+    assert None not in {t.transport_type for t in overview.vehicle_counts_by_type}
+    idle = next(t for t in overview.vehicle_counts_by_type if t.transport_type == "ZFT099")
+    assert (idle.vehicle_count, idle.avg_load_ratio, idle.emission_intensity_kg_per_km) == (1, 0.0, 0.0)
+    assert overview.total_vehicles == 11
+
+
+def test_empty_database(session):
+    assert same(legacy_fleet_overview(session), get_fleet_overview(session))
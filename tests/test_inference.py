@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from app.ml import inference
+from app.ml.training import save_artifact
+
+COLUMNS = ["distance_km", "total_weight_kg", "capacity_kg"]
+
+
+def _pipeline(seed: int) -> Pipeline:
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.gamma(2.0, 50.0, (200, len(COLUMNS))), columns=COLUMNS)
+    y = 0.5 * X["distance_km"] + rng.normal(0.0, 2.0, len(X))
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("model", RandomForestRegressor(n_estimators=5, max_depth=4, random_state=seed)),
+    ]).fit(X, y)
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    models = {}
+    for name, seed in (("emission", 0), ("load", 1)):
+        path = tmp_path / f"{name}_model.joblib"
+        models[name] = _pipeline(seed)
+        assert save_artifact({"model": models[name], "feature_columns": COLUMNS}, path) is not None
+        models[f"{name}_path"] = path
+    inference._load_artifact.cache_clear()
+    inference._compiled_artifact.cache_clear()
+    inference._compiled_model.cache_clear()
+    yield models
+    inference._load_artifact.cache_clear()
+    inference._compiled_artifact.cache_clear()
+    inference._compiled_model.cache_clear()
+
+
+def test_compiled_artifact_never_loads_pipeline(artifacts, monkeypatch):
+    def fail(path):
+        raise AssertionError(f"sklearn pipeline loaded: {path}")
+
+    monkeypatch.setattr(inference.settings, "model_mmap", True)
+    monkeypatch.setattr(inference.settings, "inference_engine", "compiled")
+    monkeypatch.setattr(inference, "_load_artifact", fail)
+    df = pd.DataFrame(np.random.default_rng(2).gamma(2.0, 50.0, (20, len(COLUMNS))), columns=COLUMNS)
+
+    out = inference.predict(df, artifacts["emission_path"], artifacts["load_path"])
+
+    np.testing.assert_allclose(out["predicted_co2"], artifacts["emission"].predict(df))
+    np.testing.assert_allclose(out["predicted_load_ratio"], artifacts["load"].predict(df))
+
+
+def test_without_compiled_artifact_falls_back_to_pipeline(artifacts, monkeypatch):
+    monkeypatch.setattr(inference.settings, "model_mmap", False)
+    df = pd.DataFrame(np.random.default_rng(3).gamma(2.0, 50.0, (5, len(COLUMNS))), columns=COLUMNS)
+
+    out = inference.predict(df, artifacts["emission_path"], artifacts["load_path"])
+
+    np.testing.assert_allclose(out["predicted_co2"], artifacts["emission"].predict(df))
+    assert inference._load_artifact.cache_info().currsize == 2
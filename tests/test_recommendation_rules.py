@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.recommendation.engine import evaluate_rules, rank_recommendations
+from app.recommendation.rules import DEFAULT_RULES_PATH, get_rules, load_rules, parse_rules
+
+
+def legacy_recommendations(by_order: pd.DataFrame) -> list:
+    """The hard-coded checks the rule set replaced (row loop over per-order aggregates)."""
+    emission_high = by_order["emission_per_km"].quantile(0.85)
+    out = []
+    for rank, r in enumerate(by_order.to_dict("records")):
+        plr, ekm, dist = r["predicted_load_ratio"], r["emission_per_km"], r["distance_km"]
+        reco, est_reduction = [], 0.0
+        if plr < 0.40:
+            reco.append("suggest consolidation")
+            est_reduction += r["predicted_co2"] * 0.15
+        if ekm >= emission_high:
+            reco.append("suggest vehicle replacement")
+            est_reduction += r["predicted_co2"] * 0.20
+        if dist >= 200.0 and plr < 0.35:
+            reco.append("suggest route merge")
+            est_reduction += r["predicted_co2"] * 0.10
+        if not reco:
+            continue
+        score = 40.0 if plr < 0.40 else 0.0
+        score += 25.0 if ekm > 0 else 0.0
+        score += 35.0 if dist >= 200.0 and plr < 0.35 else 0.0
+        out.append({
+            "order_id": int(r["order_id"]),
+            "priority_score": round(min(100.0, score + (10.0 - rank * 0.5)), 1),
+            "recommendation": "; ".join(reco),
+            "estimated_co2_reduction": round(est_reduction, 2),
+        })
+    out.sort(key=lambda x: x["priority_score"], reverse=True)
+    return out
+
+
+def by_order_frame(n_orders: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "order_id": np.arange(1, n_orders + 1),
+        "predicted_co2": rng.gamma(2.0, 40.0, n_orders),
+        "predicted_load_ratio": rng.choice([0.2, 0.35, 0.38, 0.4, 0.7], n_orders),
+        "emission_per_km": np.where(rng.random(n_orders) < 0.1, 0.0, rng.gamma(2.0, 0.3, n_orders)),
+        "distance_km": rng.choice([50.0, 199.9, 200.0, 450.0], n_orders),
+    })
+
+
+@pytest.mark.parametrize("n_orders", [1, 15, 400])
+def test_default_rules_match_hard_coded_checks(n_orders):
+    by_order = by_order_frame(n_orders)
+    rules = load_rules(DEFAULT_RULES_PATH)
+
+    ranked = rank_recommendations(evaluate_rules(by_order, rules), top_n=None)
+
+    assert ranked.to_dict("records") == legacy_recommendations(by_order)
+
+
+def test_rule_set_file_is_reloaded_when_edited(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "rules": [{
+            "name": "long_empty",
+            "label": "merge",
+            "when": {"all": [
+                {"column": "distance_km", "op": ">=", "value": 200},
+                {"not": {"column": "predicted_load_ratio", "op": ">=", "value": 0.4}},
+            ]},
+            "co2_reduction": 0.5,
+            "priority": 20,
+        }],
+    }))
+    by_order = by_order_frame(50)
+
+    recs = evaluate_rules(by_order, get_rules(path))
+    expected = by_order[(by_order["distance_km"] >= 200) & (by_order["predicted_load_ratio"] < 0.4)]
+    assert recs["order_id"].tolist() == expected["order_id"].tolist()
+    assert set(recs["recommendation"]) == {"merge"}
+
+    path.write_text(json.dumps({"rules": [
+        {"label": "any", "when": {"any": [
+            {"column": "emission_per_km", "op": ">=", "value": {"quantile": 0.5}},
+            {"column": "predicted_co2", "op": "<", "value": 0},
+        ]}},
+    ]}))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    recs = evaluate_rules(by_order, get_rules(path))
+    assert len(recs) == int((by_order["emission_per_km"] >= by_order["emission_per_km"].median()).sum())
+
+
+@pytest.mark.parametrize("document, message", [
+    ({}, "'rules' list"),
+    ({"rules": [{"when": {"column": "distance_km", "op": "<", "value": 1}}]}, "'label' is required"),
+    ({"rules": [{"label": "x", "when": {"column": "speed", "op": "<", "value": 1}}]}, "unknown column"),
+    ({"rules": [{"label": "x", "when": {"column": "distance_km", "op": "~", "value": 1}}]}, "unknown op"),
+    ({"rules": [{"label": "x", "when": {"all": []}}]}, "non-empty list"),
+    ({"rules": [{"label": "x", "when": {"column": "distance_km", "op": "<", "value": {"quantile": 2}}}]},
+     "quantile"),
+])
+def test_invalid_rule_sets_are_rejected(document, message):
+    with pytest.raises(ValueError, match=message):
+        parse_rules(document)
@@ -0,0 +1,60 @@
+import pytest
+
+from app.recommendation import store
+
+RECS = [
+    {"order_id": 7, "recommendation": "underloaded; high_emission",
+     "estimated_co2_reduction": 3.0, "priority_score": 0.9},
+    {"order_id": 3, "recommendation": "high_emission",
+     "estimated_co2_reduction": 1.0, "priority_score": 0.4},
+]
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Current (model, fact) versions as seen by the store, counting every read."""
+    current = {"model": "m1", "facts": "f1", "reads": 0}
+
+    def fact_version(session):
+        current["reads"] += 1
+        return current["facts"]
+
+    monkeypatch.setattr(store, "model_version", lambda *paths: current["model"])
+    monkeypatch.setattr(store, "fact_version", fact_version)
+    monkeypatch.setattr(store, "generate_recommendations", lambda *args, **kwargs: list(RECS))
+    monkeypatch.setattr(store.settings, "recommendations_check_s", 60.0)
+    store.invalidate_current_versions()
+    yield current
+    store.invalidate_current_versions()
+
+
+def test_rebuild_replaces_rows_outside_postgres(session, versions):
+    assert store.build_recommendation_table(session) == 2
+    assert store.build_recommendation_table(session) == 2
+    session.commit()
+
+    rows = store.read_recommendations(session)
+    assert [(r.order_id, r.alert_type) for r in rows] == [(7, "underloaded"), (3, "high_emission")]
+    assert store.stored_versions(session) == ("m1", "f1")
+
+
+def test_stale_check_is_cached(session, versions):
+    store.build_recommendation_table(session)
+    built = store.stored_versions(session)
+    reads = versions["reads"]
+
+    assert not store.recommendations_stale(session, built)
+    versions["facts"] = "f2"
+    assert not store.recommendations_stale(session, built)
+    assert versions["reads"] == reads + 1
+
+    assert store.recommendations_stale(session, built, refresh=True)
+    assert versions["reads"] == reads + 2
+
+
+def test_missing_model_is_stale(session, versions, monkeypatch):
+    def missing(*paths):
+        raise FileNotFoundError("no model")
+
+    monkeypatch.setattr(store, "model_version", missing)
+    assert store.recommendations_stale(session, ("m1", "f1"), refresh=True)
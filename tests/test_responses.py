@@ -0,0 +1,71 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.api import responses
+from app.api.responses import FastJSONResponse
+from app.api.routes.orders import SUMMARY_COLUMNS, order_summary_payload
+from app.api.routes.routes import route_map_payload
+
+SUMMARY_ROWS = [
+    (3, 7, "M-AB 123", Decimal("120.5"), 40.25, 0.5),
+    (1, None, None, None, None, None),       # NULL vehicle and measures
+    (None, 2, "X", 1.0, 1.0, 1.0),           # NULL order_id: dropped
+    (2, 8, "M-CD 9", 0.0, Decimal("3.5"), None),
+]
+STOP_ROWS = [
+    (1, 1, 48.1, 11.5), (1, 2, 48.2, 11.6), (1, 3, None, 11.7),  # stop without coordinates
+    (4, 1, Decimal("52.5"), 13.4),
+    (None, 1, 50.0, 8.0),
+]
+RATIO_ROWS = [(1, 0.25), (4, None)]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def render(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(responses, "orjson", None)
+    elif responses.orjson is None:
+        pytest.skip("orjson is not installed")
+    return lambda content: json.loads(FastJSONResponse(content).body)
+
+
+def test_order_summary_columns_round_trip(render):
+    rows = render(order_summary_payload(SUMMARY_ROWS))
+    columns = render(order_summary_payload(SUMMARY_ROWS, columnar=True))
+
+    assert [r["order_id"] for r in rows] == [3, 1, 2]
+    assert rows[1] == {
+        "order_id": 1, "vehicle_id": None, "license_plate": None,
+        "distance_km": 0.0, "total_co2_kg": 0.0, "avg_load_ratio": 0.0,
+    }
+    assert [dict(zip(SUMMARY_COLUMNS, values)) for values in zip(*(columns[c] for c in SUMMARY_COLUMNS))] == rows
+
+
+def test_route_map_columns_round_trip(render):
+    rows = render(route_map_payload(STOP_ROWS, RATIO_ROWS))
+    columns = render(route_map_payload(STOP_ROWS, RATIO_ROWS, columnar=True))
+
+    offsets = columns["stop_offsets"]
+    rebuilt = [
+        {
+            "order_id": order_id,
+            "avg_load_ratio": columns["avg_load_ratio"][i],
+            "stops": [
+                {"sequence": columns["sequence"][s], "lat": columns["lat"][s], "lon": columns["lon"][s]}
+                for s in range(offsets[i], offsets[i + 1])
+            ],
+        }
+        for i, order_id in enumerate(columns["order_id"])
+    ]
+    assert rebuilt == rows
+    assert [r["order_id"] for r in rows] == [1, 4]
+    assert [s["sequence"] for s in rows[0]["stops"]] == [1, 2]
+    assert rows[1]["avg_load_ratio"] == 0.0
+
+
+def test_empty_payloads(render):
+    assert render(order_summary_payload([], columnar=True)) == {c: [] for c in SUMMARY_COLUMNS}
+    assert render(route_map_payload([], [], columnar=True))["stop_offsets"] == [0]
+    assert render(route_map_payload([], [])) == []
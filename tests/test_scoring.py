@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.database.models import TransportStageFact
+from app.optimization import scoring
+from app.optimization.scoring import LEVELS, top_candidates_in_db, top_n_indices
+
+WEIGHTS = {"low_load_weight": 10.0, "distance_weight": 0.1, "emission_weight": 1.0}
+
+
+@pytest.fixture
+def facts(session, monkeypatch):
+    """Stages with many exact score ties and NULL ids / measures."""
+    monkeypatch.setattr(scoring, "_inputs", None)
+    rng = np.random.default_rng(0)
+    types = ["ZFT001", "ZFT002", None]
+    session.add_all([
+        TransportStageFact(
+            id=uuid.uuid4(),
+            order_id=None if i % 17 == 0 else int(rng.integers(1, 30)),
+            vehicle_id=None if i % 13 == 0 else int(rng.integers(1, 8)),
+            transport_type=types[i % 3],
+            distance_km=None if i % 11 == 0 else float(rng.choice([10.0, 20.0, 40.0])),
+            co2_kg=float(rng.choice([1.0, 5.0])),
+            load_ratio=None if i % 7 == 0 else float(rng.choice([0.2, 0.5, 0.9])),
+            created_at=datetime.utcnow(),
+        )
+        for i in range(200)
+    ])
+    session.commit()
+    return session
+
+
+@pytest.mark.parametrize("level", LEVELS)
+@pytest.mark.parametrize("top_n", [1, 7, 25, 500])
+def test_in_memory_matches_database(facts, level, top_n):
+    inputs = scoring.get_score_inputs(facts, refresh=True)
+    memory = inputs.top_candidates(WEIGHTS, top_n, level)
+    database = top_candidates_in_db(facts, top_n=top_n, level=level, **WEIGHTS)
+
+    assert len(memory) == len(database)
+    key = "order_id" if level == "stage" else scoring.LEVEL_KEYS[level]
+    assert memory[key].tolist() == database[key].tolist()
+    if level == "stage":
+        assert memory["vehicle_id"].tolist() == database["vehicle_id"].tolist()
+    np.testing.assert_allclose(memory["optimization_score"], database["optimization_score"])
+
+
+def test_top_n_ranks_nan_first_and_keeps_top_n():
+    scores = np.array([1.0, np.nan, 3.0, 3.0, np.nan, 2.0])
+    assert top_n_indices(scores, 3).tolist() == [1, 4, 2]
+    assert top_n_indices(scores, 1).tolist() == [1]
+    assert top_n_indices(scores, 5).tolist() == [1, 4, 2, 3, 5]
+    assert top_n_indices(scores, None).tolist() == [1, 4, 2, 3, 5, 0]
+    assert top_n_indices(scores, 0).tolist() == []
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from app.analytics.fact_builder import compute_stage_co2
+from app.optimization.simulation import simulate_vehicle_change
+from tests.reference import FLEET, make_reference_data
+
+
+def _stages():
+    return pd.DataFrame({
+        "order_id": [1, 2, 3, 4],
+        "vehicle_id": [10, 11, 12, 13],
+        "distance_km": [100.0, 50.0, 80.0, 20.0],
+        "total_weight_kg": [600.0, 3000.0, 900.0, 100.0],
+        "vehicle_capacity_kg": [7500.0, 7500.0, 7500.0, 7500.0],
+        "load_ratio": [0.08, 0.4, 0.12, 0.0133],
+        "co2_kg": [60.0, 35.0, 50.0, 11.0],
+    })
+
+
+def test_vehicle_change():
+    ref = make_reference_data(FLEET + [("No capacity", None, None, 0.3, 0.5)])
+    mapping = {10: "Van", 11: "No capacity", 12: "Unknown type"}  # 13 unmapped
+
+    out = simulate_vehicle_change(_stages(), mapping, reference=ref)
+
+    # Van: weight over its capacity.
+    assert out.loc[0, "vehicle_capacity_kg_after"] == 1200.0
+    assert out.loc[0, "load_ratio_after"] == 0.5
+    assert np.isclose(out.loc[0, "co2_kg_after"], compute_stage_co2(100.0, 0.5, 0.18, 0.26))
+    # NULL capacity: simulated as capacity 0, i.e. empty-run emissions.
+    assert out.loc[1, "vehicle_capacity_kg_after"] == 0.0
+    assert out.loc[1, "load_ratio_after"] == 0.0
+    assert np.isclose(out.loc[1, "co2_kg_after"], 50.0 * 0.3)
+    # Unknown type and unmapped vehicle keep their values.
+    for i in (2, 3):
+        row = out.loc[i]
+        assert (row["vehicle_capacity_kg_after"], row["load_ratio_after"], row["co2_kg_after"]) == (
+            row["vehicle_capacity_kg"], row["load_ratio"], row["co2_kg"]
+        )